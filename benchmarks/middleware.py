@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""Per-request overhead of UnpolyMiddleware under WSGI and ASGI.
+
+    python3 -m benchmarks.middleware
+"""
+import asyncio
+import os
+import time
+
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'tests.settings')
+django.setup()
+
+from django.http import HttpResponse  # noqa: E402
+from django.test import AsyncRequestFactory, RequestFactory  # noqa: E402
+from django.utils.deprecation import MiddlewareMixin  # noqa: E402
+
+from unpoly.middleware import UnpolyMiddleware  # noqa: E402
+
+ITERATIONS = 20000
+HEADERS = {'X-Up-Version': '2.5.1', 'X-Up-Target': '#content_panel'}
+
+
+def get_response(request):
+    return HttpResponse()
+
+
+async def get_async_response(request):
+    return HttpResponse()
+
+
+class ThreadedMiddleware(UnpolyMiddleware):
+    """Middleware that Django runs in a thread under ASGI, for comparison."""
+    __call__ = MiddlewareMixin.__call__
+    __acall__ = MiddlewareMixin.__acall__
+
+    def process_request(self, request):
+        self.annotate_request(request)
+
+    def process_response(self, request, response):
+        return self.set_headers(request, response)
+
+
+def time_sync(handler, requests) -> float:
+    start = time.perf_counter()
+    for request in requests:
+        handler(request)
+    return (time.perf_counter() - start) / len(requests)
+
+
+def time_async(handler, requests) -> float:
+    async def run():
+        start = time.perf_counter()
+        for request in requests:
+            await handler(request)
+        return (time.perf_counter() - start) / len(requests)
+
+    return asyncio.run(run())
+
+
+def main(iterations: int = ITERATIONS) -> dict:
+    factory = RequestFactory(headers=HEADERS)
+    async_factory = AsyncRequestFactory(headers=HEADERS)
+
+    def wsgi_requests():
+        return [factory.get('/') for _ in range(iterations)]
+
+    def asgi_requests():
+        return [async_factory.get('/') for _ in range(iterations)]
+
+    results = {
+        'wsgi_baseline': time_sync(get_response, wsgi_requests()),
+        'wsgi_middleware': time_sync(UnpolyMiddleware(get_response), wsgi_requests()),
+        'asgi_baseline': time_async(get_async_response, asgi_requests()),
+        'asgi_middleware': time_async(UnpolyMiddleware(get_async_response), asgi_requests()),
+        'asgi_threaded_middleware': time_async(ThreadedMiddleware(get_async_response), asgi_requests()),
+    }
+
+    for name in ('wsgi', 'asgi'):
+        results[f'{name}_overhead'] = results[f'{name}_middleware'] - results[f'{name}_baseline']
+
+    return results
+
+
+if __name__ == '__main__':
+    for name, seconds in main().items():
+        print(f'{name:<28} {seconds * 1_000_000:8.2f} µs/request')
@@ -0,0 +1,75 @@
+"""Timing, JSON reports and baseline comparison for the benchmark suite."""
+import json
+import platform
+import sys
+import timeit
+from typing import Callable, Dict, List
+
+import django
+
+# Slowdown relative to the baseline that counts as a regression
+DEFAULT_TOLERANCE = 0.25
+
+
+def measure(func: Callable, number: int, repeat: int = 5) -> float:
+    """Return the best time of `repeat` runs, in microseconds per call."""
+    timer = timeit.Timer(func)
+    return min(timer.repeat(repeat=repeat, number=number)) / number * 1_000_000
+
+
+def run(benchmarks: Dict[str, Callable], number: int, repeat: int = 5, select: str = '') -> dict:
+    """Time each benchmark whose name contains `select`, returning the JSON report."""
+    results = {
+        name: round(measure(func, number, repeat), 3)
+        for name, func in benchmarks.items()
+        if select in name
+    }
+    return {
+        'unit': 'µs/op',
+        'python': platform.python_version(),
+        'django': django.get_version(),
+        'number': number,
+        'repeat': repeat,
+        'results': results,
+    }
+
+
+def compare(report: dict, baseline: dict, tolerance: float = DEFAULT_TOLERANCE) -> List[str]:
+    """Return a description of each benchmark that is slower than the baseline allows."""
+    regressions = []
+    for name, seconds in report['results'].items():
+        previous = baseline['results'].get(name)
+        if previous and seconds > previous * (1 + tolerance):
+            regressions.append(
+                f'{name}: {seconds:.3f} µs/op vs baseline {previous:.3f} µs/op '
+                f'(+{(seconds / previous - 1) * 100:.0f}%)'
+            )
+    return regressions
+
+
+def load(path: str) -> dict:
+    with open(path) as f:
+        return json.load(f)
+
+
+def dump(report: dict, stream) -> None:
+    json.dump(report, stream, indent=2, sort_keys=True)
+    stream.write('\n')
+
+
+def save(report: dict, path: str) -> None:
+    """Write the report to the file, or to stdout when the path is -."""
+    if path == '-':
+        dump(report, sys.stdout)
+        return
+    with open(path, 'w') as f:
+        dump(report, f)
+
+
+def print_report(report: dict, baseline: dict = None, stream=sys.stdout) -> None:
+    for name, value in report['results'].items():
+        line = f'{name:<40} {value:10.3f} µs/op'
+        previous = (baseline or {}).get('results', {}).get(name)
+        if previous:
+            line += f'  {(value / previous - 1) * 100:+6.1f}%'
+        print(line, file=stream)
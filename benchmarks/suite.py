@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""Micro-benchmarks of the middleware, the Unpoly helper and the view mixins.
+
+Runs offline against the test settings, without a database:
+
+    python3 -m benchmarks.suite --json results.json
+    python3 -m benchmarks.suite --save-baseline baseline.json
+    python3 -m benchmarks.suite --baseline baseline.json
+
+Exits with status 1 when a benchmark is slower than the baseline allows.
+"""
+import argparse
+import os
+import sys
+
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'tests.settings')
+django.setup()
+
+from django import forms  # noqa: E402
+from django.http import HttpResponse  # noqa: E402
+from django.test import RequestFactory  # noqa: E402
+from django.views.generic import TemplateView  # noqa: E402
+from vanilla import CreateView  # noqa: E402
+
+from unpoly.forms import UnpolyCrispyFormMixin  # noqa: E402
+from unpoly.middleware import UnpolyMiddleware  # noqa: E402
+from unpoly.unpoly import Unpoly  # noqa: E402
+from unpoly.views import UnpolyCrispyFormViewMixin, UnpolyViewMixin  # noqa: E402
+
+from .runner import DEFAULT_TOLERANCE, compare, load, print_report, run, save  # noqa: E402
+
+NUMBER = 2000
+HEADERS = {
+    'HTTP_X_UP_VERSION': '2.5.1',
+    'HTTP_X_UP_MODE': 'modal',
+    'HTTP_X_UP_TARGET': '#content_panel,#breadcrumb_bar',
+    'HTTP_X_UP_FAIL_TARGET': '#main_fail_target',
+}
+
+
+class Boxcar:
+    """Stand-in for a saved model instance, so form round-trips don't need a database."""
+    id = 1
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+
+    def __str__(self) -> str:
+        return self.name
+
+
+class BoxcarForm(UnpolyCrispyFormMixin, forms.Form):
+    name = forms.CharField(max_length=50)
+    length = forms.IntegerField(min_value=1)
+
+    def __init__(self, *args, instance: Boxcar = None, **kwargs) -> None:
+        self.instance = instance
+        super().__init__(*args, **kwargs)
+
+    def save(self) -> Boxcar:
+        return Boxcar(self.cleaned_data['name'])
+
+
+class BoxcarCreate(UnpolyCrispyFormViewMixin, CreateView):
+    form_class = BoxcarForm
+    template_name = 'unpoly_modal_form.html'
+    success_url = '/boxcars/'
+    action = 'create'
+    _send_optimized_success_response = True
+
+    def optimized_success_response(self) -> HttpResponse:
+        return HttpResponse(f'<p id="boxcar">{self.object}</p>')
+
+
+class PageView(UnpolyViewMixin, TemplateView):
+    template_name = 'unpoly_page.html'
+
+
+def get_response(request):
+    return HttpResponse()
+
+
+def middleware_benchmarks(factory: RequestFactory) -> dict:
+    middleware = UnpolyMiddleware(get_response)
+    request = factory.get('/', **HEADERS)
+    middleware.annotate_request(request)
+    request.is_unpoly()
+    response = HttpResponse()
+
+    return {
+        'middleware.call': lambda: middleware(factory.get('/', **HEADERS)),
+        'middleware.set_headers': lambda: middleware.set_headers(request, response),
+    }
+
+
+def helper_benchmarks() -> dict:
+    def accessors():
+        up = Unpoly(meta=HEADERS)
+        up.is_unpoly()
+        up.mode()
+        up.layer()
+        up.fail_layer()
+        up.target()
+        up.fail_target()
+        up.targets()
+        up.is_validating()
+
+    def emitter(count: int, layer: bool, buffered: bool = False):
+        def emit():
+            up = Unpoly(meta=HEADERS)
+            response = HttpResponse()
+            send = up.layer_emit if layer else up.emit
+            for idx in range(count):
+                send(None if buffered else response, 'record:crud', {'id': idx})
+            up.write_events(response)
+        return emit
+
+    benchmarks = {'unpoly.accessors': accessors}
+    for count in (1, 10, 100):
+        benchmarks[f'unpoly.emit[{count}]'] = emitter(count, layer=False)
+        benchmarks[f'unpoly.emit_buffered[{count}]'] = emitter(count, layer=False, buffered=True)
+        benchmarks[f'unpoly.layer_emit[{count}]'] = emitter(count, layer=True)
+
+    return benchmarks
+
+
+def view_benchmarks(factory: RequestFactory) -> dict:
+    benchmarks = {}
+    for mode in ('root', 'modal', 'drawer'):
+        def template_names(mode=mode):
+            view = PageView()
+            view.setup(factory.get('/', **{**HEADERS, 'HTTP_X_UP_MODE': mode}))
+            view.get_template_names()
+        benchmarks[f'views.get_template_names[{mode}]'] = template_names
+
+    form_kwargs = {'up_target': '#content_panel', 'up_fail_target': '#main_fail_target'}
+    data = {'name': 'Hopper', 'length': '12'}
+
+    def form_valid():
+        request = factory.post('/boxcars/new/', data, **HEADERS)
+        BoxcarCreate.as_view()(request)
+
+    def validation():
+        request = factory.post('/boxcars/new/', data, HTTP_X_UP_VALIDATE='name', **HEADERS)
+        BoxcarCreate.as_view()(request).render()
+
+    benchmarks.update({
+        'forms.crispy_form_init': lambda: BoxcarForm(**form_kwargs),
+        'views.form_valid': form_valid,
+        'views.validation': validation,
+    })
+    return benchmarks
+
+
+def benchmarks() -> dict:
+    factory = RequestFactory()
+    return {
+        **middleware_benchmarks(factory),
+        **helper_benchmarks(),
+        **view_benchmarks(factory),
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('-k', dest='select', default='', help='Only run benchmarks whose name contains this')
+    parser.add_argument('--number', type=int, default=NUMBER, help='Calls per timing run')
+    parser.add_argument('--repeat', type=int, default=5, help='Timing runs; the fastest is reported')
+    parser.add_argument('--json', help='Write the JSON report to this file, or - for stdout')
+    parser.add_argument('--baseline', help='Compare against this JSON report')
+    parser.add_argument('--save-baseline', help='Write the JSON report as the new baseline')
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                        help='Allowed slowdown versus the baseline, as a fraction')
+    args = parser.parse_args(argv)
+
+    report = run(benchmarks(), number=args.number, repeat=args.repeat, select=args.select)
+    baseline = load(args.baseline) if args.baseline else None
+
+    # Keep stdout for the JSON report when it's written there
+    print_report(report, baseline, stream=sys.stderr if args.json == '-' else sys.stdout)
+    if args.json:
+        save(report, args.json)
+
+    if args.save_baseline:
+        save(report, args.save_baseline)
+
+    if baseline:
+        regressions = compare(report, baseline, args.tolerance)
+        for regression in regressions:
+            print(f'REGRESSION {regression}', file=sys.stderr)
+        if regressions:
+            return 1
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
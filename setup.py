@@ -35,10 +35,14 @@ setup(
     long_description_content_type='text/markdown',
     packages=[
         "unpoly",
+        "unpoly.management",
+        "unpoly.management.commands",
+        "unpoly.templatetags",
     ],
     include_package_data=True,
+    python_requires=">=3.9",
     install_requires=[
-        "Django>=3.1",
+        "Django>=4.2",
     ],
     tests_require=[
         "django-crispy-forms",
@@ -52,9 +56,8 @@ setup(
         "Intended Audience :: Developers",
         "License :: OSI Approved :: {}".format(LICENSE),
         "Natural Language :: English",
-        "Programming Language :: Python :: 3.8",
         "Programming Language :: Python :: 3.9",
         "Framework :: Django",
-        "Framework :: Django :: 3.1",
+        "Framework :: Django :: 4.2",
     ],
 )
@@ -0,0 +1,191 @@
+import json
+
+from django import forms
+from django.contrib.auth.models import User
+from django.db import connection, models
+from django.http import HttpResponse
+from django.template.response import TemplateResponse
+from django.test import AsyncRequestFactory, TransactionTestCase, override_settings
+from django.urls import path
+from django.views.generic import CreateView, TemplateView, UpdateView
+from vanilla import UpdateView as VanillaUpdateView
+
+from unpoly.forms import UnpolyCrispyFormMixin
+from unpoly.views import AsyncUnpolyCrispyFormViewMixin, AsyncUnpolyFormViewMixin, AsyncUnpolyViewMixin
+
+
+class Boxcar(models.Model):
+    name = models.CharField(max_length=50)
+
+    class Meta:
+        app_label = 'app_label'
+
+    def __str__(self):
+        return self.name
+
+
+class BoxcarForm(UnpolyCrispyFormMixin, forms.ModelForm):
+
+    class Meta:
+        model = Boxcar
+        fields = ['name']
+
+
+class BoxcarCreate(AsyncUnpolyFormViewMixin, CreateView):
+    model = Boxcar
+    fields = ['name']
+    template_name = 'unpoly_modal_form.html'
+    success_url = '/boxcars/'
+    action = 'create'
+    _send_optimized_success_response = True
+
+    async def optimized_success_response(self):
+        count = await Boxcar.objects.acount()
+        return HttpResponse(f'<p id="boxcar_count">{count}</p>')
+
+
+class BoxcarUpdate(AsyncUnpolyCrispyFormViewMixin, VanillaUpdateView):
+    model = Boxcar
+    form_class = BoxcarForm
+    template_name = 'unpoly_modal_form.html'
+    success_url = '/boxcars/'
+
+
+class BoxcarRename(AsyncUnpolyFormViewMixin, UpdateView):
+    model = Boxcar
+    fields = ['name']
+    template_name = 'unpoly_modal_form.html'
+    success_url = '/boxcars/'
+
+
+class FirstBoxcarRename(BoxcarRename):
+
+    def get_object(self):
+        return Boxcar.objects.order_by('pk').first()
+
+
+class TrainPage(AsyncUnpolyViewMixin, TemplateView):
+    template_name = 'unpoly_page.html'
+
+
+class SharedTrainPage(TrainPage):
+    single_flight_timeout = 5
+    fragment_cache_vary = ('user',)
+
+
+urlpatterns = [
+    path('trains/', SharedTrainPage.as_view()),
+]
+
+
+class CountedBoxcarUpdate(BoxcarUpdate):
+    unpoly_validate_template = 'unpoly_validate_fields.html'
+    forms = 0
+
+    def get_form(self, *args, **kwargs):
+        CountedBoxcarUpdate.forms += 1
+        return super().get_form(*args, **kwargs)
+
+
+class AsyncUnpolyFormViewMixinTest(TransactionTestCase):
+    """Saves are committed, so the `record:crud` event is emitted before the response is returned."""
+
+    def setUp(self):
+        with connection.schema_editor() as editor:
+            editor.create_model(Boxcar)
+
+    def tearDown(self):
+        with connection.schema_editor() as editor:
+            editor.delete_model(Boxcar)
+
+    def get(self, url, **headers):
+        return AsyncRequestFactory().get(url, headers={'X-Up-Version': '2.5.1', **headers})
+
+    def post(self, url, data, **headers):
+        return AsyncRequestFactory().post(url, data, headers={'X-Up-Version': '2.5.1', **headers})
+
+    def test_views_are_async(self):
+        self.assertTrue(BoxcarCreate.view_is_async)
+        self.assertTrue(BoxcarUpdate.view_is_async)
+
+    async def test_create(self):
+        request = self.post('/boxcars/new/', {'name': 'Hopper'})
+        response = await BoxcarCreate.as_view()(request)
+
+        self.assertEqual(response.content, b'<p id="boxcar_count">1</p>')
+        boxcar = await Boxcar.objects.aget()
+        self.assertEqual(boxcar.name, 'Hopper')
+
+        event = json.loads(response['X-Up-Events'])[0]
+        self.assertEqual(event['type'], 'record:crud')
+        self.assertEqual(event['id'], boxcar.id)
+
+    async def test_create_invalid(self):
+        request = self.post('/boxcars/new/', {'name': ''})
+        response = await BoxcarCreate.as_view()(request)
+
+        self.assertIsInstance(response, TemplateResponse)
+        self.assertTrue(response.context_data['form'].errors)
+        self.assertFalse(await Boxcar.objects.aexists())
+
+    async def test_update_vanilla_view(self):
+        boxcar = await Boxcar.objects.acreate(name='Hopper')
+
+        request = self.get(f'/boxcars/{boxcar.pk}/')
+        response = await BoxcarUpdate.as_view()(request, pk=boxcar.pk)
+        self.assertEqual(response.context_data['form'].instance, boxcar)
+
+        request = self.post(f'/boxcars/{boxcar.pk}/', {'name': 'Tanker'})
+        response = await BoxcarUpdate.as_view()(request, pk=boxcar.pk)
+        self.assertEqual(response.status_code, 302)
+        await boxcar.arefresh_from_db()
+        self.assertEqual(boxcar.name, 'Tanker')
+
+    async def test_validation_does_not_save(self):
+        boxcar = await Boxcar.objects.acreate(name='Hopper')
+
+        request = self.post(f'/boxcars/{boxcar.pk}/', {'name': 'Tanker'}, **{'X-Up-Validate': 'name'})
+        response = await BoxcarUpdate.as_view()(request, pk=boxcar.pk)
+
+        self.assertIsInstance(response, TemplateResponse)
+        self.assertEqual(response.context_data['form'].cleaned_data['name'], 'Tanker')
+        await boxcar.arefresh_from_db()
+        self.assertEqual(boxcar.name, 'Hopper')
+
+    async def test_update_without_pk(self):
+        """
+        Like Django's get_object, views looking up an object need a pk or slug
+        """
+        with self.assertRaises(AttributeError):
+            await BoxcarRename.as_view()(self.get('/boxcars/'))
+
+    async def test_overridden_get_object(self):
+        boxcar = await Boxcar.objects.acreate(name='Hopper')
+
+        response = await FirstBoxcarRename.as_view()(self.get('/boxcars/first/'))
+        self.assertEqual(response.context_data['form'].instance, boxcar)
+
+    async def test_url_kwargs_in_context(self):
+        response = await TrainPage.as_view()(self.get('/trains/7/'), train=7)
+        self.assertEqual(response.context_data['train'], 7)
+
+    async def test_validation_builds_form_once(self):
+        boxcar = await Boxcar.objects.acreate(name='Hopper')
+        CountedBoxcarUpdate.forms = 0
+
+        request = self.post(f'/boxcars/{boxcar.pk}/', {'name': 'Tanker'}, **{'X-Up-Validate': 'other'})
+        response = await CountedBoxcarUpdate.as_view()(request, pk=boxcar.pk)
+        self.assertEqual(response.context_data['form'].cleaned_data['name'], 'Tanker')
+        self.assertEqual(CountedBoxcarUpdate.forms, 1)
+
+    @override_settings(ROOT_URLCONF=__name__)
+    async def test_single_flight_key_for_authenticated_user(self):
+        """
+        The lazy user of AuthenticationMiddleware should be loaded outside the event loop
+        """
+        user = await User.objects.acreate_user('conductor')
+        await self.async_client.aforce_login(user)
+
+        response = await self.async_client.get('/trains/', headers={'X-Up-Version': '2.5.1'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['user'], user)
@@ -0,0 +1,144 @@
+import json
+
+from django.contrib import messages
+from django.contrib.auth.models import AnonymousUser
+from django.contrib.messages.storage.cookie import CookieStorage
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.middleware.csrf import CsrfViewMiddleware
+from django.test import RequestFactory, SimpleTestCase
+from django.views.generic import TemplateView
+
+from unpoly.cache import CSRF_TOKEN_PLACEHOLDER, FragmentCache, fragment_cache, model_tag
+from unpoly.views import UnpolyViewMixin
+
+
+class CachedView(UnpolyViewMixin, TemplateView):
+    template_name = 'unpoly_page.html'
+    fragment_cache_timeout = 60
+    fragment_cache_vary = ('HTTP_ACCEPT_LANGUAGE',)
+    fragment_cache_tags = ('notes',)
+    renders = 0
+
+    def get_context_data(self, **kwargs):
+        CachedView.renders += 1
+        return super().get_context_data(**kwargs)
+
+
+class CachedFormView(CachedView):
+    template_name = 'unpoly_csrf_form.html'
+    fragment_cache_vary = ('user',)
+
+
+class CachedEventsView(CachedView):
+    messages_as_events = True
+
+
+class FragmentCacheTest(SimpleTestCase):
+
+    def setUp(self):
+        cache.clear()
+
+    def test_set_and_get(self):
+        fragments = FragmentCache(max_size=10)
+        key = fragments.make_key(['/up', '#content_panel'], ['notes'])
+
+        response = HttpResponse('<p>ok</p>', headers={'X-Up-Title': 'Notes'})
+        self.assertTrue(fragments.set(key, response, 60))
+
+        cached = fragments.get(key)
+        self.assertEqual(cached.content, b'<p>ok</p>')
+        self.assertEqual(cached['X-Up-Title'], 'Notes')
+
+        self.assertFalse(fragments.set(key, HttpResponse('<p>too large</p>'), 60))
+        self.assertFalse(fragments.set(key, HttpResponse('', status=404), 60))
+
+    def test_invalidate_tag(self):
+        key = fragment_cache.make_key(['/up'], ['notes', model_tag('app_label.Note')])
+        self.assertEqual(key, fragment_cache.make_key(['/up'], [model_tag('app_label.Note'), 'notes']))
+
+        fragment_cache.invalidate(model_tag('app_label.note'))
+        self.assertNotEqual(key, fragment_cache.make_key(['/up'], ['notes', model_tag('app_label.Note')]))
+
+
+class CachedViewTest(SimpleTestCase):
+
+    def setUp(self):
+        cache.clear()
+        CachedView.renders = 0
+
+    def get(self, **headers):
+        request = RequestFactory().get('/up', HTTP_X_UP_VERSION='2.5.1', **headers)
+        response = CachedView.as_view()(request)
+        if hasattr(response, 'render'):
+            response.render()
+        return response
+
+    def test_cached_response(self):
+        response = self.get(HTTP_X_UP_TARGET='#content_panel')
+        cached = self.get(HTTP_X_UP_TARGET='#content_panel')
+        self.assertEqual(CachedView.renders, 1)
+        self.assertEqual(response.content, cached.content)
+
+        self.get(HTTP_X_UP_TARGET='#content_panel', HTTP_X_UP_MODE='modal')
+        self.get(HTTP_X_UP_TARGET='#content_panel', HTTP_ACCEPT_LANGUAGE='de')
+        self.assertEqual(CachedView.renders, 3)
+
+        self.get(HTTP_X_UP_TARGET='#content_panel', HTTP_X_TEMPLATE_NAME='unpoly_list.html')
+        self.get(HTTP_X_UP_TARGET='#content_panel', HTTP_X_TEMPLATE_TYPE='table')
+        self.assertEqual(CachedView.renders, 5)
+
+    def test_invalidated_response(self):
+        self.get()
+        fragment_cache.invalidate('notes')
+        self.get()
+        self.assertEqual(CachedView.renders, 2)
+
+    def test_cached_form_csrf_token(self):
+        """
+        Visitors without cookies should each get their own CSRF token, and cookie, from cached HTML
+        """
+        def get_response(request):
+            response = CachedFormView.as_view()(request)
+            return response.render() if hasattr(response, 'render') else response
+
+        responses = []
+        for _ in range(2):
+            request = RequestFactory().get('/up', HTTP_X_UP_VERSION='2.5.1', HTTP_X_UP_TARGET='#main_up_target')
+            request.user = AnonymousUser()
+            responses.append(CsrfViewMiddleware(get_response)(request))
+
+        self.assertEqual(CachedView.renders, 1)
+        first, second = responses
+        for response in responses:
+            self.assertContains(response, 'name="csrfmiddlewaretoken"')
+            self.assertNotContains(response, CSRF_TOKEN_PLACEHOLDER)
+            self.assertIn('csrftoken', response.cookies)
+        self.assertNotEqual(first.content, second.content)
+        self.assertNotEqual(first.cookies['csrftoken'].value, second.cookies['csrftoken'].value)
+
+    def test_cached_messages_as_events(self):
+        """
+        Responses without flash messages should be cached, and leave the messages cookie alone
+        """
+        def get(message=None):
+            request = RequestFactory().get('/up', HTTP_X_UP_VERSION='2.5.1', HTTP_X_UP_TARGET='#content_panel')
+            request._messages = CookieStorage(request)
+            if message:
+                messages.success(request, message)
+            response = CachedEventsView.as_view()(request)
+            if hasattr(response, 'render'):
+                response.render()
+            request._messages.update(response)
+            return response
+
+        for _ in range(2):
+            response = get()
+            self.assertNotIn('messages', response.cookies)
+            self.assertFalse(response.has_header('X-Up-Events'))
+        self.assertEqual(CachedView.renders, 1)
+
+        response = get('Saved')
+        self.assertEqual(json.loads(response['X-Up-Events'])[0]['message'], 'Saved')
+        get()
+        self.assertEqual(CachedView.renders, 1)
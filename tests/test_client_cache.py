@@ -0,0 +1,51 @@
+from django.db import models
+from django.http import HttpResponse
+from django.test import SimpleTestCase
+
+from unpoly.client_cache import ClientCacheRegistry
+
+
+class Caboose(models.Model):
+    name = models.CharField(max_length=50)
+
+    class Meta:
+        app_label = 'app_label'
+
+
+class ProxyCaboose(Caboose):
+
+    class Meta:
+        app_label = 'app_label'
+        proxy = True
+
+
+class ClientCacheRegistryTest(SimpleTestCase):
+
+    def setUp(self):
+        self.registry = ClientCacheRegistry()
+
+    def test_unregistered_model(self):
+        response = self.registry.set_headers(HttpResponse(), Caboose(pk=3))
+        self.assertFalse(response.has_header('X-Up-Expire-Cache'))
+        self.assertFalse(response.has_header('X-Up-Evict-Cache'))
+
+    def test_registered_patterns(self):
+        self.registry.register(Caboose, expire=['/cabooses/*'], evict=['/cabooses/{obj.pk}/'])
+        self.registry.register('app_label.Caboose', expire=['/dashboard'])
+
+        response = self.registry.set_headers(HttpResponse(), ProxyCaboose(pk=3))
+        self.assertEqual(response['X-Up-Expire-Cache'], '/cabooses/* /dashboard')
+        self.assertEqual(response['X-Up-Evict-Cache'], '/cabooses/3/')
+
+    def test_nothing_to_expire(self):
+        self.registry.register(Caboose)
+        response = self.registry.set_headers(HttpResponse(), Caboose(pk=3))
+        self.assertEqual(response['X-Up-Expire-Cache'], 'false')
+
+        self.registry.unregister(Caboose)
+        self.assertFalse(self.registry.is_registered(Caboose))
+
+    def test_many_objects(self):
+        self.registry.register(Caboose, expire=['/cabooses/', '/cabooses/{obj.pk}/'])
+        response = self.registry.set_headers_many(HttpResponse(), [Caboose(pk=3), Caboose(pk=4), None])
+        self.assertEqual(response['X-Up-Expire-Cache'], '/cabooses/ /cabooses/3/ /cabooses/4/')
@@ -1,7 +1,11 @@
+import re
+
 from django import forms
-from django.test import SimpleTestCase
+from django.core.cache import caches
+from django.template import Context, Template
+from django.test import RequestFactory, SimpleTestCase, override_settings
 
-from unpoly.forms import UnpolyCrispyFormMixin
+from unpoly.forms import CSRF_TOKEN_PLACEHOLDER, UnpolyCrispyFormMixin, unpoly_form_attrs_for
 from .settings import MAIN_UP_TARGET, MAIN_UP_FAIL_TARGET
 
 
@@ -38,3 +42,73 @@ class UnpolyCrispyFormMixinTest(SimpleTestCase):
         )
 
         self.assertEqual(form.helper.attrs['up-layer'], 'current')
+
+    def test_unpoly_form_attrs_cached(self):
+        """
+        Forms share the class FormHelper prototype, with their own attributes
+        """
+        unpoly_form_attrs_for.cache_clear()
+        first = UnpolyForm(up_target=MAIN_UP_TARGET)
+        second = UnpolyForm(up_target='.other')
+        plain = UnpolyForm()
+
+        self.assertIs(first.helper.layout, second.helper.layout)
+        self.assertIsNot(first.helper.attrs, second.helper.attrs)
+        self.assertEqual(second.helper.attrs['up-target'], '.other')
+        self.assertEqual(plain.helper.attrs, {})
+
+        UnpolyForm(up_target=MAIN_UP_TARGET)
+        self.assertEqual(unpoly_form_attrs_for.cache_info().hits, 1)
+
+    def test_configure_helper(self):
+        self.assertEqual(TemplateForm(up_target=MAIN_UP_TARGET).helper.template, 'unpoly_crispy_form.html')
+        self.assertIsNone(UnpolyForm().helper.template)
+
+
+class TemplateForm(UnpolyCrispyFormMixin, forms.Form):
+    name = forms.CharField()
+    rendered_form_cache_timeout = 60
+
+    @classmethod
+    def configure_helper(cls, helper):
+        helper.template = 'unpoly_crispy_form.html'
+
+
+@override_settings(
+    CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}},
+    CRISPY_TEMPLATE_PACK='unpoly',
+)
+class RenderUnpolyFormTest(SimpleTestCase):
+
+    def setUp(self):
+        self.factory = RequestFactory()
+
+    def render(self, form, request):
+        return Template('{% load unpoly_crispy %}{% unpoly_crispy form %}').render(
+            Context({'form': form, 'request': request})
+        )
+
+    def test_unbound_form_cached(self):
+        """
+        Cached form HTML should carry the CSRF token of each request
+        """
+        form = TemplateForm(form_action='/up', up_target=MAIN_UP_TARGET, initial={'name': 'Caboose'})
+        request = self.factory.get('/')
+        html = self.render(form, request)
+
+        self.assertIn('up-target="body"', html)
+        self.assertIn('value="Caboose"', html)
+        self.assertIn('name="csrfmiddlewaretoken"', html)
+        self.assertNotIn(CSRF_TOKEN_PLACEHOLDER, html)
+        self.assertIsNotNone(caches['default'].get(form.get_rendered_form_cache_key()))
+
+        other_form = TemplateForm(form_action='/up', up_target=MAIN_UP_TARGET, initial={'name': 'Caboose'})
+        other_html = self.render(other_form, self.factory.get('/'))
+        token = re.compile(r'name="csrfmiddlewaretoken" value="[^"]+"')
+        self.assertNotEqual(token.search(html).group(), token.search(other_html).group())
+        self.assertEqual(token.sub('', html), token.sub('', other_html))
+
+    def test_bound_form_not_cached(self):
+        form = TemplateForm({'name': 'Caboose'}, up_target=MAIN_UP_TARGET)
+        self.render(form, self.factory.post('/'))
+        self.assertIsNone(caches['default'].get(form.get_rendered_form_cache_key()))
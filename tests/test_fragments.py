@@ -0,0 +1,82 @@
+from django.test import SimpleTestCase
+
+from unpoly.fragments import Selector, extract_fragments, split_selectors
+
+
+page = """<html><head><title>Notes</title></head><body>
+<nav id="breadcrumb_bar"><a href="/">Home</a> &raquo; Notes</nav>
+<div id="messages" up-hungry></div>
+<main>
+<div id="content_panel" class="panel active"><p>First<br>line
+<ul class="item_list"><li>One<li>Two</ul>
+</div>
+</main>
+</body></html>"""
+
+
+class SelectorTest(SimpleTestCase):
+
+    def test_split_selectors(self):
+        self.assertEqual(
+            split_selectors('#content_panel, #breadcrumb_bar,.item_list'),
+            ['#content_panel', '#breadcrumb_bar', '.item_list'],
+        )
+        self.assertEqual(split_selectors(':is(a, b), main'), [':is(a, b)', 'main'])
+
+    def test_parse_selector(self):
+        selector = Selector.parse('div#content_panel.panel:maybe')
+        self.assertEqual(selector.tag, 'div')
+        self.assertEqual(selector.id, 'content_panel')
+        self.assertEqual(selector.classes, {'panel'})
+        self.assertTrue(selector.optional)
+
+        selector = Selector.parse('#content_panel .item_list')
+        self.assertEqual(selector.classes, {'item_list'})
+        self.assertEqual([ancestor.id for ancestor in selector.ancestors], ['content_panel'])
+        self.assertIsNone(Selector.parse('[up-main]'))
+
+
+class ExtractFragmentsTest(SimpleTestCase):
+
+    def test_extract_by_id(self):
+        html = extract_fragments(page, '#content_panel', include_hungry=False, include_title=False)
+        self.assertTrue(html.startswith('<div id="content_panel" class="panel active">'))
+        self.assertIn('<li>Two</ul>\n</div>', html)
+        self.assertNotIn('breadcrumb_bar', html)
+
+    def test_extract_comma_list_and_hungry(self):
+        html = extract_fragments(page, '.item_list, nav:after')
+        self.assertIn('<a href="/">Home</a> &raquo; Notes</nav>', html)
+        self.assertIn('<div id="messages" up-hungry></div>', html)
+        self.assertIn('<ul class="item_list"><li>One<li>Two</ul>', html)
+        self.assertNotIn('content_panel', html)
+
+    def test_extract_nested_targets(self):
+        """
+        Targets nested in another target, or given with a descendant selector, should be matched
+        """
+        html = extract_fragments(page, '#content_panel, .item_list', include_hungry=False)
+        self.assertTrue(html.startswith('<title>Notes</title>\n<div id="content_panel"'))
+        self.assertEqual(html.count('item_list'), 1)
+
+        html = extract_fragments(page, 'main .item_list', include_hungry=False)
+        self.assertIn('<ul class="item_list">', html)
+        self.assertIsNone(extract_fragments(page, 'nav .item_list'))
+
+    def test_extract_keeps_title(self):
+        html = extract_fragments(page, '#breadcrumb_bar', include_hungry=False)
+        self.assertTrue(html.startswith('<title>Notes</title>'))
+        html = extract_fragments(page, '#breadcrumb_bar', include_hungry=False, include_title=False)
+        self.assertNotIn('<title>', html)
+
+    def test_extract_main(self):
+        html = extract_fragments(page, ':main', include_hungry=False, include_title=False)
+        self.assertTrue(html.startswith('<main>'))
+        self.assertIn('</main>', html)
+
+    def test_fallback_to_full_body(self):
+        self.assertIsNone(extract_fragments(page, 'body'))
+        self.assertIsNone(extract_fragments(page, '#missing'))
+        self.assertIsNone(extract_fragments(page, '#content_panel, #missing'))
+        self.assertIsNone(extract_fragments(page, '#content_panel > p'))
+        self.assertIsNotNone(extract_fragments(page, '#content_panel, #missing:maybe'))
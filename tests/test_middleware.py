@@ -1,7 +1,10 @@
-from django.http import HttpResponse
-from django.test import RequestFactory, SimpleTestCase
+import asyncio
+
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import AsyncRequestFactory, RequestFactory, SimpleTestCase, override_settings
 
 from unpoly.middleware import UnpolyMiddleware
+from unpoly.shedding import load_shedder
 
 
 def get_response(req):
@@ -10,6 +13,11 @@ def get_response(req):
     return response
 
 
+async def get_async_response(req):
+    """Coroutine to pass in to async Middleware init method"""
+    return HttpResponse({})
+
+
 class UnpolyMiddlewareTestCase(SimpleTestCase):
 
     def setUp(self):
@@ -43,3 +51,111 @@ class UnpolyMiddlewareTestCase(SimpleTestCase):
         headers = response.headers
 
         self.assertEqual(headers.get('X-Up-Method'), 'GET')
+
+    def test_up_method_cookie(self):
+        """
+        GET responses should only delete the _up_method cookie when the browser sent it
+        """
+        middleware = UnpolyMiddleware(get_response)
+
+        response = middleware(self.factory.get('/'))
+        self.assertNotIn('_up_method', response.cookies)
+
+        request = self.factory.get('/')
+        request.COOKIES['_up_method'] = 'POST'
+        response = middleware(request)
+        self.assertEqual(response.cookies['_up_method'].value, '')
+
+        response = middleware(self.factory.post('/'))
+        self.assertEqual(response.cookies['_up_method'].value, 'POST')
+
+    def test_view_method_header(self):
+        """
+        Responses for a URL rendered in-process keep the X-Up-Method the view set
+        """
+        def get_inline_response(req):
+            return HttpResponse(headers={'X-Up-Method': 'GET'})
+
+        response = UnpolyMiddleware(get_inline_response)(self.factory.post('/'))
+        self.assertEqual(response['X-Up-Method'], 'GET')
+        self.assertNotIn('_up_method', response.cookies)
+
+    def test_vary_headers(self):
+        """
+        Vary should list the Unpoly headers the response depended on
+        """
+        middleware = UnpolyMiddleware(get_response)
+        response = middleware(self.factory.get('/'))
+        self.assertFalse(response.has_header('Vary'))
+
+        def get_target_response(request):
+            request.unpoly_target()
+            return HttpResponse()
+
+        middleware = UnpolyMiddleware(get_target_response)
+        response = middleware(self.factory.get('/'))
+        self.assertEqual(response['Vary'], 'X-Up-Target')
+
+
+class UnpolyAsyncMiddlewareTestCase(SimpleTestCase):
+
+    def test_async_middleware(self):
+        """
+        Middleware should stay on the event loop when the middleware chain is async
+        """
+        middleware = UnpolyMiddleware(get_async_response)
+        self.assertTrue(asyncio.iscoroutinefunction(middleware))
+
+        request = AsyncRequestFactory().post('/', headers={'X-Up-Target': '.breadcrumb'})
+        response = asyncio.run(middleware(request))
+
+        self.assertTrue(request.is_unpoly())
+        self.assertEqual(request.unpoly_target(), '.breadcrumb')
+        self.assertEqual(response['X-Up-Method'], 'POST')
+        self.assertEqual(response.cookies['_up_method'].value, 'POST')
+
+
+@override_settings(UNPOLY_LOAD_SHEDDING={'preload': 2, 'poll': 3}, UNPOLY_SHED_RETRY_AFTER=10)
+class UnpolyLoadSheddingTestCase(SimpleTestCase):
+
+    def setUp(self):
+        self.factory = RequestFactory()
+        self.middleware = UnpolyMiddleware(get_response)
+        self.addCleanup(setattr, load_shedder, 'in_flight', 0)
+
+    def test_sheds_by_priority(self):
+        load_shedder.in_flight = 2
+        response = self.middleware(self.factory.get('/', HTTP_X_UP_PURPOSE='preload'))
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response['Retry-After'], '10')
+
+        self.assertEqual(self.middleware(self.factory.get('/', HTTP_X_UP_PURPOSE='poll')).status_code, 200)
+        self.assertEqual(self.middleware(self.factory.get('/')).status_code, 200)
+        self.assertEqual(load_shedder.in_flight, 2)
+
+    def test_poll_not_modified(self):
+        load_shedder.in_flight = 3
+        response = self.middleware(self.factory.get('/', HTTP_X_UP_PURPOSE='poll', HTTP_IF_NONE_MATCH='"v1"'))
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['Retry-After'], '10')
+
+    def test_async_sheds(self):
+        load_shedder.in_flight = 2
+        middleware = UnpolyMiddleware(get_async_response)
+        request = AsyncRequestFactory().get('/', headers={'X-Up-Purpose': 'preload'})
+        self.assertEqual(asyncio.run(middleware(request)).status_code, 503)
+
+    def test_streaming_response_in_flight_until_closed(self):
+        """
+        Streaming responses should count as in flight until they're sent
+        """
+        def get_streaming_response(req):
+            return StreamingHttpResponse(iter(['<p>row</p>']))
+
+        response = UnpolyMiddleware(get_streaming_response)(self.factory.get('/'))
+        self.assertEqual(load_shedder.in_flight, 1)
+        list(response.streaming_content)
+        response.close()
+        self.assertEqual(load_shedder.in_flight, 0)
+        response.close()
+        self.assertEqual(load_shedder.in_flight, 0)
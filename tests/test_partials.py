@@ -0,0 +1,87 @@
+from django.template import TemplateSyntaxError, engines
+from django.test import RequestFactory, SimpleTestCase
+from django.views.generic import TemplateView
+
+from unpoly.partials import PartialTemplate
+from unpoly.views import UnpolyViewMixin
+
+
+class Sidebar:
+    """Records whether the template evaluated the sidebar."""
+
+    def __init__(self):
+        self.evaluated = False
+
+    @property
+    def count(self):
+        self.evaluated = True
+        return 5
+
+
+class PartialTemplateTest(SimpleTestCase):
+
+    def render(self, target, blocks=None, title_block=None):
+        self.sidebar = Sidebar()
+        template = PartialTemplate('unpoly_list.html', target=target, blocks=blocks, title_block=title_block)
+        return template.render({'notes': ['one', 'two'], 'sidebar': self.sidebar})
+
+    def test_render_upfragment(self):
+        html = self.render('#note_list')
+        self.assertEqual(html, '<ul id="note_list"><li>one</li><li>two</li></ul>')
+        self.assertFalse(self.sidebar.evaluated)
+
+    def test_render_blocks(self):
+        blocks = {'#breadcrumb_bar': 'breadcrumbs', '#content_panel': 'content'}
+        html = self.render('#breadcrumb_bar, #content_panel:after', blocks=blocks)
+        self.assertTrue(html.startswith('Home &raquo; Notes<div id="content_panel">'))
+        self.assertIn('<li>two</li>', html)
+        self.assertFalse(self.sidebar.evaluated)
+
+    def test_fallback_to_full_render(self):
+        html = self.render('#sidebar')
+        self.assertIn('<aside id="sidebar">5</aside>', html)
+        self.assertTrue(self.sidebar.evaluated)
+
+        html = self.render('#note_list, #missing')
+        self.assertIn('<aside id="sidebar">5</aside>', html)
+
+        html = self.render('#note_list, #missing:maybe')
+        self.assertNotIn('sidebar', html)
+
+        html = self.render('#note_list, #missing:maybe:after')
+        self.assertNotIn('sidebar', html)
+
+    def test_render_title(self):
+        html = self.render('#note_list', title_block='title')
+        self.assertEqual(html, '<title>Notes</title>\n<ul id="note_list"><li>one</li><li>two</li></ul>')
+
+    def test_upfragment_requires_quoted_selector(self):
+        engine = engines['django']
+        with self.assertRaises(TemplateSyntaxError):
+            engine.from_string('{% load unpoly_tags %}{% upfragment %}{% endupfragment %}')
+        with self.assertRaises(TemplateSyntaxError):
+            engine.from_string('{% load unpoly_tags %}{% upfragment #a %}{% endupfragment %}')
+
+
+class PartialViewTest(SimpleTestCase):
+
+    class UnpolyView(UnpolyViewMixin, TemplateView):
+        template_name = 'unpoly_list.html'
+        render_unpoly_fragments = True
+        unpoly_fragment_blocks = {'#content_panel': 'content'}
+
+        def get_context_data(self, **kwargs):
+            return super().get_context_data(notes=['one'], sidebar=Sidebar(), **kwargs)
+
+    def get(self, **headers):
+        request = RequestFactory().get('/up', **headers)
+        return self.UnpolyView.as_view()(request).render().content.decode()
+
+    def test_partial_response(self):
+        html = self.get(HTTP_X_UP_VERSION='2.5.1', HTTP_X_UP_TARGET='#content_panel')
+        self.assertTrue(html.startswith('<title>Notes</title>\n<div id="content_panel">'))
+        self.assertNotIn('breadcrumb_bar', html)
+
+    def test_full_response(self):
+        html = self.get()
+        self.assertIn('breadcrumb_bar', html)
@@ -0,0 +1,219 @@
+import asyncio
+import threading
+
+from django.contrib.auth.mixins import LoginRequiredMixin
+from django.core.exceptions import ImproperlyConfigured
+from django.test import AsyncRequestFactory, RequestFactory, SimpleTestCase
+from django.utils import translation
+from django.views.generic import TemplateView
+
+from unpoly.renderers import arender_parallel, get_executor, render_parallel, stream_fragments
+
+from unpoly.views import AsyncUnpolyViewMixin, UnpolyViewMixin, up_renderer
+
+
+class DashboardView(UnpolyViewMixin, TemplateView):
+    template_name = 'unpoly_page.html'
+
+    def setup(self, request, *args, **kwargs):
+        super().setup(request, *args, **kwargs)
+        # Only passed when both renderers run at the same time
+        self.barrier = threading.Barrier(2, timeout=5)
+
+    @up_renderer('#content_panel')
+    def content_panel(self) -> str:
+        self.barrier.wait()
+        return '<div id="content_panel">Content</div>'
+
+    @up_renderer('#breadcrumb_bar')
+    def breadcrumb_bar(self) -> str:
+        self.barrier.wait()
+        return '<nav id="breadcrumb_bar">Home</nav>'
+
+
+class AsyncDashboardView(AsyncUnpolyViewMixin, TemplateView):
+    template_name = 'unpoly_page.html'
+
+    async def get(self, request, *args, **kwargs):
+        return self.render_to_response(await self.aget_context_data())
+
+    def setup(self, request, *args, **kwargs):
+        super().setup(request, *args, **kwargs)
+        self.started = asyncio.Event()
+
+    @up_renderer('#content_panel')
+    async def content_panel(self) -> str:
+        await asyncio.wait_for(self.started.wait(), timeout=5)
+        return '<div id="content_panel">Content</div>'
+
+    @up_renderer('.item_list')
+    async def item_list(self) -> str:
+        self.started.set()
+        return '<ul class="item_list"></ul>'
+
+
+class UpRendererTest(SimpleTestCase):
+
+    def get(self, target: str):
+        request = RequestFactory().get('/', HTTP_X_UP_VERSION='2.5.1', HTTP_X_UP_TARGET=target)
+        response = DashboardView.as_view()(request)
+        if hasattr(response, 'render'):
+            response.render()
+        return response
+
+    def test_renderers_run_concurrently(self):
+        response = self.get('#breadcrumb_bar, #content_panel')
+        self.assertEqual(
+            response.content.decode(),
+            '<nav id="breadcrumb_bar">Home</nav>\n<div id="content_panel">Content</div>',
+        )
+
+    def test_optional_target_without_renderer(self):
+        response = self.get('#content_panel, #breadcrumb_bar, .item_list:maybe')
+        self.assertNotIn(b'item_list', response.content)
+
+    def test_target_without_renderer(self):
+        response = self.get('#content_panel, .item_list')
+        self.assertIn(b'<!DOCTYPE html>', response.content)
+
+    async def test_async_renderers_run_concurrently(self):
+        request = AsyncRequestFactory().get('/', headers={
+            'X-Up-Version': '2.5.1',
+            'X-Up-Target': '#content_panel,.item_list',
+        })
+        response = await AsyncDashboardView.as_view()(request)
+        self.assertEqual(response.content.decode(), '<div id="content_panel">Content</div>\n<ul class="item_list"></ul>')
+
+    async def test_async_sync_renderers_use_thread_pool(self):
+        """
+        Sync renderers awaited under ASGI should be bounded by UNPOLY_RENDER_THREADS
+        """
+        def thread_name():
+            return threading.current_thread().name
+
+        names = await arender_parallel([thread_name, thread_name])
+        for name in names:
+            self.assertTrue(name.startswith('unpoly-render'), name)
+
+    def test_renderers_keep_active_language(self):
+        with translation.override('de'):
+            languages = render_parallel([translation.get_language, translation.get_language])
+        self.assertEqual(languages, ['de', 'de'])
+
+    def test_access_mixins_before_unpoly_mixins(self):
+        """
+        Access mixins listed after the Unpoly mixins would be skipped by renderers
+        """
+        with self.assertRaises(ImproperlyConfigured):
+            class PrivateDashboardView(DashboardView, LoginRequiredMixin):
+                pass
+
+        class LoginDashboardView(LoginRequiredMixin, DashboardView):
+            pass
+
+
+class ReportView(UnpolyViewMixin, TemplateView):
+    template_name = 'unpoly_page.html'
+    stream_unpoly_fragments = True
+
+    @up_renderer('#summary')
+    def summary(self) -> str:
+        return '<p id="summary">3 rows</p>'
+
+    @up_renderer('#report_rows')
+    def report_rows(self):
+        yield '<tbody id="report_rows">'
+        for row in range(3):
+            yield f'<tr><td>{row}</td></tr>'
+        yield '</tbody>'
+
+
+class AsyncReportView(AsyncUnpolyViewMixin, TemplateView):
+    template_name = 'unpoly_page.html'
+    stream_unpoly_fragments = True
+
+    async def get(self, request, *args, **kwargs):
+        return self.render_to_response(await self.aget_context_data())
+
+    @up_renderer('#summary')
+    async def summary(self) -> str:
+        return '<p id="summary">2 rows</p>'
+
+    @up_renderer('#report_rows')
+    async def report_rows(self):
+        yield '<tbody id="report_rows">'
+        for row in range(2):
+            yield f'<tr><td>{row}</td></tr>'
+        yield '</tbody>'
+
+    @up_renderer('#footer')
+    def footer(self):
+        yield '<p id="footer">'
+        yield 'End</p>'
+
+
+class StreamingRendererTest(SimpleTestCase):
+
+    def test_stream_fragments(self):
+        request = RequestFactory().get('/', HTTP_X_UP_VERSION='2.5.1', HTTP_X_UP_TARGET='#summary,#report_rows')
+        response = ReportView.as_view()(request)
+        self.assertTrue(response.streaming)
+        self.assertEqual([chunk.decode() for chunk in response.streaming_content], [
+            '<p id="summary">3 rows</p>',
+            '\n',
+            '<tbody id="report_rows">',
+            '<tr><td>0</td></tr>',
+            '<tr><td>1</td></tr>',
+            '<tr><td>2</td></tr>',
+            '</tbody>',
+        ])
+
+    async def test_async_stream_fragments(self):
+        request = AsyncRequestFactory().get('/', headers={
+            'X-Up-Version': '2.5.1',
+            'X-Up-Target': '#report_rows,#summary,#footer',
+        })
+        response = await AsyncReportView.as_view()(request)
+        content = b''.join([chunk async for chunk in response.streaming_content]).decode()
+        self.assertEqual(content, (
+            '<tbody id="report_rows"><tr><td>0</td></tr><tr><td>1</td></tr></tbody>\n'
+            '<p id="summary">2 rows</p>\n'
+            '<p id="footer">End</p>'
+        ))
+
+    def test_buffered_generator_renderers(self):
+        """
+        Generator renderers should be joined when the response isn't streamed
+        """
+        class BufferedReportView(ReportView):
+            stream_unpoly_fragments = False
+
+        request = RequestFactory().get('/', HTTP_X_UP_VERSION='2.5.1', HTTP_X_UP_TARGET='#report_rows,#summary')
+        response = BufferedReportView.as_view()(request)
+        self.assertEqual(response.content.decode(), (
+            '<tbody id="report_rows"><tr><td>0</td></tr><tr><td>1</td></tr><tr><td>2</td></tr></tbody>\n'
+            '<p id="summary">3 rows</p>'
+        ))
+
+    def test_closed_stream_cancels_pending_renderers(self):
+        started = threading.Event()
+        release = threading.Event()
+        rendered = []
+
+        def slow():
+            started.set()
+            release.wait(5)
+            return 'slow'
+
+        def pending():
+            rendered.append('pending')
+            return 'pending'
+
+        # Keep the thread pool busy, so the last renderer is still queued
+        stream = stream_fragments([lambda: 'first', slow, *[slow] * 3, pending])
+        self.assertEqual(next(stream), 'first')
+        started.wait(5)
+        stream.close()
+        release.set()
+        get_executor().submit(lambda: None).result(5)
+        self.assertEqual(rendered, [])
@@ -0,0 +1,114 @@
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, override_settings
+from django.urls import path
+
+from unpoly.middleware import UnpolyMiddleware
+from unpoly.request import UnpolyRequestInfo, get_request_for_url, unpoly_defaults
+from unpoly.unpoly import Unpoly
+
+
+class CountingMeta(dict):
+    """META that records each key that was read."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.reads = []
+
+    def get(self, key, default=None):
+        self.reads.append(key)
+        return super().get(key, default)
+
+
+class UnpolyRequestInfoTest(SimpleTestCase):
+
+    def test_headers_parsed_once(self):
+        meta = CountingMeta(HTTP_X_UP_TARGET='#content_panel', HTTP_X_UP_MODE='modal')
+        info = UnpolyRequestInfo(meta)
+        self.assertEqual(meta.reads, [])
+
+        for _ in range(3):
+            self.assertEqual(info.target(), '#content_panel')
+            self.assertEqual(info.mode(), 'modal')
+        self.assertEqual(meta.reads, ['HTTP_X_UP_TARGET', 'HTTP_X_UP_MODE'])
+        self.assertEqual(info.vary, {'X-Up-Target', 'X-Up-Mode'})
+
+    def test_defaults(self):
+        info = UnpolyRequestInfo({})
+        self.assertEqual(info.target(), 'body')
+        self.assertEqual(info.requested_target(), '')
+        self.assertEqual(info.layer(), 'root')
+        self.assertFalse(info.is_unpoly())
+
+        with override_settings(MAIN_UP_TARGET='#main'):
+            self.assertEqual(unpoly_defaults().target, '#main')
+        self.assertEqual(unpoly_defaults().target, 'body')
+
+    def test_immutable(self):
+        info = UnpolyRequestInfo({})
+        with self.assertRaises(AttributeError):
+            info.meta = {}
+        with self.assertRaises(AttributeError):
+            info.extra = True
+
+    def test_shared_by_middleware_and_helper(self):
+        request = RequestFactory().get('/up', HTTP_X_UP_TARGET='.item_list')
+        UnpolyMiddleware(lambda req: None).annotate_request(request)
+
+        up = Unpoly.from_request(request)
+        self.assertIs(up.info, request.unpoly)
+        self.assertTrue(request.is_unpoly())
+        self.assertEqual(request.unpoly_target(), '.item_list')
+        self.assertEqual(up.targets(), ['.item_list'])
+
+    @override_settings(ROOT_URLCONF=__name__)
+    def test_request_for_url_has_own_info(self):
+        """
+        The GET for a success URL shouldn't share the POST's parsed headers or events
+        """
+        request = RequestFactory().post('/up', {'name': 'Coast'}, HTTP_X_UP_TARGET='.item_list',
+                                        HTTP_X_UP_VALIDATE='name')
+        UnpolyMiddleware(lambda req: None).annotate_request(request)
+        self.assertTrue(request.unpoly_validate())
+        request.unpoly.events.add('record:crud')
+
+        get_request, match = get_request_for_url(request, '/up?page=2')
+        self.assertIsNot(get_request.unpoly, request.unpoly)
+        self.assertEqual(len(get_request.unpoly.events), 0)
+        self.assertEqual(get_request.unpoly.query_params['page'], '2')
+        self.assertEqual(get_request.unpoly_target(), '.item_list')
+        self.assertFalse(get_request.unpoly_validate())
+        self.assertIs(get_request.unpoly.vary, request.unpoly.vary)
+        self.assertEqual(len(request.unpoly.events), 1)
+
+
+urlpatterns = [
+    path('up', lambda request: HttpResponse()),
+]
+
+
+class UnpolyRequestPurposeTest(SimpleTestCase):
+
+    def test_purpose(self):
+        """
+        Requests should be classified without adding Vary headers
+        """
+        cases = [
+            ({}, 'navigation'),
+            ({'HTTP_X_UP_TARGET': '#list'}, 'navigation'),
+            ({'HTTP_X_UP_PURPOSE': 'preload'}, 'preload'),
+            ({'HTTP_X_UP_PURPOSE': 'Poll'}, 'poll'),
+            ({'HTTP_X_UP_PURPOSE': 'background'}, 'background'),
+            ({'HTTP_X_UP_PURPOSE': 'other'}, 'navigation'),
+            ({'HTTP_SEC_PURPOSE': 'prefetch;prerender'}, 'preload'),
+            ({'HTTP_X_UP_VALIDATE': 'name', 'HTTP_X_UP_PURPOSE': 'poll'}, 'validation'),
+        ]
+        for meta, purpose in cases:
+            with self.subTest(meta=meta):
+                info = UnpolyRequestInfo(meta)
+                self.assertEqual(info.purpose(), purpose)
+                self.assertEqual(info.vary, set())
+
+        up = Unpoly({'HTTP_X_UP_PURPOSE': 'poll'})
+        self.assertTrue(up.is_poll())
+        self.assertTrue(up.is_background())
+        self.assertFalse(up.is_preload())
@@ -0,0 +1,149 @@
+import asyncio
+import threading
+import time
+
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.middleware.csrf import get_token
+from django.test import RequestFactory, SimpleTestCase
+from django.views.generic import TemplateView
+
+from unpoly.singleflight import SingleFlight, single_flight
+from unpoly.views import AsyncUnpolyViewMixin, UnpolyViewMixin
+
+
+class DashboardView(UnpolyViewMixin, TemplateView):
+    template_name = 'unpoly_page.html'
+    single_flight_timeout = 5
+    fragment_cache_vary = ()
+    renders = 0
+    started = None
+    release = None
+
+    def get_context_data(self, **kwargs):
+        DashboardView.renders += 1
+        self.started.set()
+        self.release.wait(5)
+        return super().get_context_data(**kwargs)
+
+
+class AsyncDashboardView(AsyncUnpolyViewMixin, TemplateView):
+    template_name = 'unpoly_page.html'
+    single_flight_timeout = 5
+    fragment_cache_vary = ()
+    renders = 0
+
+    async def aget_context_data(self, **kwargs):
+        AsyncDashboardView.renders += 1
+        await asyncio.sleep(0.2)
+        return await super().aget_context_data(**kwargs)
+
+
+class SingleFlightViewTest(SimpleTestCase):
+
+    def setUp(self):
+        DashboardView.renders = 0
+        DashboardView.started = threading.Event()
+        DashboardView.release = threading.Event()
+
+    def get(self, responses):
+        request = RequestFactory().get('/dashboard', HTTP_X_UP_VERSION='2.5.1', HTTP_X_UP_TARGET='#tasks')
+        response = DashboardView.as_view()(request)
+        if hasattr(response, 'render'):
+            response.render()
+        responses.append(response)
+
+    def test_concurrent_requests_share_render(self):
+        responses = []
+        leader = threading.Thread(target=self.get, args=(responses,))
+        leader.start()
+        DashboardView.started.wait(5)
+
+        followers = [threading.Thread(target=self.get, args=(responses,)) for _ in range(4)]
+        for thread in followers:
+            thread.start()
+        # Let the followers join the flight before the render finishes
+        time.sleep(0.3)
+        DashboardView.release.set()
+        for thread in [leader, *followers]:
+            thread.join(5)
+
+        self.assertEqual(DashboardView.renders, 1)
+        self.assertEqual(len(responses), 5)
+        self.assertEqual({response.content for response in responses}, {responses[0].content})
+        self.assertEqual(single_flight._flights, {})
+
+    def test_csrf_token_not_shared(self):
+        """
+        Responses rendering the leader's CSRF token should not be sent to other requests
+        """
+        request = RequestFactory().get('/dashboard')
+        view = DashboardView()
+        view.setup(request)
+        self.assertTrue(view.is_shareable_response(HttpResponse()))
+
+        get_token(request)
+        self.assertFalse(view.is_shareable_response(HttpResponse()))
+
+    def test_sequential_requests_render(self):
+        DashboardView.release.set()
+        responses = []
+        self.get(responses)
+        self.get(responses)
+        self.assertEqual(DashboardView.renders, 2)
+
+    def test_async_requests_share_render(self):
+        AsyncDashboardView.renders = 0
+
+        async def get():
+            request = RequestFactory().get('/dashboard', HTTP_X_UP_VERSION='2.5.1')
+            return await AsyncDashboardView.as_view()(request)
+
+        async def main():
+            return await asyncio.gather(*(get() for _ in range(3)))
+
+        responses = asyncio.run(main())
+        self.assertEqual(AsyncDashboardView.renders, 1)
+        self.assertEqual({response.status_code for response in responses}, {200})
+
+
+class SharedSingleFlightTest(SimpleTestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.flights = SingleFlight()
+
+    def test_response_from_other_worker(self):
+        """
+        Requests should wait for the render holding the cache lock, and share its response
+        """
+        cache.set(self.flights.lock_key('dashboard'), 'other')
+        cache.set(self.flights.result_key('dashboard', 'other'), (b'<p>shared</p>', 200, {}))
+
+        response = self.flights.run('dashboard', lambda: HttpResponse('<p>own</p>'), 1, shared=True)
+        self.assertEqual(response.content, b'<p>shared</p>')
+
+    def test_timeout_renders_independently(self):
+        cache.set(self.flights.lock_key('dashboard'), 'other')
+        response = self.flights.run('dashboard', lambda: HttpResponse('<p>own</p>'), 0.1, shared=True)
+        self.assertEqual(response.content, b'<p>own</p>')
+
+    def test_leader_shares_through_cache(self):
+        renders = []
+
+        def render():
+            renders.append(cache.get(self.flights.lock_key('dashboard')))
+            return HttpResponse('<p>own</p>')
+
+        self.flights.run('dashboard', render, 1, shared=True)
+        token = renders[0]
+        self.assertIsNotNone(token)
+        self.assertIsNone(cache.get(self.flights.lock_key('dashboard')))
+        self.assertEqual(cache.get(self.flights.result_key('dashboard', token))[0], b'<p>own</p>')
+
+    def test_unshareable_response(self):
+        response = self.flights.run(
+            'dashboard', lambda: HttpResponse('', status=500), 1, shared=True,
+        )
+        self.assertEqual(response.status_code, 500)
+        self.assertIsNone(cache.get(self.flights.lock_key('dashboard')))
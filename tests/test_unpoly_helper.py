@@ -1,7 +1,8 @@
 import json
+from unittest import mock
 
 from django.http import HttpResponse
-from django.test import SimpleTestCase
+from django.test import SimpleTestCase, override_settings
 
 from unpoly.unpoly import Unpoly
 from .settings import MAIN_UP_TARGET, MAIN_UP_FAIL_TARGET
@@ -81,3 +82,52 @@ class UnpolyHelperTest(SimpleTestCase):
         event_data = json.loads(response['X-Up-Events'])[0]
         self.assertIn('type', event_data)
         self.assertEqual(event_data['type'], 'boxcar:unhitched')
+
+    def test_unpoly_response_emit_buffered(self):
+        up = Unpoly(meta=request_meta)
+        response = HttpResponse(200)
+        response['X-Up-Events'] = json.dumps([{'type': 'page:loaded', 'ready': True}])
+
+        for idx in range(3):
+            up.emit(None, 'record:crud', {'id': idx, 'deleted': None})
+        self.assertEqual(len(json.loads(response['X-Up-Events'])), 1)
+        up.write_events(response)
+
+        events = json.loads(response['X-Up-Events'])
+        self.assertEqual([event['type'] for event in events], ['page:loaded', *['record:crud'] * 3])
+        self.assertIsNone(events[-1]['deleted'])
+
+    def test_unpoly_response_emit_many(self):
+        """
+        Emitting to a response again should append to its events without parsing the header
+        """
+        up = Unpoly(meta=request_meta)
+        response = HttpResponse(200)
+        response['X-Up-Events'] = json.dumps([{'type': 'page:loaded'}])
+        up.emit(response, 'record:crud', {'id': 0})
+        with mock.patch('unpoly.events.json.loads') as loads:
+            for idx in range(1, 3):
+                up.emit(response, 'record:crud', {'id': idx})
+        loads.assert_not_called()
+
+        events = json.loads(response['X-Up-Events'])
+        self.assertEqual([event.get('id') for event in events], [None, 0, 1, 2])
+
+    @override_settings(UNPOLY_JSON_ENCODER='tests.test_unpoly_helper.encode_events')
+    def test_unpoly_json_encoder(self):
+        up = Unpoly(meta=request_meta)
+        response = up.write_events(up.emit(HttpResponse(200), 'boxcar:unhitched'))
+        self.assertEqual(response['X-Up-Events'], '[{"type":"boxcar:unhitched"}]')
+
+    @override_settings(UNPOLY_JSON_ENCODER='tests.test_unpoly_helper.encode_events')
+    def test_unpoly_json_encoder_ascii(self):
+        """
+        Encoder output with non-ASCII characters should be escaped for the header
+        """
+        up = Unpoly(meta=request_meta)
+        response = up.emit(HttpResponse(200), 'boxcar:renamed', {'name': 'Güterwagen'})
+        self.assertEqual(response['X-Up-Events'], '[{"name": "G\\u00fcterwagen", "type": "boxcar:renamed"}]')
+
+
+def encode_events(event: dict) -> bytes:
+    return json.dumps(event, separators=(',', ':'), ensure_ascii=False).encode()
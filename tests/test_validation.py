@@ -0,0 +1,181 @@
+from types import SimpleNamespace
+
+from django import forms
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.db import models
+from django.test import RequestFactory, SimpleTestCase
+from vanilla import CreateView as VanillaCreateView
+
+from unpoly.cache import CSRF_TOKEN_PLACEHOLDER
+from unpoly.forms import UnpolyCrispyFormMixin
+from unpoly.validation import clean_fields, field_dependencies, validated_field_names
+from unpoly.views import UnpolyCrispyFormViewMixin
+
+
+class TripForm(UnpolyCrispyFormMixin, forms.Form):
+    validation_dependencies = {'end': ('start',)}
+
+    name = forms.CharField(max_length=5)
+    start = forms.IntegerField()
+    end = forms.IntegerField()
+
+    def clean_end(self):
+        end = self.cleaned_data['end']
+        if end < self.cleaned_data.get('start', end):
+            raise forms.ValidationError('Trip ends before it starts.')
+        return end
+
+    def clean(self):
+        raise AssertionError('form.clean() should not run when validating single fields')
+
+
+def validate_even(value):
+    if value % 2:
+        raise ValidationError('Seats come in pairs.')
+
+
+class Railcar(models.Model):
+    name = models.CharField(max_length=20)
+    seats = models.IntegerField(validators=[validate_even])
+
+    class Meta:
+        app_label = 'app_label'
+
+
+class RailcarForm(forms.ModelForm):
+
+    class Meta:
+        model = Railcar
+        fields = ['name', 'seats']
+
+
+class TripCreate(UnpolyCrispyFormViewMixin, VanillaCreateView):
+    form_class = TripForm
+    template_name = 'unpoly_modal_form.html'
+    unpoly_validate_template = 'unpoly_validate_fields.html'
+    unpoly_full_validation_fields = ('name',)
+
+
+class CleanFieldsTest(SimpleTestCase):
+
+    def test_validated_field_names(self):
+        form = TripForm(prefix='trip')
+        self.assertEqual(validated_field_names(form, 'trip-end'), ['end'])
+        self.assertEqual(validated_field_names(form, 'end'), [])
+        self.assertEqual(validated_field_names(form, 'trip-start trip-end'), ['start', 'end'])
+        self.assertEqual(validated_field_names(form, 'trip-start, trip-end'), ['start', 'end'])
+        self.assertEqual(field_dependencies(form, ['end']), ['start', 'end'])
+
+    def test_clean_named_fields_only(self):
+        form = TripForm(data={'name': 'Much too long', 'start': '5', 'end': '3'})
+        self.assertFalse(clean_fields(form, ['end']))
+        self.assertEqual(list(form.errors), ['end'])
+        self.assertEqual(form.cleaned_data, {'start': 5})
+
+        form = TripForm(data={'start': '3', 'end': '5'})
+        self.assertTrue(clean_fields(form, ['end']))
+        self.assertEqual(form.cleaned_data, {'start': 3, 'end': 5})
+
+
+    def test_clean_model_fields(self):
+        """
+        Validators of the model field should run for ModelForm fields
+        """
+        form = RailcarForm(data={'name': 'Pullman', 'seats': '3'})
+        self.assertFalse(clean_fields(form, ['seats']))
+        self.assertEqual(form.errors['seats'], ['Seats come in pairs.'])
+
+        form = RailcarForm(data={'name': 'Pullman', 'seats': '4'})
+        self.assertTrue(clean_fields(form, ['seats']))
+        self.assertEqual(form.instance.seats, 4)
+
+
+class FieldValidationViewTest(SimpleTestCase):
+
+    def post(self, field: str, data: dict):
+        request = RequestFactory().post(
+            '/trips/new/', data, HTTP_X_UP_VERSION='2.5.1', HTTP_X_UP_VALIDATE=field,
+        )
+        response = TripCreate.as_view()(request)
+        response.render()
+        return response
+
+    def test_renders_validated_field(self):
+        response = self.post('end', {'start': '5', 'end': '3'})
+        self.assertEqual(response.template_name, 'unpoly_validate_fields.html')
+        self.assertContains(response, 'id="div_id_end"')
+        self.assertContains(response, 'Trip ends before it starts.')
+        self.assertNotContains(response, 'id="div_id_start"')
+
+    def test_full_validation_fields(self):
+        request = RequestFactory().post('/trips/new/', HTTP_X_UP_VERSION='2.5.1', HTTP_X_UP_VALIDATE='name')
+        view = TripCreate()
+        view.setup(request)
+        self.assertEqual(view.get_validation_field_names(TripForm()), [])
+
+
+class CachedTripCreate(TripCreate):
+    validation_cache_timeout = 30
+    validations = 0
+
+    def perform_unpoly_validation(self, request):
+        CachedTripCreate.validations += 1
+        return super().perform_unpoly_validation(request)
+
+
+class FullTripForm(TripForm):
+
+    def clean(self):
+        return self.cleaned_data
+
+
+class CachedFormTripCreate(CachedTripCreate):
+    form_class = FullTripForm
+    template_name = 'unpoly_csrf_form.html'
+    unpoly_validate_template = ''
+
+
+class ValidationCacheTest(SimpleTestCase):
+
+    def setUp(self):
+        cache.clear()
+        CachedTripCreate.validations = 0
+
+    def post(self, data: dict, field: str = 'end', session_key: str = 'session', view=CachedTripCreate):
+        request = RequestFactory().post(
+            '/trips/new/', data, HTTP_X_UP_VERSION='2.5.1', HTTP_X_UP_VALIDATE=field,
+        )
+        request.session = SimpleNamespace(session_key=session_key)
+        response = view.as_view()(request)
+        if hasattr(response, 'render'):
+            response.render()
+        return response
+
+    def test_identical_submissions_are_cached(self):
+        first = self.post({'start': '5', 'end': '3', 'csrfmiddlewaretoken': 'a'})
+        second = self.post({'start': '5', 'end': '3', 'csrfmiddlewaretoken': 'b'})
+        self.assertEqual(CachedTripCreate.validations, 1)
+        self.assertEqual(first.content, second.content)
+
+        self.post({'start': '1', 'end': '3'})
+        self.post({'start': '5', 'end': '3'}, field='start')
+        self.assertEqual(CachedTripCreate.validations, 3)
+
+    def test_requests_without_session_are_not_cached(self):
+        self.post({'start': '5', 'end': '3'}, session_key=None)
+        self.post({'start': '5', 'end': '3'}, session_key=None)
+        self.assertEqual(CachedTripCreate.validations, 2)
+
+    def test_cached_html_has_request_csrf_token(self):
+        """
+        Cached responses should hold no CSRF token, and be sent with the token of each request
+        """
+        first = self.post({'start': '5', 'end': '3'}, view=CachedFormTripCreate)
+        second = self.post({'start': '5', 'end': '3'}, view=CachedFormTripCreate)
+        self.assertEqual(CachedTripCreate.validations, 1)
+
+        for response in (first, second):
+            self.assertContains(response, 'name="csrfmiddlewaretoken"')
+            self.assertNotContains(response, CSRF_TOKEN_PLACEHOLDER)
+        self.assertNotEqual(first.content, second.content)
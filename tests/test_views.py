@@ -1,14 +1,34 @@
+import json
+from datetime import datetime, timezone
+from unittest import mock
+
 from vanilla import CreateView as VanillaCreateView
 
 from django.conf import settings
-from django.db import models
+from django.contrib.messages.storage import default_storage
+from django.db import connection, models
+from django.http import HttpResponse
+from django.middleware.csrf import get_token
 from django import forms
-from django.test import RequestFactory, SimpleTestCase
-from django.views.generic import TemplateView, CreateView as DjangoCreateView
+from django.test import RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.urls import path
+from django.forms import modelformset_factory
+from django.test.utils import CaptureQueriesContext, isolate_apps
+from django.views.generic import FormView, TemplateView, CreateView as DjangoCreateView
 
+from unpoly.client_cache import client_cache
 from unpoly.forms import UnpolyCrispyFormMixin
+from unpoly.middleware import UnpolyMiddleware
+from unpoly.request import UnpolyRequestInfo
+from unpoly.signals import request_timed
 from unpoly.unpoly import Unpoly
-from unpoly.views import UnpolyFormViewMixin, UnpolyCrispyFormViewMixin, UnpolyViewMixin
+from unpoly.views import (
+    UnpolyCrispyFormViewMixin,
+    UnpolyFormSetViewMixin,
+    UnpolyFormViewMixin,
+    UnpolyViewMixin,
+    up_context,
+)
 
 
 def get_view(view, url='/up', **headers):
@@ -134,3 +154,516 @@ class UnpolyCrispyFormDjangoViewMixinTest(SimpleTestCase):
         context = view.get_context_data()
         self.assertEqual(context['up_target'], settings.MAIN_UP_TARGET_FORM_VIEW)
         self.assertEqual(context['up_fail_target'], settings.MAIN_UP_FAIL_TARGET)
+
+
+class UnpolyFragmentExtractionTest(SimpleTestCase):
+
+    class UnpolyView(UnpolyViewMixin, TemplateView):
+        template_name = 'unpoly_page.html'
+        extract_unpoly_fragments = True
+
+    def test_fragment_response(self):
+        view = get_view(self.UnpolyView, HTTP_X_UP_VERSION='2.5.1', HTTP_X_UP_TARGET='#content_panel')
+        response = view.get(view.request).render()
+        content = response.content.decode()
+
+        self.assertTrue(content.startswith('<title>Unpoly</title>\n<div id="messages" up-hungry></div>'))
+        self.assertIn('<div id="content_panel" class="panel">', content)
+        self.assertNotIn('breadcrumb_bar', content)
+
+    def test_full_response(self):
+        view = get_view(self.UnpolyView)
+        content = view.get(view.request).render().content.decode()
+        self.assertIn('breadcrumb_bar', content)
+
+        view = get_view(self.UnpolyView, HTTP_X_UP_VERSION='2.5.1', HTTP_X_UP_TARGET='#missing')
+        content = view.get(view.request).render().content.decode()
+        self.assertIn('breadcrumb_bar', content)
+
+
+class UnpolyContextProviderTest(SimpleTestCase):
+
+    class UnpolyView(UnpolyViewMixin, TemplateView):
+        template_name = 'any_template.html'
+
+        @up_context('#sidebar')
+        def sidebar_context(self):
+            return {'sidebar_count': 5}
+
+        @up_context('#content_panel', '.item_list')
+        def content_context(self):
+            return {'items': ['one']}
+
+        @up_context()
+        def page_context(self):
+            return {'title': 'Notes'}
+
+    def test_providers_for_target(self):
+        view = get_view(self.UnpolyView, HTTP_X_UP_VERSION='2.5.1', HTTP_X_UP_TARGET='.item_list:after')
+        context = view.get_context_data()
+        self.assertEqual(context['items'], ['one'])
+        self.assertEqual(context['title'], 'Notes')
+        self.assertNotIn('sidebar_count', context)
+
+    def test_nested_targets(self):
+        view = get_view(self.UnpolyView, HTTP_X_UP_VERSION='2.5.1', HTTP_X_UP_TARGET='#content_panel')
+        self.assertNotIn('sidebar_count', view.get_context_data())
+
+        view = get_view(self.UnpolyView, HTTP_X_UP_VERSION='2.5.1', HTTP_X_UP_TARGET='#content_panel')
+        view.unpoly_nested_targets = {'#content_panel': ('#sidebar',)}
+        self.assertEqual(view.get_context_data()['sidebar_count'], 5)
+
+    def test_all_providers(self):
+        targets = ('body', ':main', '#layout', '.item_list, #layout')
+        for headers in ({}, *({'HTTP_X_UP_VERSION': '2.5.1', 'HTTP_X_UP_TARGET': target} for target in targets)):
+            view = get_view(self.UnpolyView, **headers)
+            context = view.get_context_data()
+            self.assertEqual(context['sidebar_count'], 5)
+            self.assertEqual(context['items'], ['one'])
+
+    def test_overridden_provider(self):
+
+        class UnpolyView(self.UnpolyView):
+
+            def sidebar_context(self):
+                return {'sidebar_count': 10}
+
+        self.assertEqual(
+            [name for name, selectors in UnpolyView._up_context_providers],
+            ['content_context', 'page_context'],
+        )
+
+
+class UnpolyConditionalGetTest(SimpleTestCase):
+
+    class UnpolyView(UnpolyViewMixin, TemplateView):
+        template_name = 'unpoly_page.html'
+        rendered = False
+
+        def get_unpoly_etag(self):
+            return 'v1'
+
+        def get_unpoly_last_modified(self):
+            return datetime(2021, 5, 1, tzinfo=timezone.utc)
+
+        def get_context_data(self, **kwargs):
+            self.__class__.rendered = True
+            return super().get_context_data(**kwargs)
+
+    def get(self, **headers):
+        self.UnpolyView.rendered = False
+        request = RequestFactory().get('/up', HTTP_X_UP_VERSION='2.5.1', **headers)
+        return self.UnpolyView.as_view()(request)
+
+    def test_validators_set(self):
+        response = self.get(HTTP_X_UP_TARGET='#content_panel')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(self.UnpolyView.rendered)
+        self.assertEqual(response['Last-Modified'], 'Sat, 01 May 2021 00:00:00 GMT')
+
+        # ETag varies by target
+        other = self.get(HTTP_X_UP_TARGET='#breadcrumb_bar')
+        self.assertNotEqual(response['ETag'], other['ETag'])
+
+    def test_not_modified(self):
+        etag = self.get(HTTP_X_UP_TARGET='#content_panel')['ETag']
+
+        response = self.get(HTTP_X_UP_TARGET='#content_panel', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+        self.assertFalse(self.UnpolyView.rendered)
+
+        response = self.get(HTTP_X_UP_TARGET='#content_panel', HTTP_X_UP_MODE='modal', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(self.UnpolyView.rendered)
+
+    def test_not_modified_since(self):
+        response = self.get(HTTP_IF_MODIFIED_SINCE='Sat, 01 May 2021 00:00:00 GMT')
+        self.assertEqual(response.status_code, 304)
+        self.assertFalse(self.UnpolyView.rendered)
+
+        response = self.get(HTTP_IF_MODIFIED_SINCE='Fri, 30 Apr 2021 00:00:00 GMT')
+        self.assertEqual(response.status_code, 200)
+
+
+class UnpolyCacheControlTest(SimpleTestCase):
+
+    class UnpolyView(UnpolyViewMixin, TemplateView):
+        template_name = 'unpoly_page.html'
+        fragment_cache_control = {'public': True, 'max_age': 60}
+
+    def get(self, view=None, **headers):
+        view = view or self.UnpolyView.as_view()
+
+        def get_response(request):
+            response = view(request)
+            return response.render() if hasattr(response, 'render') else response
+
+        request = RequestFactory().get('/up', **headers)
+        return UnpolyMiddleware(get_response)(request), request
+
+    def test_fragment_cache_control(self):
+        response, request = self.get(HTTP_X_UP_VERSION='2.5.1', HTTP_X_UP_TARGET='#content_panel')
+        self.assertEqual(response['Cache-Control'], 'public, max-age=60')
+        self.assertIn('X-Up-Version', request.unpoly.vary)
+
+        response, request = self.get()
+        self.assertFalse(response.has_header('Cache-Control'))
+
+    def test_no_cache_control_with_cookies(self):
+        """
+        Responses that set cookies, or will get a CSRF cookie, shouldn't be publicly cacheable
+        """
+        headers = {'HTTP_X_UP_VERSION': '2.5.1', 'HTTP_X_UP_TARGET': '#content_panel'}
+
+        def set_cookie(request):
+            response = self.UnpolyView.as_view()(request)
+            response.set_cookie('seen', '1')
+            return response
+
+        response, request = self.get(set_cookie, **headers)
+        self.assertFalse(response.has_header('Cache-Control'))
+
+        def use_csrf(request):
+            get_token(request)
+            return self.UnpolyView.as_view()(request)
+
+        response, request = self.get(use_csrf, **headers)
+        self.assertFalse(response.has_header('Cache-Control'))
+
+
+class UnpolyServerTimingTest(SimpleTestCase):
+
+    class UnpolyView(UnpolyViewMixin, TemplateView):
+        template_name = 'unpoly_page.html'
+        extract_unpoly_fragments = True
+        server_timing = True
+
+    def get(self, **headers):
+        response = self.UnpolyView.as_view()(RequestFactory().get('/up', **headers))
+        response.render()
+        return response
+
+    def test_server_timing_header(self):
+        timed = []
+
+        def receiver(sender, tags, timings, **kwargs):
+            timed.append((tags, timings))
+
+        request_timed.connect(receiver)
+        self.addCleanup(request_timed.disconnect, receiver)
+
+        response = self.get(HTTP_X_UP_VERSION='2.5.1', HTTP_X_UP_TARGET='#content_panel', HTTP_X_UP_MODE='modal')
+        phases = [metric.split(';')[0] for metric in response['Server-Timing'].split(', ')]
+        self.assertEqual(phases, ['headers', 'context', 'events', 'extract', 'render', 'total'])
+
+        tags, timings = timed[0]
+        self.assertEqual(tags, {'mode': 'modal', 'target': '#content_panel', 'validating': False})
+        self.assertGreaterEqual(timings['total'], timings['render'])
+
+    def test_not_unpoly_request(self):
+        response = self.get()
+        self.assertFalse(response.has_header('Server-Timing'))
+
+
+class Trip:
+    id = 7
+
+    def __str__(self):
+        return 'Trip'
+
+
+class TripForm(forms.Form):
+    name = forms.CharField()
+
+    def save(self):
+        return Trip()
+
+
+class TripList(UnpolyViewMixin, TemplateView):
+    template_name = 'unpoly_page.html'
+
+
+class TripCreate(UnpolyFormViewMixin, VanillaCreateView):
+    form_class = TripForm
+    template_name = 'unpoly_modal_form.html'
+    success_url = '/trips/'
+    inline_success_response = True
+
+
+urlpatterns = [
+    path('trips/', TripList.as_view()),
+]
+
+
+@override_settings(ROOT_URLCONF=__name__)
+class UnpolyInlineSuccessResponseTest(SimpleTestCase):
+
+    def post(self, **headers):
+        request = RequestFactory().post('/trips/new/', {'name': 'Coast'}, **headers)
+        return TripCreate.as_view()(request)
+
+    def test_success_url_rendered_inline(self):
+        response = self.post(HTTP_X_UP_VERSION='2.5.1', HTTP_X_UP_TARGET='#content_panel')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['X-Up-Location'], '/trips/')
+        self.assertEqual(response['X-Up-Method'], 'GET')
+        self.assertEqual(response.resolve_template(response.template_name).template.name, 'unpoly_page.html')
+        self.assertIn('"type": "record:crud"', response['X-Up-Events'])
+
+    def test_redirect_without_unpoly(self):
+        response = self.post()
+        self.assertEqual(response.status_code, 302)
+
+    def test_redirect_when_url_does_not_resolve(self):
+        TripCreate.success_url = '/elsewhere/'
+        self.addCleanup(setattr, TripCreate, 'success_url', '/trips/')
+        response = self.post(HTTP_X_UP_VERSION='2.5.1')
+        self.assertEqual(response.status_code, 302)
+
+
+class Wagon(models.Model):
+    name = models.CharField(max_length=50)
+
+    class Meta:
+        app_label = 'app_label'
+
+    def __str__(self):
+        return self.name
+
+
+class WagonCreate(UnpolyFormViewMixin, VanillaCreateView):
+    model = Wagon
+    fields = ['name']
+    template_name = 'unpoly_modal_form.html'
+    success_url = '/wagons/'
+
+
+class UnpolyAcceptLayerTest(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        with connection.schema_editor() as editor:
+            editor.create_model(Wagon)
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        with connection.schema_editor() as editor:
+            editor.delete_model(Wagon)
+
+    def setUp(self):
+        client_cache.register(Wagon, expire=['/wagons/', '/wagons/{obj.pk}/'])
+        self.addCleanup(client_cache.unregister, Wagon)
+
+    def test_accept_layer_saves_once(self):
+        request = RequestFactory().post(
+            '/wagons/new/?parent_select_field_id=id_wagon', {'name': 'Flatcar'}, HTTP_X_UP_VERSION='2.5.1',
+        )
+        # SAVEPOINT, INSERT, RELEASE SAVEPOINT
+        with self.assertNumQueries(3):
+            response = WagonCreate.as_view()(request)
+
+        wagon = Wagon.objects.get()
+        self.assertEqual(response['X-Up-Expire-Cache'], f'/wagons/ /wagons/{wagon.pk}/')
+        self.assertEqual(json.loads(response['X-Up-Accept-Layer']), {
+            'id': wagon.id,
+            'name': 'Flatcar',
+            'parent_select_field_id': 'id_wagon',
+        })
+
+    def test_accept_layer_override_gets_form(self):
+        class NamedWagonCreate(WagonCreate):
+            def send_accept_layer(self, form, select_field_id):
+                response = super().send_accept_layer(form, select_field_id)
+                response['X-Wagon-Name'] = form.cleaned_data['name']
+                return response
+
+        request = RequestFactory().post(
+            '/wagons/new/?parent_select_field_id=id_wagon', {'name': 'Flatcar'}, HTTP_X_UP_VERSION='2.5.1',
+        )
+        response = NamedWagonCreate.as_view()(request)
+        self.assertEqual(response['X-Wagon-Name'], 'Flatcar')
+
+
+class WagonGrid(UnpolyFormSetViewMixin, FormView):
+    form_class = modelformset_factory(Wagon, fields=['name'], extra=1, can_delete=True)
+    template_name = 'unpoly_modal_form.html'
+    success_url = '/wagons/'
+    _send_optimized_success_response = True
+    success_message = 'Saved %(count)s wagons'
+
+    def optimized_success_response(self):
+        return HttpResponse(''.join(f'<tr id="wagon_{obj.pk}">{obj.name}</tr>' for obj in self.objects))
+
+
+class UnpolyFormSetViewTest(TransactionTestCase):
+    """Rows are committed, so the `record:crud` event is emitted before the response is finalized."""
+
+    def setUp(self):
+        with connection.schema_editor() as editor:
+            editor.create_model(Wagon)
+
+    def tearDown(self):
+        with connection.schema_editor() as editor:
+            editor.delete_model(Wagon)
+
+    def test_bulk_save(self):
+        """
+        Rows should be written with one query per kind of change, and reported in one event
+        """
+        client_cache.register(Wagon, expire=['/wagons/', '/wagons/{obj.pk}/'])
+        self.addCleanup(client_cache.unregister, Wagon)
+        boxcar, hopper = Wagon.objects.create(name='Boxcar'), Wagon.objects.create(name='Hopper')
+        data = {
+            'form-TOTAL_FORMS': '3',
+            'form-INITIAL_FORMS': '2',
+            'form-0-id': boxcar.pk,
+            'form-0-name': 'Tank car',
+            'form-1-id': hopper.pk,
+            'form-1-name': 'Hopper',
+            'form-1-DELETE': 'on',
+            'form-2-name': 'Caboose',
+        }
+        request = RequestFactory().post('/wagons/', data, HTTP_X_UP_VERSION='2.5.1')
+        request._messages = default_storage(request)
+        with CaptureQueriesContext(connection) as queries:
+            response = WagonGrid.as_view()(request)
+
+        writes = [query['sql'].split()[0] for query in queries if query['sql'].split()[0] in ('INSERT', 'UPDATE', 'DELETE')]
+        self.assertEqual(sorted(writes), ['DELETE', 'INSERT', 'UPDATE'])
+
+        caboose = Wagon.objects.get(name='Caboose')
+        self.assertEqual(list(Wagon.objects.order_by('pk').values_list('name', flat=True)), ['Tank car', 'Caboose'])
+        self.assertEqual(response.content.decode(), f'<tr id="wagon_{caboose.pk}">Caboose</tr><tr id="wagon_{boxcar.pk}">Tank car</tr>')
+        self.assertEqual(json.loads(response['X-Up-Events']), [{
+            'type': 'record:crud',
+            'ids': [caboose.pk, boxcar.pk, hopper.pk],
+            'created': [caboose.pk],
+            'updated': [boxcar.pk],
+            'deleted': [hopper.pk],
+            'action': 'bulk',
+            'model_name': 'wagon',
+        }])
+        self.assertEqual([str(message) for message in request._messages], ['Saved 3 wagons'])
+        self.assertEqual(
+            response['X-Up-Expire-Cache'],
+            f'/wagons/ /wagons/{caboose.pk}/ /wagons/{boxcar.pk}/ /wagons/{hopper.pk}/',
+        )
+
+    def test_save_without_bulk_insert_returning(self):
+        """
+        New rows should get their ids on databases that can't return them from bulk inserts
+        """
+        data = {
+            'form-TOTAL_FORMS': '2',
+            'form-INITIAL_FORMS': '0',
+            'form-0-name': 'Caboose',
+            'form-1-name': 'Flatcar',
+        }
+        request = RequestFactory().post('/wagons/', data, HTTP_X_UP_VERSION='2.5.1')
+        request._messages = default_storage(request)
+        with mock.patch.object(type(connection.features), 'can_return_rows_from_bulk_insert', False):
+            response = WagonGrid.as_view()(request)
+
+        ids = list(Wagon.objects.order_by('pk').values_list('pk', flat=True))
+        self.assertEqual(len(ids), 2)
+        self.assertEqual(json.loads(response['X-Up-Events'])[0]['created'], ids)
+
+    @isolate_apps('unpoly')
+    def test_save_many_to_many_change(self):
+        """
+        Rows where only a many-to-many field changed should be saved without a bulk update
+        """
+        # Registered apart from the other test models, so reverse relations resolve
+        class Locomotive(models.Model):
+            name = models.CharField(max_length=50)
+
+            class Meta:
+                app_label = 'unpoly'
+
+        class Consist(models.Model):
+            name = models.CharField(max_length=50)
+            locomotives = models.ManyToManyField(Locomotive)
+
+            class Meta:
+                app_label = 'unpoly'
+
+        class ConsistGrid(WagonGrid):
+            form_class = modelformset_factory(Consist, fields=['name', 'locomotives'], extra=0)
+
+        with connection.schema_editor() as editor:
+            editor.create_model(Locomotive)
+            editor.create_model(Consist)
+        self.addCleanup(self.delete_models, Consist, Locomotive)
+
+        engine = Locomotive.objects.create(name='Shunter')
+        consist = Consist.objects.create(name='Freight')
+        data = {
+            'form-TOTAL_FORMS': '1',
+            'form-INITIAL_FORMS': '1',
+            'form-0-id': consist.pk,
+            'form-0-name': 'Freight',
+            'form-0-locomotives': [engine.pk],
+        }
+        request = RequestFactory().post('/consists/', data, HTTP_X_UP_VERSION='2.5.1')
+        request._messages = default_storage(request)
+        response = ConsistGrid.as_view()(request)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(list(consist.locomotives.all()), [engine])
+        self.assertEqual(json.loads(response['X-Up-Events'])[0]['updated'], [consist.pk])
+
+    def delete_models(self, *models):
+        with connection.schema_editor() as editor:
+            for model in models:
+                editor.delete_model(model)
+
+    def test_invalid_row(self):
+        data = {
+            'form-TOTAL_FORMS': '1',
+            'form-INITIAL_FORMS': '0',
+            'form-0-name': 'x' * 60,
+        }
+        request = RequestFactory().post('/wagons/', data, HTTP_X_UP_VERSION='2.5.1')
+        response = WagonGrid.as_view()(request)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.context_data['form'].errors[0])
+        self.assertFalse(Wagon.objects.exists())
+
+
+class UnpolyMessagesAsEventsTest(SimpleTestCase):
+
+    class TripSave(TripCreate):
+        inline_success_response = False
+        _send_optimized_success_response = True
+        messages_as_events = True
+        success_message = 'Saved %(name)s'
+
+        def optimized_success_response(self):
+            return HttpResponse('<p id="trip">Saved</p>')
+
+    def post(self, **headers):
+        request = RequestFactory().post('/trips/new/', {'name': 'Coast'}, **headers)
+        request._messages = default_storage(request)
+        return self.TripSave.as_view()(request), request
+
+    def test_messages_sent_as_events(self):
+        response, request = self.post(HTTP_X_UP_VERSION='2.5.1')
+        events = json.loads(response['X-Up-Events'])
+        self.assertEqual(events[-1], {
+            'type': 'flash:message',
+            'message': 'Saved Coast',
+            'level': 'success',
+            'tags': 'safe success',
+        })
+        self.assertTrue(request._messages.used)
+        request._messages.update(response)
+        self.assertEqual(response.cookies['messages'].value, '')
+
+    def test_redirect_keeps_messages(self):
+        response, request = self.post()
+        self.assertEqual(response.status_code, 302)
+        self.assertFalse(response.has_header('X-Up-Events'))
+        self.assertEqual([str(message) for message in request._messages], ['Saved Coast'])
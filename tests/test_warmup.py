@@ -0,0 +1,78 @@
+from io import StringIO
+from unittest import mock
+
+from django.apps import apps
+from django.core.management import CommandError, call_command
+from django.test import RequestFactory, SimpleTestCase, override_settings
+from django.views.generic import TemplateView
+
+from unpoly.views import UnpolyViewMixin
+from unpoly.warmup import configured_template_names, view_template_names, warm_templates, warm_up
+
+
+class DrawerView(UnpolyViewMixin, TemplateView):
+    template_name = 'unpoly_page.html'
+    unpoly_drawer_template = 'unpoly_list.html'
+
+
+class TemplateWarmupTest(SimpleTestCase):
+
+    def test_layer_templates_resolved_per_class(self):
+        self.assertEqual(DrawerView._unpoly_layer_templates['drawer'], 'unpoly_list.html')
+        self.assertEqual(DrawerView._unpoly_layer_templates['modal'], 'unpoly_modal_form.html')
+
+        view = DrawerView()
+        view.setup(RequestFactory().get('/', HTTP_X_UP_VERSION='2.5.1', HTTP_X_UP_MODE='drawer'))
+        self.assertEqual(view.get_template_names(), ['unpoly_list.html'])
+
+    def test_layer_template_passed_to_as_view(self):
+        request = RequestFactory().get('/', HTTP_X_UP_VERSION='2.5.1', HTTP_X_UP_MODE='drawer')
+        view = DrawerView(unpoly_drawer_template='unpoly_modal_form.html')
+        view.setup(request)
+        self.assertEqual(view.get_template_names(), ['unpoly_modal_form.html'])
+
+    def test_warm_when_app_is_ready(self):
+        """
+        Templates should be compiled at startup, without loading the URLconf while apps are loading
+        """
+        config = apps.get_app_config('unpoly')
+        with mock.patch('unpoly.warmup.warm_templates') as warm, \
+                mock.patch('unpoly.warmup.get_resolver') as get_resolver:
+            config.ready()
+            warm.assert_not_called()
+            with override_settings(UNPOLY_WARM_TEMPLATES=True):
+                config.ready()
+        get_resolver.assert_not_called()
+        names = warm.call_args.args[0]
+        self.assertIn('unpoly_modal_error.html', names)
+        self.assertIn('unpoly_list.html', names)
+
+    def test_warm_up(self):
+        with mock.patch('unpoly.warmup.warm_templates') as warm:
+            warm_up()
+        warm.assert_called_once_with()
+
+    def test_configured_template_names(self):
+        self.assertEqual(view_template_names(DrawerView), [
+            'unpoly_page.html', 'unpoly_modal_form.html', 'unpoly_list.html',
+        ])
+        names = configured_template_names()
+        self.assertIn('unpoly_modal_error.html', names)
+        self.assertIn('unpoly_page.html', names)
+
+    def test_warm_templates(self):
+        with self.assertLogs('unpoly.warmup', 'WARNING'):
+            compiled, failed = warm_templates(['unpoly_page.html', 'missing.html'])
+        self.assertEqual(compiled, ['unpoly_page.html'])
+        self.assertEqual([name for name, error in failed], ['missing.html'])
+
+    def test_management_command(self):
+        names = {'unpoly_page.html', 'unpoly_list.html'}
+        with mock.patch('unpoly.warmup.configured_template_names', return_value=names):
+            stdout = StringIO()
+            call_command('unpoly_warm_templates', stdout=stdout)
+        self.assertIn('Compiled 2 templates', stdout.getvalue())
+
+        with mock.patch('unpoly.warmup.configured_template_names', return_value={'missing.html'}):
+            with self.assertRaises(CommandError), self.assertLogs('unpoly.warmup', 'WARNING'):
+                call_command('unpoly_warm_templates', stdout=StringIO(), stderr=StringIO())
@@ -0,0 +1,11 @@
+from django.apps import AppConfig
+from django.conf import settings
+
+
+class UnpolyConfig(AppConfig):
+    name = 'unpoly'
+
+    def ready(self):
+        if getattr(settings, 'UNPOLY_WARM_TEMPLATES', False):
+            from .warmup import configured_template_names, warm_templates
+            warm_templates(configured_template_names(load_urlconf=False))
@@ -0,0 +1,144 @@
+import hashlib
+import time
+from typing import Iterable, Optional, Union
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models import Model
+from django.http import HttpResponse
+
+# Response headers that must not be replayed from the cache.
+UNCACHED_HEADERS = frozenset(('content-length', 'date', 'set-cookie', 'vary'))
+
+# Rendered into cached HTML in place of the CSRF token, and replaced
+# with the token of the request the HTML is served to.
+CSRF_TOKEN_PLACEHOLDER = 'UNPOLY-CSRF-TOKEN-PLACEHOLDER'
+
+
+def digest(value: str) -> str:
+    """Return the hex digest of a cache key or validator. Not used for security, so allowed on FIPS builds."""
+    return hashlib.md5(value.encode(), usedforsecurity=False).hexdigest()
+
+
+def model_tag(model: Union[Model, type, str]) -> str:
+    """Return the cache tag for a model class, instance or label."""
+    if isinstance(model, str):
+        return f'model:{model.lower()}'
+    return f'model:{model._meta.label_lower}'
+
+
+class FragmentCache:
+    """Stores rendered fragment responses in a Django cache backend.
+
+    Entries are tagged, such as by the models the response displays.
+    Each tag has a version stored in the cache, and the versions of an entry's
+    tags are part of its key, so invalidating a tag is a single cache write.
+    """
+
+    def __init__(self, alias: str = None, key_prefix: str = 'unpoly', max_size: int = None,
+                 alias_setting: str = 'UNPOLY_FRAGMENT_CACHE_ALIAS') -> None:
+        self._alias = alias
+        self._max_size = max_size
+        self.key_prefix = key_prefix
+        self.alias_setting = alias_setting
+
+    @property
+    def alias(self) -> str:
+        return (
+            self._alias
+            or getattr(settings, self.alias_setting, None)
+            or getattr(settings, 'UNPOLY_FRAGMENT_CACHE_ALIAS', 'default')
+        )
+
+    @property
+    def max_size(self) -> int:
+        """Responses larger than this many bytes aren't cached."""
+        if self._max_size is not None:
+            return self._max_size
+        return getattr(settings, 'UNPOLY_FRAGMENT_CACHE_MAX_SIZE', 1024 * 1024)
+
+    @property
+    def cache(self):
+        return caches[self.alias]
+
+    def tag_key(self, tag: str) -> str:
+        return f'{self.key_prefix}:tag:{tag}'
+
+    def tag_versions(self, tags: Iterable[str]) -> list:
+        """Return the current version of each tag.
+
+        Tags that were never invalidated, or were evicted from the cache,
+        are given a new version, so evicted tags can't serve stale entries.
+        """
+        keys = [self.tag_key(tag) for tag in tags]
+        versions = self.cache.get_many(keys)
+        missing = {key: str(time.time_ns()) for key in keys if key not in versions}
+        if missing:
+            self.cache.set_many(missing, timeout=None)
+            versions.update(missing)
+
+        return [versions[key] for key in keys]
+
+    def invalidate(self, *tags: str) -> None:
+        """Expire every cached response tagged with any of the tags."""
+        if tags:
+            self.cache.delete_many([self.tag_key(tag) for tag in tags])
+
+    def make_key(self, parts: Iterable, tags: Iterable[str] = ()) -> str:
+        tags = sorted(set(tags))
+        versions = self.tag_versions(tags)
+        key_digest = digest('\n'.join(str(part) for part in (*parts, *tags, *versions)))
+
+        return f'{self.key_prefix}:fragment:{key_digest}'
+
+    def get(self, key: str) -> Optional[HttpResponse]:
+        entry = self.cache.get(key)
+        if entry is None:
+            return None
+        return self.from_entry(entry)
+
+    def set(self, key: str, response: HttpResponse, timeout: int) -> bool:
+        """Store the response, if it's a complete successful response without cookies."""
+        entry = self.to_entry(response)
+        if entry is None:
+            return False
+
+        self.cache.set(key, entry, timeout)
+        return True
+
+    def to_entry(self, response: HttpResponse) -> Optional[tuple]:
+        """Return the response's content, status and replayable headers, or None when it can't be shared."""
+        if (
+            response.status_code != 200
+            or response.streaming
+            or response.cookies
+            or len(response.content) > self.max_size
+        ):
+            return None
+
+        headers = {
+            header: value
+            for header, value in response.items()
+            if header.lower() not in UNCACHED_HEADERS
+        }
+        return response.content, response.status_code, headers
+
+    @staticmethod
+    def from_entry(entry: tuple) -> HttpResponse:
+        content, status, headers = entry
+        return HttpResponse(content, status=status, headers=headers)
+
+fragment_cache = FragmentCache()
+
+# Rendered up-validate responses, in the UNPOLY_VALIDATION_CACHE_ALIAS cache when set
+validation_cache = FragmentCache(key_prefix='unpoly:validate', alias_setting='UNPOLY_VALIDATION_CACHE_ALIAS')
+
+
+__all__ = [
+    'CSRF_TOKEN_PLACEHOLDER',
+    'FragmentCache',
+    'digest',
+    'fragment_cache',
+    'validation_cache',
+    'model_tag',
+]
@@ -0,0 +1,82 @@
+from typing import Iterable, List, Tuple, Union
+
+from django.db.models import Model
+from django.http import HttpResponse
+
+
+def _label(model: Union[Model, type, str]) -> str:
+    if isinstance(model, str):
+        return model.lower()
+    return model._meta.concrete_model._meta.label_lower
+
+
+class ClientCacheRegistry:
+    """Maps models to the URL patterns of pages that display them.
+
+    When a view saves an object, the patterns registered for its model are
+    sent in the X-Up-Expire-Cache / X-Up-Evict-Cache headers, so Unpoly only
+    expires those pages from its client cache, rather than every cached page.
+
+        client_cache.register(Note, expire=['/notes/*', '/notes/{obj.pk}/'], evict=['/dashboard'])
+
+    Patterns are formatted with the saved object as `obj`.
+    """
+
+    def __init__(self) -> None:
+        self._registry = {}
+
+    def register(self, model: Union[type, str], expire: Iterable[str] = (), evict: Iterable[str] = ()) -> None:
+        registered_expire, registered_evict = self._registry.setdefault(_label(model), ([], []))
+        registered_expire.extend(expire)
+        registered_evict.extend(evict)
+
+    def unregister(self, model: Union[type, str]) -> None:
+        self._registry.pop(_label(model), None)
+
+    def is_registered(self, model: Union[Model, type, str]) -> bool:
+        return _label(model) in self._registry
+
+    def patterns(self, obj: Model) -> Tuple[List[str], List[str]]:
+        """Return the expire and evict URL patterns for the saved object."""
+        expire, evict = self._registry.get(_label(obj), ((), ()))
+        return (
+            [pattern.format(obj=obj) for pattern in expire],
+            [pattern.format(obj=obj) for pattern in evict],
+        )
+
+    def set_headers(self, response: HttpResponse, obj: Model) -> HttpResponse:
+        """Set the cache headers for the saved object, when its model is registered.
+
+        Unregistered models leave Unpoly's default of expiring the entire cache.
+        """
+        return self.set_headers_many(response, [obj])
+
+    def set_headers_many(self, response: HttpResponse, objs: Iterable[Model]) -> HttpResponse:
+        """Set the cache headers for several saved objects, merging their patterns.
+
+        Left unset when none of the objects' models are registered.
+        """
+        objs = [obj for obj in objs if isinstance(obj, Model) and self.is_registered(obj)]
+        if not objs:
+            return response
+
+        expire, evict = {}, {}
+        for obj in objs:
+            obj_expire, obj_evict = self.patterns(obj)
+            expire.update(dict.fromkeys(obj_expire))
+            evict.update(dict.fromkeys(obj_evict))
+
+        response['X-Up-Expire-Cache'] = ' '.join(expire) if expire else 'false'
+        if evict:
+            response['X-Up-Evict-Cache'] = ' '.join(evict)
+
+        return response
+
+
+client_cache = ClientCacheRegistry()
+
+
+__all__ = [
+    'ClientCacheRegistry',
+    'client_cache',
+]
@@ -0,0 +1,83 @@
+import json
+from functools import lru_cache, partial
+from typing import Callable, List
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.http import HttpResponse
+from django.utils.module_loading import import_string
+
+EVENTS_HEADER = 'X-Up-Events'
+
+
+@lru_cache(maxsize=None)
+def json_encoder() -> Callable:
+    """Return the callable that serializes each event in X-Up-Events.
+
+    Set `UNPOLY_JSON_ENCODER` to the dotted path of a faster encoder, such as
+    `ujson.dumps`. Encoders may return str or bytes, and must escape non-ASCII
+    characters, as header values are ASCII. Output that doesn't is encoded again
+    with `json.dumps`.
+    """
+    path = getattr(settings, 'UNPOLY_JSON_ENCODER', None)
+    if path:
+        return import_string(path)
+    return partial(json.dumps, default=str)
+
+
+@receiver(setting_changed)
+def _clear_json_encoder(setting, **kwargs) -> None:
+    if setting == 'UNPOLY_JSON_ENCODER':
+        json_encoder.cache_clear()
+
+
+class EventBuffer:
+    """Events to emit with the response, serialized once when it's finalized."""
+    __slots__ = ('events',)
+
+    def __init__(self) -> None:
+        self.events: List[dict] = []
+
+    def __len__(self) -> int:
+        return len(self.events)
+
+    def add(self, event: str, data: dict = None) -> dict:
+        data = data or {}
+        data['type'] = event
+        self.events.append(data)
+        return data
+
+    def write(self, response: HttpResponse) -> HttpResponse:
+        """Set the X-Up-Events header, keeping any events the response already has.
+
+        Each event is encoded once. The encoded events are kept on the response, so
+        writing more events joins strings instead of parsing the header again.
+        """
+        if not self.events:
+            return response
+
+        chunks = getattr(response, 'unpoly_events', None)
+        if chunks is None:
+            chunks = [encode(event) for event in json.loads(response.get(EVENTS_HEADER, '[]'))]
+            response.unpoly_events = chunks
+        chunks.extend(encode(event) for event in self.events)
+        response[EVENTS_HEADER] = '[' + ', '.join(chunks) + ']'
+        self.events = []
+
+        return response
+
+
+def encode(event: dict) -> str:
+    value = json_encoder()(event)
+    if isinstance(value, bytes):
+        value = value.decode()
+    if not value.isascii():
+        value = json.dumps(event, default=str)
+    return value
+
+
+__all__ = [
+    'EventBuffer',
+    'json_encoder',
+]
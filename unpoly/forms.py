@@ -1,4 +1,30 @@
+import copy
+from functools import lru_cache
+from typing import Optional, Tuple
+
 from crispy_forms.helper import FormHelper
+from crispy_forms.utils import render_crispy_form
+from django.middleware.csrf import get_token
+from django.utils.html import escape
+from django.utils.safestring import SafeString, mark_safe
+from django.utils.translation import get_language
+
+from .cache import CSRF_TOKEN_PLACEHOLDER, digest, fragment_cache
+
+
+@lru_cache(maxsize=256)
+def unpoly_form_attrs_for(up_target: str, up_layer: str, up_fail_layer: str,
+                          up_fail_target: str, multi_layer: bool) -> Tuple[Tuple[str, str], ...]:
+    """Return the Unpoly form tag attributes for a combination of form kwargs."""
+    if not up_target:
+        return ()
+
+    return (
+        ('up-target', up_target),
+        ('up-layer', 'current' if multi_layer else up_layer),
+        ('up-fail-layer', up_fail_layer),
+        ('up-fail-target', up_fail_target),
+    )
 
 
 class UnpolyCrispyFormMixin:
@@ -7,6 +33,14 @@ class UnpolyCrispyFormMixin:
     Unpoly attributes injected into the form tag.
     """
 
+    # FormHelper built once per form class by `configure_helper`, and copied for each form.
+    helper_class = FormHelper
+
+    # Cache the rendered HTML of unbound forms for this many seconds, when rendered
+    # with `render_unpoly_form` or the `{% unpoly_crispy %}` tag. Only enable for forms
+    # whose HTML depends only on the form kwargs, initial data and active language.
+    rendered_form_cache_timeout: Optional[int] = None
+
     def __init__(self, *args, **kwargs: dict) -> None:
         """Set any Unpoly attributes on Crispy FormHelper.
 
@@ -21,29 +55,48 @@ class UnpolyCrispyFormMixin:
         self.up_validate: str = kwargs.pop('up_validate', '')
 
         super().__init__(*args, **kwargs)
-        self.helper = FormHelper()
+        self.helper = self.build_helper()
         if self.form_action:
             self.helper.form_action = self.form_action
         self._set_unpoly_attrs()
 
+    @classmethod
+    def configure_helper(cls, helper: FormHelper) -> None:
+        """Set the layout and other options shared by every form of this class.
+
+        Called once per form class. The layout is shared by all forms of the class,
+        so set per-form options on `self.helper` in `__init__` rather than changing it.
+        """
+
+    @classmethod
+    def get_helper_prototype(cls) -> FormHelper:
+        helper = cls.__dict__.get('_helper_prototype')
+        if helper is None:
+            helper = cls.helper_class()
+            cls.configure_helper(helper)
+            cls._helper_prototype = helper
+        return helper
+
+    def build_helper(self) -> FormHelper:
+        """Return a copy of the class FormHelper, with its own attrs and inputs."""
+        prototype = self.get_helper_prototype()
+        helper = copy.copy(prototype)
+        helper.attrs = dict(prototype.attrs)
+        helper.inputs = list(prototype.inputs)
+        return helper
+
     def unpoly_form_attrs(self) -> dict:
         """Unpoly html attributes that should be set on the form.
 
         Override on subclasses to customize.
         """
-        if not self.up_target:
-            return {}
-
-        unpoly_attrs = {
-            'up-target': self.up_target,
-            'up-layer': self.up_layer,
-            'up-fail-layer': self.up_fail_layer,
-            'up-fail-target': self.up_fail_target,
-        }
-        if self.multi_layer:
-            unpoly_attrs['up-layer'] = 'current'
-
-        return unpoly_attrs
+        return dict(unpoly_form_attrs_for(
+            self.up_target,
+            self.up_layer,
+            self.up_fail_layer,
+            self.up_fail_target,
+            bool(self.multi_layer),
+        ))
 
     def _set_unpoly_attrs(self):
         """Set Unpoly attributes on Crispy FormHelper.
@@ -55,7 +108,43 @@ class UnpolyCrispyFormMixin:
 
         self.helper.attrs.update(unpoly_attrs)
 
+    def get_rendered_form_cache_key(self) -> str:
+        cls = self.__class__
+        parts = (
+            f'{cls.__module__}.{cls.__qualname__}',
+            self.helper.form_action,
+            sorted(self.helper.attrs.items()),
+            self.prefix,
+            sorted((name, repr(self.get_initial_for_field(field, name))) for name, field in self.fields.items()),
+            get_language(),
+        )
+        return f'{fragment_cache.key_prefix}:form:{digest(repr(parts))}'
+
+
+def render_unpoly_form(form, request=None, context: dict = None) -> SafeString:
+    """Render a Crispy form, from the rendered-form cache when the form allows it.
+
+    Bound forms, and forms without `rendered_form_cache_timeout`, are always rendered.
+    Cached HTML is rendered with a placeholder CSRF token, which is replaced with
+    the token of the request, so the cached HTML can be shared by every user.
+    """
+    timeout = getattr(form, 'rendered_form_cache_timeout', None)
+    if timeout is None or form.is_bound:
+        return render_crispy_form(form, getattr(form, 'helper', None), context)
+
+    key = form.get_rendered_form_cache_key()
+    cache = fragment_cache.cache
+    html = cache.get(key)
+    if html is None:
+        html = render_crispy_form(form, form.helper, {'csrf_token': CSRF_TOKEN_PLACEHOLDER})
+        cache.set(key, str(html), timeout)
+
+    token = escape(get_token(request)) if request is not None else ''
+    return mark_safe(html.replace(CSRF_TOKEN_PLACEHOLDER, token))
+
 
 __all__ = [
     'UnpolyCrispyFormMixin',
+    'render_unpoly_form',
+    'unpoly_form_attrs_for',
 ]
@@ -0,0 +1,301 @@
+import re
+from html.parser import HTMLParser
+from typing import List, Optional, Tuple
+
+# Elements that never have a closing tag, so never push onto the open element stack.
+VOID_ELEMENTS = frozenset((
+    'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input',
+    'link', 'meta', 'param', 'source', 'track', 'wbr',
+))
+
+# Pseudo classes Unpoly appends to targets to change how a fragment is swapped.
+# They don't change which element is matched in the response.
+SWAP_PSEUDO_CLASSES = (':before', ':after', ':maybe')
+
+# Selectors that match the entire document, so can never be trimmed.
+DOCUMENT_SELECTORS = frozenset(('html', 'body', ':layer', ':root'))
+
+SIMPLE_SELECTOR = re.compile(
+    r'^(?P<tag>[a-zA-Z][\w-]*|\*)?(?P<rest>(?:[#.][\w-]+)*)$'
+)
+
+
+def split_selectors(target: str) -> List[str]:
+    """Split a comma-separated X-Up-Target value into individual selectors.
+
+    Commas nested within parentheses or brackets, such as `:is(a, b)`,
+    don't split the selector.
+
+    #content_panel,#breadcrumb_bar,.item_list
+    """
+    selectors = []
+    depth = 0
+    start = 0
+    for idx, char in enumerate(target):
+        if char in '([':
+            depth += 1
+        elif char in ')]':
+            depth -= 1
+        elif char == ',' and not depth:
+            selectors.append(target[start:idx])
+            start = idx + 1
+    selectors.append(target[start:])
+
+    return [selector.strip() for selector in selectors if selector.strip()]
+
+
+def normalize_selector(selector: str) -> Tuple[str, bool]:
+    """Strip the swap pseudo classes from the selector.
+
+    Returns the bare selector, and whether the selector is optional (`:maybe`),
+    meaning Unpoly won't fail the update when the response doesn't contain it.
+    """
+    optional = False
+    stripped = True
+    while stripped:
+        stripped = False
+        for pseudo in SWAP_PSEUDO_CLASSES:
+            if selector.endswith(pseudo):
+                selector = selector[:-len(pseudo)].strip()
+                optional = optional or pseudo == ':maybe'
+                stripped = True
+
+    return selector, optional
+
+
+class Selector:
+    """Compound selector of tag name, id and classes, such as `div#panel.active`,
+    optionally preceded by ancestor compound selectors, such as `#content_panel .item_list`.
+
+    Covers the subset of CSS selectors Unpoly sends in X-Up-Target headers.
+    Selectors with other combinators or attribute / pseudo matchers can't be parsed,
+    and the response will not be trimmed.
+    """
+    __slots__ = ('selector', 'tag', 'id', 'classes', 'main', 'optional', 'ancestors')
+
+    def __init__(self, selector: str, tag: str = '', id: str = '',
+                 classes: frozenset = frozenset(), main: bool = False,
+                 optional: bool = False, ancestors: tuple = ()) -> None:
+        self.selector = selector
+        self.tag = tag
+        self.id = id
+        self.classes = classes
+        self.main = main
+        self.optional = optional
+        # Selectors of the elements the matched element must be nested in, outermost first
+        self.ancestors = ancestors
+
+    @classmethod
+    def parse(cls, selector: str) -> Optional['Selector']:
+        """Return Selector instance, or None when the selector can't be matched server-side."""
+        bare, optional = normalize_selector(selector)
+        parts = bare.split()
+        if not parts:
+            return None
+
+        compounds = [cls._parse_compound(part) for part in parts]
+        if any(compound is None for compound in compounds):
+            return None
+
+        compound = compounds[-1]
+        compound.selector = selector
+        compound.optional = optional
+        compound.ancestors = tuple(compounds[:-1])
+        return compound
+
+    @classmethod
+    def _parse_compound(cls, bare: str) -> Optional['Selector']:
+        if bare == ':main':
+            return cls(bare, main=True)
+
+        match = SIMPLE_SELECTOR.match(bare)
+        if not match or not bare:
+            return None
+
+        tag = (match.group('tag') or '').lower()
+        ids = []
+        classes = []
+        for part in re.findall(r'[#.][\w-]+', match.group('rest')):
+            if part[0] == '#':
+                ids.append(part[1:])
+            else:
+                classes.append(part[1:])
+
+        if len(ids) > 1:
+            return None
+
+        return cls(
+            bare,
+            tag='' if tag == '*' else tag,
+            id=ids[0] if ids else '',
+            classes=frozenset(classes),
+        )
+
+    def matches_element(self, tag: str, attrs: dict) -> bool:
+        if self.main:
+            return tag == 'main' or 'up-main' in attrs
+        if self.tag and self.tag != tag:
+            return False
+        if self.id and attrs.get('id') != self.id:
+            return False
+        if self.classes:
+            return self.classes.issubset((attrs.get('class') or '').split())
+        return True
+
+    def matches(self, tag: str, attrs: dict, ancestors: list = ()) -> bool:
+        """Does the element match, given its open ancestor elements as (tag, attrs), outermost first?"""
+        if not self.matches_element(tag, attrs):
+            return False
+
+        remaining = list(self.ancestors)
+        for ancestor_tag, ancestor_attrs in reversed(ancestors):
+            if not remaining:
+                break
+            if remaining[-1].matches_element(ancestor_tag, ancestor_attrs):
+                remaining.pop()
+
+        return not remaining
+
+
+class FragmentExtractor(HTMLParser):
+    """Streaming tokenizer that copies only matching elements to the output.
+
+    The first element matching each selector is extracted, along with
+    every element that has the `up-hungry` attribute and the `<title>`, so
+    Unpoly can update the document title. Elements nested inside an element
+    being extracted are copied as part of their parent, and count as matched.
+    """
+
+    def __init__(self, selectors: List[Selector], include_hungry: bool = True,
+                 include_title: bool = True) -> None:
+        super().__init__(convert_charrefs=False)
+        self.selectors = selectors
+        self.include_hungry = include_hungry
+        self.include_title = include_title
+        self.matched = set()
+        self.chunks = []
+        # (tag, attrs) of the open elements
+        self.stack = []
+        self.capture_depth: Optional[int] = None
+
+    def _match(self, tag: str, attrs: dict) -> bool:
+        found = False
+        for idx, selector in enumerate(self.selectors):
+            if idx not in self.matched and selector.matches(tag, attrs, self.stack):
+                self.matched.add(idx)
+                found = True
+
+        return (
+            found
+            or (self.include_hungry and 'up-hungry' in attrs)
+            or (self.include_title and tag == 'title')
+        )
+
+    def _write(self, text: str) -> None:
+        if self.capture_depth is not None:
+            self.chunks.append(text)
+
+    def handle_starttag(self, tag: str, attrs: list) -> None:
+        text = self.get_starttag_text()
+        attrs = dict(attrs)
+        if self.capture_depth is None:
+            if self._match(tag, attrs):
+                if tag in VOID_ELEMENTS:
+                    self.chunks.append(text)
+                    return
+                self.capture_depth = len(self.stack)
+        elif self.selectors:
+            # Nested targets are sent as part of the element being extracted
+            self._match(tag, attrs)
+
+        self._write(text)
+        if tag not in VOID_ELEMENTS:
+            self.stack.append((tag, attrs))
+
+    def handle_startendtag(self, tag: str, attrs: list) -> None:
+        text = self.get_starttag_text()
+        attrs = dict(attrs)
+        if self.capture_depth is None:
+            if self._match(tag, attrs):
+                self.chunks.append(text)
+                return
+        else:
+            self._match(tag, attrs)
+        self._write(text)
+
+    def handle_endtag(self, tag: str) -> None:
+        # Browsers tolerate unclosed elements such as <p> and <li>,
+        # so pop back to the matching open element when it exists.
+        if not any(open_tag == tag for open_tag, attrs in self.stack):
+            self._write(f'</{tag}>')
+            return
+
+        while self.stack:
+            depth = len(self.stack) - 1
+            if self.stack.pop()[0] == tag:
+                break
+
+        self._write(f'</{tag}>')
+        if self.capture_depth is not None and depth <= self.capture_depth:
+            self.capture_depth = None
+            self.chunks.append('\n')
+
+    def handle_data(self, data: str) -> None:
+        self._write(data)
+
+    def handle_entityref(self, name: str) -> None:
+        self._write(f'&{name};')
+
+    def handle_charref(self, name: str) -> None:
+        self._write(f'&#{name};')
+
+    def handle_comment(self, data: str) -> None:
+        self._write(f'<!--{data}-->')
+
+    def unknown_decl(self, data: str) -> None:
+        self._write(f'<![{data}]>')
+
+    def all_matched(self) -> bool:
+        """Every required selector was found in the document."""
+        return all(
+            idx in self.matched
+            for idx, selector in enumerate(self.selectors)
+            if not selector.optional
+        )
+
+
+def extract_fragments(html: str, target: str, include_hungry: bool = True,
+                      include_title: bool = True) -> Optional[str]:
+    """Return only the elements of the HTML document that match the target selectors.
+
+    Returns None when the response can't be trimmed, because a selector
+    matches the entire document, can't be parsed, or isn't found in the HTML.
+    Callers should send the full document in that case.
+    """
+    selectors = []
+    for selector in split_selectors(target):
+        parsed = Selector.parse(selector)
+        if parsed is None or normalize_selector(selector)[0] in DOCUMENT_SELECTORS:
+            return None
+        selectors.append(parsed)
+
+    if not selectors:
+        return None
+
+    extractor = FragmentExtractor(selectors, include_hungry=include_hungry, include_title=include_title)
+    extractor.feed(html)
+    extractor.close()
+
+    if not extractor.matched or not extractor.all_matched():
+        return None
+
+    return ''.join(extractor.chunks)
+
+
+__all__ = [
+    'extract_fragments',
+    'split_selectors',
+    'normalize_selector',
+    'Selector',
+    'FragmentExtractor',
+]
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from unpoly.warmup import warm_templates
+
+
+class Command(BaseCommand):
+    help = (
+        'Compile the Unpoly layer templates and the templates of every Unpoly view. '
+        'Fails when a template is missing or has a syntax error.'
+    )
+
+    def handle(self, *args, **options):
+        compiled, failed = warm_templates()
+        if options['verbosity'] > 1:
+            for name in compiled:
+                self.stdout.write(f'Compiled {name}')
+        for name, error in failed:
+            self.stderr.write(f'{name}: {error}')
+
+        if failed:
+            raise CommandError(f'{len(failed)} of {len(compiled) + len(failed)} templates failed to compile')
+
+        self.stdout.write(self.style.SUCCESS(f'Compiled {len(compiled)} templates'))
@@ -1,61 +1,137 @@
 from django.conf import settings
 from django.http import HttpRequest, HttpResponse
+from django.utils.cache import patch_cache_control, patch_vary_headers
 from django.utils.deprecation import MiddlewareMixin
 
+from .request import UnpolyRequestInfo
+from .shedding import load_shedder
+
 SECURE_COOKIE = not settings.DEBUG
 
 
-def _unpoly_validate(self) -> bool:
-    """Unpoly is validating but not saving a form"""
-    return 'HTTP_X_UP_VALIDATE' in self.META
+class UnpolyMiddleware(MiddlewareMixin):
+    """Add Unpoly methods to the request, and Unpoly headers to the response.
 
+    Supports both sync and async middleware chains. Under ASGI the
+    request is handled on the event loop, without a thread hop.
 
-def _unpoly_target(self) -> str:
+    With `UNPOLY_LOAD_SHEDDING` set, preloads, polls and other low priority
+    requests are answered without calling the view while the process is busy.
     """
-    Comma-separated string of Target selector
-    names of the element(s) Unpoly is swapping
-
-    #content_panel,#breadcrumb_bar,.item_list
-    """
-    return self.META.get('HTTP_X_UP_TARGET', '')
-
 
-def _is_unpoly(self) -> bool:
-    """Request is triggered by Unpoly"""
-    return (
-        'HTTP_X_UP_VERSION' in self.META
-        or 'HTTP_X_UP_MODE' in self.META
-        or 'HTTP_X_UP_TARGET' in self.META
-        or 'HTTP_X_UP_VALIDATE' in self.META
-    )
-
-
-class UnpolyMiddleware(MiddlewareMixin):
+    def annotate_request(self, request: HttpRequest) -> None:
+        info = UnpolyRequestInfo(request.META, request=request)
+        request.unpoly = info
+        request.unpoly_target = info.requested_target
+        request.unpoly_validate = info.is_validating
+        request.is_unpoly = info.is_unpoly
 
     def set_headers(self, request: HttpRequest, response: HttpResponse) -> HttpResponse:
         """
         For fullest browser support, set headers & cookies
         so Unpoly can detect method & location.
+
+        The `_up_method` cookie is only deleted when the browser sent it,
+        so GET responses stay storable by shared caches.
+
+        Vary is set for the Unpoly request headers the response depended on,
+        and events emitted while handling the request are written to X-Up-Events.
+        The `fragment_cache_control` directives of views are only set on
+        responses without cookies.
         """
-        method = request.method
-        response['X-Up-Method'] = method
+        # Views rendering another URL in-process set the method of that request
+        response.setdefault('X-Up-Method', request.method)
+        method = response['X-Up-Method']
 
         if method != 'GET':
             response.set_cookie('_up_method', method, secure=SECURE_COOKIE)
-        else:
+        elif '_up_method' in request.COOKIES:
             response.delete_cookie('_up_method')
 
+        info = getattr(request, 'unpoly', None)
+        if info is not None:
+            info.write_events(response)
+            if info.vary:
+                patch_vary_headers(response, sorted(info.vary))
+
+        cache_control = getattr(response, 'unpoly_cache_control', None)
+        if cache_control and not self.sets_cookies(request, response):
+            patch_cache_control(response, **cache_control)
+
         return response
 
+    def sets_cookies(self, request: HttpRequest, response: HttpResponse) -> bool:
+        """Whether the response sets cookies, or will when the session
+        and CSRF middleware process it."""
+        session = getattr(request, 'session', None)
+        return bool(
+            response.cookies
+            or request.META.get('CSRF_COOKIE_NEEDS_UPDATE')
+            or (session is not None and session.modified)
+        )
+
     def __call__(self, request: HttpRequest):
-        request.unpoly_target = _unpoly_target.__get__(request)
-        request.unpoly_validate = _unpoly_validate.__get__(request)
-        request.is_unpoly = _is_unpoly.__get__(request)
+        if self.async_mode:
+            return self.__acall__(request)
+
+        self.annotate_request(request)
+        if not load_shedder.enabled:
+            return self.set_headers(request, self.get_response(request))
+
+        response = load_shedder.check(request)
+        if response is None:
+            load_shedder.enter()
+            try:
+                response = self.get_response(request)
+            except BaseException:
+                load_shedder.leave()
+                raise
+            self.leave_when_sent(response)
 
-        response = self.get_response(request)
+        return self.set_headers(request, response)
+
+    async def __acall__(self, request: HttpRequest):
+        self.annotate_request(request)
+        if not load_shedder.enabled:
+            return self.set_headers(request, await self.get_response(request))
+
+        response = load_shedder.check(request)
+        if response is None:
+            load_shedder.enter()
+            try:
+                response = await self.get_response(request)
+            except BaseException:
+                load_shedder.leave()
+                raise
+            self.leave_when_sent(response)
 
         return self.set_headers(request, response)
 
+    def leave_when_sent(self, response: HttpResponse) -> None:
+        """Count the request as in flight until its response is sent.
+
+        Streaming responses are still being rendered as they're sent,
+        so they leave when the server closes them.
+        """
+        if not response.streaming:
+            load_shedder.leave()
+            return
+
+        close = response.close
+        left = False
+
+        def close_and_leave():
+            nonlocal left
+            try:
+                close()
+            finally:
+                # Servers may close a response more than once
+                if not left:
+                    left = True
+                    load_shedder.leave()
+
+        response.close = close_and_leave
+
 
 __all__ = [
     'UnpolyMiddleware',
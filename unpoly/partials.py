@@ -0,0 +1,178 @@
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+
+from django.template import Template
+from django.template.base import Node, NodeList, TextNode
+from django.template.context import Context, make_context
+from django.template.loader import get_template, select_template
+from django.template.loader_tags import (
+    BLOCK_CONTEXT_KEY,
+    BlockContext,
+    BlockNode,
+    ExtendsNode,
+)
+
+from .fragments import normalize_selector, split_selectors
+from .templatetags.unpoly_tags import UpFragmentNode
+
+
+def _extends_node(template: Template) -> Optional[ExtendsNode]:
+    for node in template.nodelist:
+        if not isinstance(node, TextNode):
+            return node if isinstance(node, ExtendsNode) else None
+    return None
+
+
+def _walk(nodelist: NodeList, overridden: set) -> Iterator[Node]:
+    """Yield every node in the tree, skipping blocks overridden by a child template."""
+    for node in nodelist:
+        if isinstance(node, BlockNode) and node.name in overridden:
+            continue
+        yield node
+        for attr in node.child_nodelists:
+            children = getattr(node, attr, None)
+            if children:
+                yield from _walk(children, overridden)
+
+
+def inheritance_chain(template: Template, context: Context) -> List[Template]:
+    """Return the template and every template it extends, most derived first.
+
+    Loads the block nodes of the chain into the block context,
+    as ExtendsNode.render does, so `{{ block.super }}` works.
+    """
+    chain = [template]
+    extends = _extends_node(template)
+    if extends is None:
+        return chain
+
+    block_context = context.render_context.setdefault(BLOCK_CONTEXT_KEY, BlockContext())
+    while extends is not None:
+        block_context.add_blocks(extends.blocks)
+        parent = extends.get_parent(context)
+        chain.append(parent)
+        extends = _extends_node(parent)
+
+    block_context.add_blocks({
+        node.name: node for node in chain[-1].nodelist.get_nodes_by_type(BlockNode)
+    })
+
+    return chain
+
+
+def collect_nodes(chain: List[Template]) -> Tuple[Dict[str, BlockNode], List[UpFragmentNode]]:
+    """Return the block nodes by name, and the `{% upfragment %}` nodes, that render in the chain."""
+    found_blocks = {}
+    fragments = []
+    overridden = set()
+    for template in chain:
+        for node in _walk(template.nodelist, overridden):
+            if isinstance(node, BlockNode):
+                found_blocks.setdefault(node.name, node)
+            elif isinstance(node, UpFragmentNode):
+                fragments.append(node)
+        overridden.update(node.name for node in template.nodelist.get_nodes_by_type(BlockNode))
+
+    return found_blocks, fragments
+
+
+def find_fragment_nodes(chain: List[Template], selectors: List[str],
+                        blocks: Dict[str, str], collected: tuple = None) -> Optional[List[Node]]:
+    """Return the nodes that render each selector, in selector order.
+
+    Selectors are mapped to blocks by name, or matched to `{% upfragment %}` tags.
+    Returns None when any selector can't be found in the compiled templates.
+    """
+    found_blocks, fragments = collected or collect_nodes(chain)
+
+    nodes = []
+    for selector in selectors:
+        bare, optional = normalize_selector(selector)
+        block_name = blocks.get(bare) or blocks.get(selector)
+        if block_name:
+            node = found_blocks.get(block_name)
+        else:
+            node = next((fragment for fragment in fragments if fragment.matches(bare)), None)
+
+        if node is None:
+            if optional:
+                continue
+            return None
+        if node not in nodes:
+            nodes.append(node)
+
+    return nodes or None
+
+
+def render_partial(template: Template, target: str, context: Context,
+                   blocks: Dict[str, str] = None, title_block: str = 'title') -> Optional[str]:
+    """Render only the nodes of the compiled template that match the target selector(s).
+
+    Nodes outside the requested fragments are never evaluated. When the templates
+    have a `title_block` block, it's rendered as a `<title>`, so Unpoly updates the
+    document title. Returns None when the target can't be rendered partially.
+    """
+    selectors = split_selectors(target)
+    if not selectors:
+        return None
+
+    with context.render_context.push_state(template):
+        with context.bind_template(template):
+            context.template_name = template.name
+            chain = inheritance_chain(template, context)
+            collected = collect_nodes(chain)
+            nodes = find_fragment_nodes(chain, selectors, blocks or {}, collected)
+            if nodes is None:
+                return None
+
+            html = ''.join(node.render_annotated(context) for node in nodes)
+            title = collected[0].get(title_block) if title_block else None
+            if title is not None and title not in nodes:
+                html = f'<title>{title.render_annotated(context).strip()}</title>\n{html}'
+            return html
+
+
+class PartialTemplate:
+    """Template proxy that renders only the fragments Unpoly requested.
+
+    Set as the `template_name` of a TemplateResponse. Falls back to
+    rendering the full template when the fragments can't be found.
+    """
+
+    def __init__(self, template_name: Union[str, List[str]], target: str,
+                 blocks: Dict[str, str] = None, using: str = None, title_block: str = 'title') -> None:
+        self.template_name = template_name
+        self.target = target
+        self.blocks = blocks or {}
+        self.using = using
+        self.title_block = title_block
+
+    def resolve_template(self):
+        if isinstance(self.template_name, (list, tuple)):
+            return select_template(self.template_name, using=self.using)
+        elif isinstance(self.template_name, str):
+            return get_template(self.template_name, using=self.using)
+        return self.template_name
+
+    def render(self, context: dict = None, request=None) -> str:
+        template = self.resolve_template()
+        compiled = getattr(template, 'template', None)
+        if not isinstance(compiled, Template):
+            return template.render(context, request)
+
+        partial = render_partial(
+            compiled,
+            self.target,
+            make_context(context, request, autoescape=template.backend.engine.autoescape),
+            self.blocks,
+            self.title_block,
+        )
+        if partial is None:
+            return template.render(context, request)
+
+        return partial
+
+
+__all__ = [
+    'PartialTemplate',
+    'render_partial',
+]
@@ -0,0 +1,176 @@
+import asyncio
+import contextvars
+import inspect
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncIterator, Callable, Iterator, List, Optional
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connections
+from django.utils import timezone, translation
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def get_executor() -> ThreadPoolExecutor:
+    """Return the thread pool sync fragment renderers run in, under both WSGI and ASGI.
+
+    Bounded by the `UNPOLY_RENDER_THREADS` setting, 4 by default.
+    """
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=getattr(settings, 'UNPOLY_RENDER_THREADS', 4),
+                    thread_name_prefix='unpoly-render',
+                )
+    return _executor
+
+
+def _in_thread(renderer: Callable) -> Callable:
+    """Run the renderer with the caller's context variables, active language and time zone,
+    and close the database connections it opened in its worker thread.
+
+    Django keeps the language and time zone in asgiref locals, which aren't
+    visible to other threads through the copied context, so they're activated again.
+    """
+    context = contextvars.copy_context()
+    language = translation.get_language()
+    time_zone = timezone.get_current_timezone()
+
+    def render():
+        with translation.override(language), timezone.override(time_zone):
+            return renderer()
+
+    def run():
+        try:
+            return context.run(render)
+        finally:
+            connections.close_all()
+    return run
+
+
+def _in_executor(renderer: Callable) -> asyncio.Future:
+    """Run a sync renderer in the bounded thread pool, from the event loop."""
+    return asyncio.get_running_loop().run_in_executor(get_executor(), _in_thread(renderer))
+
+
+def _joined(renderer: Callable) -> Callable:
+    """Return a renderer joining the chunks of a generator renderer, for buffered responses."""
+    if inspect.isasyncgenfunction(renderer):
+        async def join_async():
+            return ''.join([chunk async for chunk in renderer()])
+        return join_async
+    if inspect.isgeneratorfunction(renderer):
+        return lambda: ''.join(renderer())
+    return renderer
+
+
+def render_parallel(renderers: List[Callable]) -> List[str]:
+    """Call the renderers concurrently in the thread pool, returning outputs in order.
+
+    The chunks of generator renderers are joined. Async renderers aren't supported.
+    """
+    renderers = [_joined(renderer) for renderer in renderers]
+    if len(renderers) == 1:
+        return [renderers[0]()]
+
+    futures = [get_executor().submit(_in_thread(renderer)) for renderer in renderers]
+    try:
+        return [future.result() for future in futures]
+    finally:
+        for future in futures:
+            future.cancel()
+
+
+async def arender_parallel(renderers: List[Callable]) -> List[str]:
+    """Await async renderers concurrently, running sync renderers in the thread pool.
+
+    The chunks of generator renderers are joined.
+    """
+    renderers = [_joined(renderer) for renderer in renderers]
+    return await asyncio.gather(*(
+        renderer() if iscoroutinefunction(renderer) else _in_executor(renderer)
+        for renderer in renderers
+    ))
+
+
+def _is_generator(renderer: Callable) -> bool:
+    return inspect.isgeneratorfunction(renderer) or inspect.isasyncgenfunction(renderer)
+
+
+def stream_fragments(renderers: List[Callable]) -> Iterator[str]:
+    """Yield each renderer's output in order, as soon as it's ready.
+
+    Renderers returning strings run concurrently in the thread pool.
+    Generator renderers, such as for the rows of a large table, are
+    iterated as the response is sent, so each chunk is flushed in turn.
+    """
+    executor = get_executor()
+    pending = [
+        renderer if _is_generator(renderer) else executor.submit(_in_thread(renderer))
+        for renderer in renderers
+    ]
+
+    try:
+        for idx, item in enumerate(pending):
+            if idx:
+                yield '\n'
+            if callable(item):
+                yield from item()
+            else:
+                yield item.result()
+    finally:
+        # Don't render fragments the client will never receive, when it disconnects
+        for item in pending:
+            if not callable(item):
+                item.cancel()
+
+
+async def astream_fragments(renderers: List[Callable]) -> AsyncIterator[str]:
+    """Async version of `stream_fragments`, for ASGI.
+
+    Async renderers run concurrently as tasks; sync renderers in the thread pool.
+    """
+    pending = []
+    for renderer in renderers:
+        if _is_generator(renderer):
+            pending.append(renderer)
+        elif iscoroutinefunction(renderer):
+            pending.append(asyncio.ensure_future(renderer()))
+        else:
+            pending.append(_in_executor(renderer))
+
+    try:
+        for idx, item in enumerate(pending):
+            if idx:
+                yield '\n'
+            if isinstance(item, asyncio.Future):
+                yield await item
+            elif inspect.isasyncgenfunction(item):
+                async for chunk in item():
+                    yield chunk
+            else:
+                # Iterate sync generators in one thread, as they may hold a database cursor
+                chunks = item()
+                while True:
+                    chunk = await sync_to_async(next)(chunks, None)
+                    if chunk is None:
+                        break
+                    yield chunk
+    finally:
+        for item in pending:
+            if isinstance(item, asyncio.Future):
+                item.cancel()
+
+
+__all__ = [
+    'arender_parallel',
+    'astream_fragments',
+    'get_executor',
+    'render_parallel',
+    'stream_fragments',
+]
@@ -0,0 +1,261 @@
+import copy
+from functools import lru_cache
+from typing import List, NamedTuple, Optional, Tuple
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.http import HttpRequest, QueryDict
+from django.urls import Resolver404, ResolverMatch, get_script_prefix, resolve
+from django.utils.datastructures import MultiValueDict
+from django.utils.http import url_has_allowed_host_and_scheme
+
+from .events import EventBuffer
+from .fragments import split_selectors
+
+_UNSET = object()
+
+# Kinds of request, from `UnpolyRequestInfo.purpose`
+NAVIGATION = 'navigation'
+PRELOAD = 'preload'
+POLL = 'poll'
+VALIDATION = 'validation'
+BACKGROUND = 'background'
+
+# Purposes of requests the user isn't waiting for
+BACKGROUND_PURPOSES = frozenset((PRELOAD, POLL, BACKGROUND))
+
+
+class UnpolyDefaults(NamedTuple):
+    layer: str
+    fail_layer: str
+    target: str
+    fail_target: str
+
+
+@lru_cache(maxsize=None)
+def unpoly_defaults() -> UnpolyDefaults:
+    """Settings used when Unpoly doesn't send a header, read once at startup."""
+    return UnpolyDefaults(
+        layer=settings.MAIN_UP_LAYER,
+        fail_layer=settings.MAIN_UP_FAIL_LAYER,
+        target=settings.MAIN_UP_TARGET,
+        fail_target=settings.MAIN_UP_FAIL_TARGET,
+    )
+
+
+@receiver(setting_changed)
+def _clear_unpoly_defaults(**kwargs) -> None:
+    unpoly_defaults.cache_clear()
+
+
+class UnpolyRequestInfo:
+    """Unpoly protocol headers of a request.
+
+    Attached to the request as `request.unpoly` by the middleware, and shared
+    by the `Unpoly` helper and view mixins. Each header is read from META
+    at most once, when first accessed, and the header name is recorded in
+    `vary` so the response can set the Vary header.
+    """
+    # Read when first accessed, and unset until then
+    _lazy_slots = (
+        '_version', '_mode', '_fail_mode', '_layer', '_fail_layer',
+        '_target', '_fail_target', '_validate', '_template_name', '_template_type',
+        '_events', '_purpose',
+    )
+    __slots__ = ('meta', 'vary', '_request', '_query_params') + _lazy_slots
+
+    def __init__(self, meta: dict, query_params: dict = None, vary: set = None, request=None) -> None:
+        setattr_ = object.__setattr__
+        setattr_(self, 'meta', meta)
+        # Names of the request headers that were inspected, so responses can set Vary
+        setattr_(self, 'vary', vary if vary is not None else set())
+        setattr_(self, '_request', request)
+        setattr_(self, '_query_params', query_params)
+        for slot in self._lazy_slots:
+            setattr_(self, slot, _UNSET)
+
+    @classmethod
+    def from_request(cls, request) -> 'UnpolyRequestInfo':
+        """Return the request's parsed Unpoly headers, parsing them when the middleware hasn't."""
+        info = getattr(request, 'unpoly', None)
+        if info is None:
+            info = cls(request.META, request=request)
+        return info
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f'{self.__class__.__name__} is immutable')
+
+    def __delattr__(self, name):
+        raise AttributeError(f'{self.__class__.__name__} is immutable')
+
+    def _header(self, slot: str, key: str, header: str) -> Optional[str]:
+        value = getattr(self, slot)
+        if value is _UNSET:
+            value = self.meta.get(key)
+            object.__setattr__(self, slot, value)
+            self.vary.add(header)
+        return value
+
+    @property
+    def query_params(self) -> dict:
+        if self._query_params is None:
+            params = self._request.GET if self._request is not None else {}
+            object.__setattr__(self, '_query_params', params)
+        return self._query_params
+
+    @property
+    def events(self) -> EventBuffer:
+        """Events emitted while handling the request, written to the response by `write_events`."""
+        if self._events is _UNSET:
+            object.__setattr__(self, '_events', EventBuffer())
+        return self._events
+
+    def write_events(self, response):
+        if self._events is not _UNSET:
+            self._events.write(response)
+        return response
+
+    def version(self) -> Optional[str]:
+        return self._header('_version', 'HTTP_X_UP_VERSION', 'X-Up-Version')
+
+    def mode(self) -> str:
+        return self._header('_mode', 'HTTP_X_UP_MODE', 'X-Up-Mode') or unpoly_defaults().layer
+
+    def fail_mode(self) -> str:
+        return self._header('_fail_mode', 'HTTP_X_UP_FAIL_MODE', 'X-Up-Fail-Mode') or unpoly_defaults().fail_layer
+
+    def layer(self) -> str:
+        return self._header('_layer', 'HTTP_X_UP_LAYER', 'X-Up-Layer') or unpoly_defaults().layer
+
+    def fail_layer(self) -> str:
+        return self._header('_fail_layer', 'HTTP_X_UP_FAIL_LAYER', 'X-Up-Fail-Layer') or unpoly_defaults().fail_layer
+
+    def requested_target(self) -> str:
+        """Target selector(s) sent by Unpoly, or empty string."""
+        return self._header('_target', 'HTTP_X_UP_TARGET', 'X-Up-Target') or ''
+
+    def target(self) -> str:
+        return self.requested_target() or unpoly_defaults().target
+
+    def fail_target(self) -> str:
+        return self._header('_fail_target', 'HTTP_X_UP_FAIL_TARGET', 'X-Up-Fail-Target') or unpoly_defaults().fail_target
+
+    def targets(self) -> List[str]:
+        return split_selectors(self.target())
+
+    def fail_targets(self) -> List[str]:
+        return split_selectors(self.fail_target())
+
+    def is_validating(self) -> bool:
+        return self._header('_validate', 'HTTP_X_UP_VALIDATE', 'X-Up-Validate') is not None
+
+    def validate(self) -> str:
+        return self._header('_validate', 'HTTP_X_UP_VALIDATE', 'X-Up-Validate') or ''
+
+    def is_unpoly(self) -> bool:
+        """Request is triggered by Unpoly"""
+        return (
+            self.version() is not None
+            or self._header('_mode', 'HTTP_X_UP_MODE', 'X-Up-Mode') is not None
+            or self._header('_target', 'HTTP_X_UP_TARGET', 'X-Up-Target') is not None
+            or self.is_validating()
+        )
+
+    def purpose(self) -> str:
+        """Classify the request as navigation, preload, poll, validation or background.
+
+        Preloads, polls and other background requests are marked by the X-Up-Purpose header,
+        and browser prefetches by `Sec-Purpose: prefetch`. Not recorded in `vary`, since
+        the classification is meant for server policy, such as load shedding, and not content.
+        """
+        if self._purpose is _UNSET:
+            meta = self.meta
+            if meta.get('HTTP_X_UP_VALIDATE') is not None:
+                purpose = VALIDATION
+            else:
+                purpose = (meta.get('HTTP_X_UP_PURPOSE') or '').lower()
+                if purpose not in BACKGROUND_PURPOSES:
+                    fetch_purpose = meta.get('HTTP_SEC_PURPOSE') or meta.get('HTTP_PURPOSE') or ''
+                    purpose = PRELOAD if 'prefetch' in fetch_purpose.lower() else NAVIGATION
+            object.__setattr__(self, '_purpose', purpose)
+        return self._purpose
+
+    def is_preload(self) -> bool:
+        return self.purpose() == PRELOAD
+
+    def is_poll(self) -> bool:
+        return self.purpose() == POLL
+
+    def is_background(self) -> bool:
+        """Request the user isn't waiting for: a preload, poll or other background request."""
+        return self.purpose() in BACKGROUND_PURPOSES
+
+    def multi_layer(self) -> bool:
+        return self.query_params.get('multi_layer')
+
+    def template_name(self) -> str:
+        return self._header('_template_name', 'HTTP_X_TEMPLATE_NAME', 'X-Template-Name') or ''
+
+    def template_type(self) -> str:
+        return self._header('_template_type', 'HTTP_X_TEMPLATE_TYPE', 'X-Template-Type') or ''
+
+
+def get_request_for_url(request: HttpRequest, url: str) -> Optional[Tuple[HttpRequest, ResolverMatch]]:
+    """Return a GET request for a URL of this site, sharing the request's headers, session and user.
+
+    Returns None when the URL is for another host, or doesn't resolve to a view.
+    """
+    if not url_has_allowed_host_and_scheme(url, allowed_hosts={request.get_host()}):
+        return None
+
+    parts = urlsplit(url)
+    path = parts.path or request.path
+    prefix = get_script_prefix()
+    path_info = '/' + path[len(prefix):] if path.startswith(prefix) else path
+    try:
+        match = resolve(path_info)
+    except Resolver404:
+        return None
+
+    get_request = copy.copy(request)
+    get_request.META = {
+        key: value
+        for key, value in request.META.items()
+        if key not in ('CONTENT_LENGTH', 'CONTENT_TYPE', 'HTTP_X_UP_VALIDATE')
+    }
+    get_request.META['REQUEST_METHOD'] = 'GET'
+    get_request.META['QUERY_STRING'] = parts.query
+    get_request.method = 'GET'
+    get_request.path = path
+    get_request.path_info = path_info
+    get_request.GET = QueryDict(parts.query)
+    get_request._post = QueryDict()
+    get_request._files = MultiValueDict()
+    get_request.resolver_match = match
+
+    info = getattr(request, 'unpoly', None)
+    if info is not None:
+        # Parse the headers of the GET again, and keep only the Vary names of the original
+        get_info = UnpolyRequestInfo(get_request.META, query_params=get_request.GET, vary=info.vary,
+                                     request=get_request)
+        get_request.unpoly = get_info
+        get_request.unpoly_target = get_info.requested_target
+        get_request.unpoly_validate = get_info.is_validating
+        get_request.is_unpoly = get_info.is_unpoly
+
+    return get_request, match
+
+
+__all__ = [
+    'BACKGROUND',
+    'BACKGROUND_PURPOSES',
+    'NAVIGATION',
+    'POLL',
+    'PRELOAD',
+    'VALIDATION',
+    'get_request_for_url',
+    'UnpolyRequestInfo',
+    'unpoly_defaults',
+]
@@ -0,0 +1,83 @@
+import threading
+from typing import Optional
+
+from django.conf import settings
+from django.http import HttpRequest, HttpResponse, HttpResponseNotModified
+
+from .request import POLL, UnpolyRequestInfo
+
+
+class LoadShedder:
+    """Counts the requests in flight, and sheds low priority requests under load.
+
+    `UNPOLY_LOAD_SHEDDING` maps request purposes to the number of requests in flight
+    in this process above which requests with that purpose are shed, such as
+    `{'preload': 20, 'poll': 40, 'background': 40}`. Give preloads the lowest limit
+    so they are shed first. Purposes without a limit are never shed.
+    """
+
+    def __init__(self, limits: dict = None, retry_after: int = None) -> None:
+        self._limits = limits
+        self._retry_after = retry_after
+        self._lock = threading.Lock()
+        self.in_flight = 0
+
+    @property
+    def limits(self) -> dict:
+        if self._limits is not None:
+            return self._limits
+        return getattr(settings, 'UNPOLY_LOAD_SHEDDING', {})
+
+    @property
+    def retry_after(self) -> int:
+        """Seconds shed clients are asked to wait before retrying, or polling again."""
+        if self._retry_after is not None:
+            return self._retry_after
+        return getattr(settings, 'UNPOLY_SHED_RETRY_AFTER', 5)
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.limits)
+
+    def enter(self) -> None:
+        with self._lock:
+            self.in_flight += 1
+
+    def leave(self) -> None:
+        with self._lock:
+            self.in_flight -= 1
+
+    def should_shed(self, purpose: str) -> bool:
+        limit = self.limits.get(purpose)
+        return limit is not None and self.in_flight >= limit
+
+    def shed_response(self, request: HttpRequest, purpose: str) -> HttpResponse:
+        """Tell Unpoly to keep its current fragment, and when to try again.
+
+        Polls that sent a validator get a cheap 304 Not Modified, so the
+        fragment stays on the page. Other requests get 503 Service Unavailable.
+        """
+        if purpose == POLL and (
+            request.META.get('HTTP_IF_NONE_MATCH') or request.META.get('HTTP_IF_MODIFIED_SINCE')
+        ):
+            response = HttpResponseNotModified()
+        else:
+            response = HttpResponse(status=503)
+        response['Retry-After'] = str(self.retry_after)
+        return response
+
+    def check(self, request: HttpRequest) -> Optional[HttpResponse]:
+        """Return the response shedding the request, or None to handle it."""
+        purpose = UnpolyRequestInfo.from_request(request).purpose()
+        if self.should_shed(purpose):
+            return self.shed_response(request, purpose)
+        return None
+
+
+load_shedder = LoadShedder()
+
+
+__all__ = [
+    'LoadShedder',
+    'load_shedder',
+]
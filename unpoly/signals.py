@@ -0,0 +1,13 @@
+from django.dispatch import Signal
+
+# Sent when a view finishes timing an Unpoly request, with arguments:
+#   view: The view instance.
+#   request: The request.
+#   timings: {phase: milliseconds}, including `total`.
+#   tags: {'mode': ..., 'target': ..., 'validating': bool}
+request_timed = Signal()
+
+
+__all__ = [
+    'request_timed',
+]
@@ -0,0 +1,184 @@
+import asyncio
+import threading
+import time
+import uuid
+from typing import Awaitable, Callable, Optional
+
+from django.http import HttpResponse
+
+from .cache import FragmentCache, fragment_cache
+
+# Seconds between checks for the response of a render in another worker
+POLL_INTERVAL = 0.05
+
+
+class Flight:
+    """A render in progress in this process, and the response it will share."""
+    __slots__ = ('done', 'entry')
+
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.entry: Optional[tuple] = None
+
+
+class SingleFlight:
+    """Shares one render between concurrent identical requests.
+
+    The first request for a key renders the response, and requests for the
+    same key arriving meanwhile wait for it and are sent a copy. With `shared`,
+    a lock in the cache backend extends this to other worker processes, and the
+    response is passed to them through the cache.
+
+    Waiting requests render the response themselves after `timeout` seconds, or
+    when the response can't be shared, such as an error or a response with cookies.
+    """
+
+    def __init__(self, fragments: FragmentCache = fragment_cache) -> None:
+        self.fragments = fragments
+        self._lock = threading.Lock()
+        self._flights = {}
+
+    def lock_key(self, key: str) -> str:
+        return f'{self.fragments.key_prefix}:flight:{key}'
+
+    def result_key(self, key: str, token: str) -> str:
+        return f'{self.fragments.key_prefix}:flight:{key}:{token}'
+
+    def _join(self, key: str):
+        """Return the flight for the key, and whether this request leads it."""
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight is not None:
+                return flight, False
+            flight = self._flights[key] = Flight()
+            return flight, True
+
+    def _land(self, key: str, flight: Flight, entry: Optional[tuple]) -> None:
+        flight.entry = entry
+        flight.done.set()
+        with self._lock:
+            self._flights.pop(key, None)
+
+    def _entry(self, response: HttpResponse, shareable: Optional[Callable]) -> Optional[tuple]:
+        if shareable is not None and not shareable(response):
+            return None
+        return self.fragments.to_entry(response)
+
+    def run(self, key: str, render: Callable[[], HttpResponse], timeout: float,
+            shared: bool = False, shareable: Callable[[HttpResponse], bool] = None) -> HttpResponse:
+        """Return the rendered response, rendering it only if no identical render is in progress.
+
+        `render` must return a rendered response.
+        """
+        flight, leader = self._join(key)
+        if not leader:
+            if flight.done.wait(timeout) and flight.entry is not None:
+                return self.fragments.from_entry(flight.entry)
+            return render()
+
+        entry = None
+        try:
+            if not shared:
+                response = render()
+                entry = self._entry(response, shareable)
+                return response
+            response, entry = self._run_shared(key, render, timeout, shareable)
+            return response
+        finally:
+            self._land(key, flight, entry)
+
+    def _run_shared(self, key: str, render: Callable, timeout: float, shareable: Optional[Callable]):
+        cache = self.fragments.cache
+        lock_key = self.lock_key(key)
+        token = uuid.uuid4().hex
+
+        if cache.add(lock_key, token, timeout):
+            try:
+                response = render()
+                entry = self._entry(response, shareable)
+                if entry is not None:
+                    cache.set(self.result_key(key, token), entry, timeout)
+            finally:
+                cache.delete(lock_key)
+            return response, entry
+
+        leader_token = cache.get(lock_key)
+        deadline = time.monotonic() + timeout
+        while leader_token is not None and time.monotonic() < deadline:
+            entry = cache.get(self.result_key(key, leader_token))
+            if entry is not None:
+                return self.fragments.from_entry(entry), entry
+            if cache.get(lock_key) != leader_token:
+                # Landed between the reads, or without a shareable response
+                entry = cache.get(self.result_key(key, leader_token))
+                if entry is not None:
+                    return self.fragments.from_entry(entry), entry
+                break
+            time.sleep(POLL_INTERVAL)
+
+        response = render()
+        return response, self._entry(response, shareable)
+
+    async def arun(self, key: str, render: Callable[[], Awaitable[HttpResponse]], timeout: float,
+                   shared: bool = False, shareable: Callable[[HttpResponse], bool] = None) -> HttpResponse:
+        """Async counterpart of `run`, waiting on the event loop."""
+        flight, leader = self._join(key)
+        if not leader:
+            deadline = time.monotonic() + timeout
+            while not flight.done.is_set() and time.monotonic() < deadline:
+                await asyncio.sleep(POLL_INTERVAL)
+            if flight.entry is not None:
+                return self.fragments.from_entry(flight.entry)
+            return await render()
+
+        entry = None
+        try:
+            if not shared:
+                response = await render()
+                entry = self._entry(response, shareable)
+                return response
+            response, entry = await self._arun_shared(key, render, timeout, shareable)
+            return response
+        finally:
+            self._land(key, flight, entry)
+
+    async def _arun_shared(self, key: str, render: Callable, timeout: float, shareable: Optional[Callable]):
+        cache = self.fragments.cache
+        lock_key = self.lock_key(key)
+        token = uuid.uuid4().hex
+
+        if await cache.aadd(lock_key, token, timeout):
+            try:
+                response = await render()
+                entry = self._entry(response, shareable)
+                if entry is not None:
+                    await cache.aset(self.result_key(key, token), entry, timeout)
+            finally:
+                await cache.adelete(lock_key)
+            return response, entry
+
+        leader_token = await cache.aget(lock_key)
+        deadline = time.monotonic() + timeout
+        while leader_token is not None and time.monotonic() < deadline:
+            entry = await cache.aget(self.result_key(key, leader_token))
+            if entry is not None:
+                return self.fragments.from_entry(entry), entry
+            if await cache.aget(lock_key) != leader_token:
+                entry = await cache.aget(self.result_key(key, leader_token))
+                if entry is not None:
+                    return self.fragments.from_entry(entry), entry
+                break
+            await asyncio.sleep(POLL_INTERVAL)
+
+        response = await render()
+        return response, self._entry(response, shareable)
+
+
+# Locks and responses of shared flights are in the UNPOLY_SINGLE_FLIGHT_CACHE_ALIAS cache when set
+single_flight = SingleFlight(FragmentCache(alias_setting='UNPOLY_SINGLE_FLIGHT_CACHE_ALIAS'))
+
+
+__all__ = [
+    'SingleFlight',
+    'single_flight',
+]
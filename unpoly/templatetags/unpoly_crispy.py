@@ -0,0 +1,17 @@
+from django import template
+
+from ..forms import render_unpoly_form
+
+register = template.Library()
+
+
+@register.simple_tag(takes_context=True)
+def unpoly_crispy(context, form):
+    """
+    {% load unpoly_crispy %}
+    {% unpoly_crispy form %}
+
+    Render a Crispy form like `{% crispy form %}`, serving unbound forms
+    from the rendered-form cache when the form sets `rendered_form_cache_timeout`.
+    """
+    return render_unpoly_form(form, context.get('request'), context.flatten())
@@ -0,0 +1,54 @@
+from django import template
+from django.template.base import Node, NodeList
+
+from ..fragments import normalize_selector
+
+register = template.Library()
+
+
+class UpFragmentNode(Node):
+    """Mark the section of a template that renders the element(s) matching the selector(s).
+
+    Renders the contents unchanged. When views render Unpoly fragments, only the
+    fragment nodes matching the requested target(s) are rendered.
+    """
+
+    def __init__(self, selectors: list, nodelist: NodeList) -> None:
+        self.selectors = selectors
+        self.nodelist = nodelist
+
+    def __repr__(self):
+        return f'<UpFragmentNode: {", ".join(self.selectors)}>'
+
+    def matches(self, selector: str) -> bool:
+        return normalize_selector(selector)[0] in self.selectors
+
+    def render(self, context) -> str:
+        return self.nodelist.render(context)
+
+
+@register.tag
+def upfragment(parser, token) -> UpFragmentNode:
+    """
+    {% upfragment "#content_panel" ".item_list" %}
+        <div id="content_panel">...</div>
+    {% endupfragment %}
+    """
+    bits = token.split_contents()
+    if len(bits) < 2:
+        raise template.TemplateSyntaxError(
+            f"'{bits[0]}' tag requires at least one target selector"
+        )
+
+    selectors = []
+    for bit in bits[1:]:
+        if bit[0] != bit[-1] or bit[0] not in ('"', "'"):
+            raise template.TemplateSyntaxError(
+                f"'{bits[0]}' tag selectors must be quoted strings"
+            )
+        selectors.append(normalize_selector(bit[1:-1])[0])
+
+    nodelist = parser.parse(('endupfragment',))
+    parser.delete_first_token()
+
+    return UpFragmentNode(selectors, nodelist)
@@ -0,0 +1,69 @@
+import time
+from contextlib import contextmanager, nullcontext
+from typing import Dict
+
+from django.http import HttpResponse
+
+# Returned by views for phases when Server-Timing is disabled
+NO_TIMING = nullcontext()
+
+
+class ServerTiming:
+    """Durations of the phases of handling a request, in milliseconds.
+
+    Durations of repeated phases are summed. Nested phases of the
+    same name, such as `get_context_data` calling super, count once.
+    """
+    __slots__ = ('phases', 'started', '_running')
+
+    def __init__(self) -> None:
+        self.phases: Dict[str, float] = {}
+        self.started: float = time.perf_counter()
+        self._running: Dict[str, float] = {}
+
+    def start(self, name: str) -> None:
+        self._running.setdefault(name, time.perf_counter())
+
+    def stop(self, name: str) -> float:
+        started = self._running.pop(name, None)
+        if started is None:
+            return 0.0
+        elapsed = (time.perf_counter() - started) * 1000
+        self.phases[name] = self.phases.get(name, 0.0) + elapsed
+        return elapsed
+
+    @contextmanager
+    def phase(self, name: str):
+        if name in self._running:
+            yield
+            return
+
+        self.start(name)
+        try:
+            yield
+        finally:
+            self.stop(name)
+
+    def total(self) -> float:
+        return (time.perf_counter() - self.started) * 1000
+
+    def header(self, total: float) -> str:
+        metrics = [f'{name};dur={duration:.3f}' for name, duration in self.phases.items()]
+        metrics.append(f'total;dur={total:.3f}')
+        return ', '.join(metrics)
+
+    def write(self, response: HttpResponse) -> Dict[str, float]:
+        """Set the Server-Timing header, returning the durations including the total."""
+        total = self.total()
+        header = self.header(total)
+        if response.has_header('Server-Timing'):
+            header = f"{response['Server-Timing']}, {header}"
+        response['Server-Timing'] = header
+
+        return {**self.phases, 'total': total}
+
+
+__all__ = [
+    'NO_TIMING',
+    'ServerTiming',
+]
@@ -1,5 +1,7 @@
 from django.http import HttpRequest
 
+from .request import UnpolyRequestInfo
+
 
 class UnpolyHttpRequest(HttpRequest):
     """
@@ -10,6 +12,8 @@ class UnpolyHttpRequest(HttpRequest):
     class UserCreate(CreateView):
         request: UnpolyHttpRequest
     """
+    # Unpoly headers of the request, parsed on first access
+    unpoly: UnpolyRequestInfo
 
     def is_unpoly(self) -> bool:
         return False
@@ -1,8 +1,10 @@
-from ast import literal_eval
 import json
-from django.conf import settings
+from typing import List, Optional
+
 from django.http import HttpResponse
 
+from .request import UnpolyRequestInfo
+
 
 class Unpoly:
     """Partial port of Unpoly rails gem from
@@ -14,14 +16,34 @@ class Unpoly:
     Available through the `up` method in all controllers, helpers and views.
     """
 
-    def __init__(self, meta: dict, query_params: dict = None) -> None:
-        self.meta: dict = meta
-        self.query_params: dict = query_params or {}
+    __slots__ = ('info',)
+
+    def __init__(self, meta: dict = None, query_params: dict = None, vary: set = None,
+                 info: UnpolyRequestInfo = None) -> None:
+        self.info: UnpolyRequestInfo = info or UnpolyRequestInfo(meta or {}, query_params or {}, vary)
+
+    @classmethod
+    def from_request(cls, request) -> 'Unpoly':
+        """Return helper sharing the headers the middleware parsed for the request."""
+        return cls(info=UnpolyRequestInfo.from_request(request))
+
+    @property
+    def meta(self) -> dict:
+        return self.info.meta
+
+    @property
+    def query_params(self) -> dict:
+        return self.info.query_params
+
+    @property
+    def vary(self) -> set:
+        """Names of the request headers that were inspected, so responses can set Vary"""
+        return self.info.vary
 
     def is_unpoly(self) -> bool:
         """Request is triggered by Unpoly
         """
-        return 'HTTP_X_UP_VERSION' in self.meta or self.is_validating()
+        return self.info.version() is not None or self.info.is_validating()
 
     def mode(self) -> str:
         """Unpoly allows you to stack multiple pages on top of each other.
@@ -31,22 +53,40 @@ class Unpoly:
         The initial page is called the root layer.
         An overlay is any layer that is not the root layer.
         """
-        return self.meta.get('HTTP_X_UP_MODE', settings.MAIN_UP_LAYER)
+        return self.info.mode()
 
     def fail_mode(self) -> str:
         """Return layer mode requested by Unpoly when a request failure occurs.
         """
-        return self.meta.get('HTTP_X_UP_FAIL_MODE', settings.MAIN_UP_FAIL_LAYER)
+        return self.info.fail_mode()
 
     def layer(self) -> str:
         """Return layer mode requested by Unpoly when a request succeeds.
         """
-        return self.meta.get('HTTP_X_UP_LAYER', settings.MAIN_UP_LAYER)
+        return self.info.layer()
 
     def fail_layer(self) -> str:
         """Return layer mode requested by Unpoly when a request fails.
         """
-        return self.meta.get('HTTP_X_UP_FAIL_LAYER', settings.MAIN_UP_FAIL_LAYER)
+        return self.info.fail_layer()
+
+    def purpose(self) -> str:
+        """Return the kind of request: 'navigation', 'preload', 'poll', 'validation' or 'background'.
+
+        Not part of Unpoly protocol, except for validation. See the README for sending X-Up-Purpose.
+        """
+        return self.info.purpose()
+
+    def is_preload(self) -> bool:
+        return self.info.is_preload()
+
+    def is_poll(self) -> bool:
+        return self.info.is_poll()
+
+    def is_background(self) -> bool:
+        """Request the user isn't waiting for, such as a preload or poll.
+        """
+        return self.info.is_background()
 
     def multi_layer(self) -> bool:
         """Check query params for key indicating that this layer is multiple overlay.
@@ -57,7 +97,7 @@ class Unpoly:
 
         Not part of Unpoly protocol.
         """
-        return self.query_params.get('multi_layer')
+        return self.info.multi_layer()
 
     def accept_layer(self, response: HttpResponse, data: dict) -> HttpResponse:
         """Send X-Up-Accept-Layer and data to frontend to close the current layer.
@@ -76,7 +116,7 @@ class Unpoly:
         Server-side code is free to optimize its response by only returning HTML
         that matches this selector.
         """
-        return self.meta.get('HTTP_X_UP_FAIL_TARGET') or settings.MAIN_UP_FAIL_TARGET
+        return self.info.fail_target()
 
     def target(self) -> str:
         """Returns the CSS selector for a fragment that Unpoly will update in
@@ -88,20 +128,32 @@ class Unpoly:
         Server-side code is free to optimize its successful response by only returning HTML
         that matches this selector.
         """
-        return self.meta.get('HTTP_X_UP_TARGET') or settings.MAIN_UP_TARGET
+        return self.info.target()
+
+    def targets(self) -> List[str]:
+        """Returns the individual CSS selectors of a comma-separated target.
+
+        #content_panel,#breadcrumb_bar,.item_list
+        """
+        return self.info.targets()
+
+    def fail_targets(self) -> List[str]:
+        """Returns the individual CSS selectors of a comma-separated fail target.
+        """
+        return self.info.fail_targets()
 
     def is_validating(self) -> bool:
         """Returns whether the current form submission should be
         [validated](https://unpoly.com/input-up-validate) (and not be saved to the database).
         """
-        return 'HTTP_X_UP_VALIDATE' in self.meta
+        return self.info.is_validating()
 
     def validate(self) -> str:
         """If the current form submission is a [validation](https://unpoly.com/input-up-validate),
         this returns the name attribute of the form field that has triggered
         the validation.
         """
-        return self.meta.get('HTTP_X_UP_VALIDATE', '')
+        return self.info.validate()
 
     def title(self, response: HttpResponse, title: str) -> HttpResponse:
         """Forces Unpoly to use the given string as the document title.
@@ -111,7 +163,7 @@ class Unpoly:
         response['X-Up-Title'] = title
         return response
 
-    def emit(self, response: HttpResponse, event: str, data: dict = None) -> HttpResponse:
+    def emit(self, response: Optional[HttpResponse], event: str, data: dict = None) -> Optional[HttpResponse]:
         """The server may set a response header to emit events with the requested fragment update.
 
         The header value is a JSON array. Each element in the array is a JSON object representing
@@ -120,26 +172,30 @@ class Unpoly:
         The object property { "type" } defines the event's type. Other properties become properties
         of the emitted event object.
 
-        :param response: Response object that will be returned from view
+        :param response: Response object that will be returned from view, or None to buffer the event
         :param event: Event name, such as user:created
         :param data: Data dict to ship to the front end as the event value
 
+        The event is buffered on the request and written to the given response, which
+        keeps its encoded events, so emitting again only encodes the new event. Emit with
+        `None` to buffer events until `write_events`, which the middleware and view mixins
+        call when finalizing the response.
+
         Eventual header value will look like so:
             X-Up-Events: [{"type": "user:created", "id": 5012 }, { "type": "signup:completed"}]
         """
-        try:
-            events = literal_eval(response['X-Up-Events'])
-        except KeyError:
-            events = []
-
-        data = data or {}
-        data['type'] = event
-        events.append(data)
-        response['X-Up-Events'] = json.dumps(events, default=str)
-
+        self.info.events.add(event, data)
+        if response is not None:
+            self.info.write_events(response)
         return response
 
-    def layer_emit(self, response: HttpResponse, event: str, data: dict = None) -> HttpResponse:
+    def write_events(self, response: HttpResponse) -> HttpResponse:
+        """Serialize the buffered events to the X-Up-Events header of the response.
+        """
+        return self.info.write_events(response)
+
+    def layer_emit(self, response: Optional[HttpResponse], event: str,
+                   data: dict = None) -> Optional[HttpResponse]:
         """The server may also choose to emit the event on the layer being updated.
 
          To do so, add a property { "layer": "current" } to the JSON object of an event:
@@ -159,7 +215,7 @@ class Unpoly:
         way to signal to the server the exact template that should be rendered and
         returned as the response.
         """
-        return self.meta.get('HTTP_X_TEMPLATE_NAME', '')
+        return self.info.template_name()
 
     def template_type(self) -> str:
         """Return the template type that Unpoly or any other XHR request specified.
@@ -167,4 +223,4 @@ class Unpoly:
         Not part of the official Unpoly Server Protocol, but can be useful to as a
         way to signal to the server that a given template type is desired.
         """
-        return self.meta.get('HTTP_X_TEMPLATE_TYPE', '')
+        return self.info.template_type()
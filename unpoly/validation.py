@@ -0,0 +1,102 @@
+import re
+from typing import Iterable, List
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.forms import FileField
+from django.forms.utils import ErrorDict
+
+
+def validated_field_names(form, validate: str) -> List[str]:
+    """Return the names of the form fields named by the X-Up-Validate header.
+
+    Unpoly sends the fields' `name` attributes, which include the form prefix,
+    separated by commas in Unpoly 2 and by spaces in Unpoly 3.
+    """
+    html_names = set(re.split(r'[\s,]+', validate.strip()))
+    return [name for name in form.fields if form.add_prefix(name) in html_names]
+
+
+def field_dependencies(form, names: Iterable[str]) -> List[str]:
+    """Return the names, preceded by the fields they depend on.
+
+    Forms declare dependencies as `validation_dependencies`, such as
+    `{'end_date': ('start_date',)}`, so `clean_end_date()` can read
+    the cleaned `start_date`.
+    """
+    dependencies = getattr(form, 'validation_dependencies', {})
+    resolved = []
+    seen = set()
+
+    def add(name: str) -> None:
+        if name in seen or name not in form.fields:
+            return
+        seen.add(name)
+        for dependency in dependencies.get(name, ()):
+            add(dependency)
+        resolved.append(name)
+
+    for name in names:
+        add(name)
+
+    return resolved
+
+
+def clean_model_field(form, name: str, value) -> None:
+    """Run the validation of the ModelForm's model field, as `instance.full_clean()` would.
+
+    The value is set on the form's instance, as `form.is_valid()` does.
+    """
+    opts = getattr(form, '_meta', None)
+    model = getattr(opts, 'model', None)
+    if model is None:
+        return
+
+    try:
+        model_field = model._meta.get_field(name)
+    except FieldDoesNotExist:
+        return
+    if not model_field.concrete or model_field.many_to_many:
+        return
+
+    model_field.save_form_data(form.instance, value)
+    raw_value = getattr(form.instance, model_field.attname)
+    if model_field.blank and raw_value in model_field.empty_values:
+        return
+    setattr(form.instance, model_field.attname, model_field.clean(raw_value, form.instance))
+
+
+def clean_fields(form, names: Iterable[str]) -> bool:
+    """Clean only the named fields and their dependencies.
+
+    Model field validation runs for the fields of ModelForms, while `form.clean()` and
+    model-wide validation, such as uniqueness checks, are skipped. Errors are added
+    to the form as `full_clean()` would, and the return value is whether the fields are valid.
+    """
+    form._errors = ErrorDict()
+    form.cleaned_data = {}
+
+    for name in field_dependencies(form, names):
+        bound_field = form[name]
+        field = bound_field.field
+        value = bound_field.initial if field.disabled else bound_field.data
+        try:
+            if isinstance(field, FileField):
+                value = field.clean(value, bound_field.initial)
+            else:
+                value = field.clean(value)
+            form.cleaned_data[name] = value
+            if hasattr(form, f'clean_{name}'):
+                form.cleaned_data[name] = getattr(form, f'clean_{name}')()
+            clean_model_field(form, name, form.cleaned_data[name])
+        except ValidationError as e:
+            form.add_error(name, e)
+
+    return not form._errors
+
+
+__all__ = [
+    'clean_fields',
+    'clean_model_field',
+    'field_dependencies',
+    'validated_field_names',
+]
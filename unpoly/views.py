@@ -1,24 +1,103 @@
+import inspect
 import logging
+import weakref
+from datetime import datetime
 from typing import List, Optional, TYPE_CHECKING
 
+from asgiref.sync import iscoroutinefunction, sync_to_async
 from django.conf import settings
 from django.contrib import messages
 from django.core.exceptions import ImproperlyConfigured
-from django.db import DatabaseError
+from django.db import DatabaseError, connections, router, transaction
 from django.http import (
+    Http404,
     HttpResponse,
     HttpResponseRedirect,
+    StreamingHttpResponse,
 )
+from django.middleware.csrf import get_token
 from django.shortcuts import reverse
-from django.template.response import TemplateResponse
-
+from django.template.response import SimpleTemplateResponse, TemplateResponse
+from django.utils.cache import get_conditional_response, quote_etag
+from django.utils.html import escape
+from django.utils.http import http_date, parse_http_date_safe
+from django.utils.translation import get_language
+
+from .cache import CSRF_TOKEN_PLACEHOLDER, digest, fragment_cache, model_tag, validation_cache
+from .client_cache import client_cache
+from .fragments import DOCUMENT_SELECTORS, extract_fragments, normalize_selector, split_selectors
+from .partials import PartialTemplate
+from .renderers import arender_parallel, astream_fragments, render_parallel, stream_fragments
+from .request import get_request_for_url
+from .signals import request_timed
+from .singleflight import single_flight
+from .timing import NO_TIMING, ServerTiming
 from .unpoly import Unpoly
+from .validation import clean_fields, validated_field_names
 
 if TYPE_CHECKING:
     from .typehints import UnpolyHttpRequest
 
 logger = logging.getLogger(__name__)
 
+# Layer modes that views can set a template for, as `unpoly_<mode>_template`
+LAYER_MODES = ('modal', 'drawer', 'popup', 'cover')
+
+# Modules of the `get_object` methods `aget_object` replaces with an async ORM query
+DEFAULT_GET_OBJECT_MODULES = ('django.views.generic.detail', 'vanilla.model_views')
+
+# Every view class using the Unpoly mixins, so their templates can be warmed up
+view_classes = weakref.WeakSet()
+
+
+async def _resolve(response):
+    """Await the response of view hooks that may be sync or async."""
+    if inspect.isawaitable(response):
+        return await response
+    return response
+
+
+def up_context(*selectors: str):
+    """Register a view method as context provider for the Unpoly target selector(s).
+
+    The method is only called when Unpoly targets one of the selectors,
+    or for full page requests. Return a dict to add to the template context.
+
+    @up_context('#sidebar')
+    def sidebar_context(self) -> dict:
+        return {'sidebar_counts': Task.objects.counts()}
+
+    Providers without selectors are called on every request.
+    """
+    def decorator(func):
+        func.up_context_selectors = frozenset(
+            normalize_selector(selector)[0] for selector in selectors
+        )
+        return func
+    return decorator
+
+
+def up_renderer(selector: str):
+    """Register a view method rendering the HTML of the element matching the target selector.
+
+    When every selector Unpoly targets has a renderer, the renderers run
+    concurrently and their output is sent in selector order, instead of
+    rendering the view's template. Renderers may be `async def`, or
+    generators yielding chunks when `stream_unpoly_fragments` is set.
+
+    Renderers running in threads use their own database connections, so they
+    don't see rows the request wrote in a transaction that hasn't committed.
+
+    @up_renderer('#breadcrumb_bar')
+    def breadcrumb_bar(self) -> str:
+        return render_to_string('breadcrumbs.html', {'crumbs': ...}, request=self.request)
+    """
+    def decorator(func):
+        func.up_renderer_selector = normalize_selector(selector)[0]
+        return func
+
+    return decorator
+
 
 class UnpolyViewMixin:
     """
@@ -33,6 +112,32 @@ class UnpolyViewMixin:
     action: str = ''
     _send_optimized_response: bool = False
 
+    # Trim rendered template responses to the elements matching the Unpoly target(s)
+    extract_unpoly_fragments: bool = False
+
+    # Render only the template blocks / {% upfragment %} tags matching the Unpoly target(s)
+    render_unpoly_fragments: bool = False
+    # Map target selectors to template block names: {'#content_panel': 'content'}
+    unpoly_fragment_blocks: dict = {}
+    # Block rendered as the <title> of partial responses, so Unpoly updates the document title
+    unpoly_title_block: str = 'title'
+
+    # Seconds to keep rendered responses in the fragment cache. None disables caching.
+    fragment_cache_timeout: Optional[int] = None
+    # Request details that cached responses vary on, besides path, target, mode and layer.
+    fragment_cache_vary: tuple = ('user',)
+    # Tags or models to invalidate cached responses by.
+    fragment_cache_tags: tuple = ()
+
+    # Seconds concurrent identical GET requests wait for one render to share, or None to render each
+    single_flight_timeout: Optional[float] = None
+    # Also share renders with identical requests in other worker processes, through the cache
+    single_flight_shared: bool = False
+
+    # Cache-Control directives for successful fragment responses, so
+    # shared caches can store them: {'public': True, 'max_age': 60}
+    fragment_cache_control: dict = {}
+
     # Templates to use when returning an optimized response and Unpoly is returning a layer mode
     # https://v2.unpoly.com/layer-terminology
     unpoly_modal_template: str = settings.UNPOLY_MODAL_TEMPLATE
@@ -40,15 +145,417 @@ class UnpolyViewMixin:
     unpoly_popup_template: str = settings.UNPOLY_POPUP_TEMPLATE
     unpoly_cover_template: str = settings.UNPOLY_COVER_TEMPLATE
 
+    # Send pending flash messages of Unpoly responses as `flash:message` events, rather than
+    # rendering them in the messages markup
+    messages_as_events: bool = False
+
+    # Send phase timings of Unpoly requests in the Server-Timing header, and the `request_timed` signal
+    server_timing: bool = getattr(settings, 'UNPOLY_SERVER_TIMING', False)
+
+    # Selectors of the fragments inside a target with its own providers, so their providers
+    # are called too: {'#content_panel': ('#sidebar', '.item_list')}
+    unpoly_nested_targets: dict = {}
+
+    # (method name, selectors) of methods decorated with `up_context`
+    _up_context_providers: tuple = ()
+    # {selector: method name} of methods decorated with `up_renderer`
+    _up_renderers: dict = {}
+    # {layer mode: template name}, resolved once per class
+    _unpoly_layer_templates: dict = {}
+    # Stream the output of `up_renderer` methods as each is ready, instead of buffering the response
+    stream_unpoly_fragments: bool = False
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        providers = {}
+        renderers = {}
+        for klass in reversed(cls.__mro__):
+            for name, attr in vars(klass).items():
+                selectors = getattr(attr, 'up_context_selectors', None)
+                if selectors is not None:
+                    providers[name] = selectors
+                elif name in providers:
+                    del providers[name]
+
+                selector = getattr(attr, 'up_renderer_selector', None)
+                if selector is not None:
+                    renderers[name] = selector
+                elif name in renderers:
+                    del renderers[name]
+        cls._up_context_providers = tuple(providers.items())
+        cls._up_renderers = {selector: name for name, selector in renderers.items()}
+
+        # Templates defined by properties are looked up per request
+        cls._unpoly_layer_templates = {
+            mode: getattr(cls, f'unpoly_{mode}_template', '')
+            for mode in LAYER_MODES
+            if isinstance(getattr(cls, f'unpoly_{mode}_template', ''), str)
+        }
+        view_classes.add(cls)
+        cls.check_access_mixins()
+
+    @classmethod
+    def check_access_mixins(cls) -> None:
+        """Refuse access mixins after the Unpoly mixins, in views returning responses without
+        calling the view's `dispatch`, so permissions can't be skipped.
+
+        Fragment renderers, cached and shared responses are returned by the Unpoly
+        mixins' `dispatch`, so list mixins such as LoginRequiredMixin before them.
+        """
+        if not (cls._up_renderers or cls.fragment_cache_timeout is not None
+                or cls.single_flight_timeout is not None):
+            return
+
+        mro = cls.__mro__
+        unpoly_index = mro.index(UnpolyViewMixin)
+        for klass in mro[unpoly_index + 1:]:
+            if klass.__module__ == 'django.contrib.auth.mixins':
+                raise ImproperlyConfigured(
+                    f'{cls.__name__} must list {klass.__name__} before the Unpoly view mixins, '
+                    f'so its access checks run before fragment renderers and cached responses.'
+                )
+
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self._up: Optional[Unpoly] = None
         self._record_event_data = {}
+        self._server_timing: Optional[ServerTiming] = None
+
+    def dispatch(self, request, *args, **kwargs) -> HttpResponse:
+        if not self.start_server_timing():
+            return self.unpoly_dispatch(request, *args, **kwargs)
+        return self.finish_server_timing(self.unpoly_dispatch(request, *args, **kwargs))
+
+    def unpoly_dispatch(self, request, *args, **kwargs) -> HttpResponse:
+        """Return 304 Not Modified, or the cached response, before building the response.
+        """
+        if request.method not in ('GET', 'HEAD'):
+            return self.write_events(super().dispatch(request, *args, **kwargs))
+
+        validators = self.get_conditional_response_headers(
+            etag=self.get_unpoly_etag(),
+            last_modified=self.get_unpoly_last_modified(),
+        )
+        response = self.get_not_modified_response(validators)
+        if response is not None:
+            return response
+
+        cache_key = self.get_fragment_cache_key()
+        response = self.get_cached_response(cache_key)
+        if response is None:
+            flight_key = self.get_single_flight_key()
+            if flight_key is None:
+                response = self.render_response(cache_key, request, *args, **kwargs)
+            else:
+                response = single_flight.run(
+                    flight_key,
+                    lambda: self.rendered(self.render_response(cache_key, request, *args, **kwargs)),
+                    self.single_flight_timeout,
+                    shared=self.single_flight_shared,
+                    shareable=self.is_shareable_response,
+                )
+
+        return self.finalize_response(response, validators)
+
+    def render_response(self, cache_key: Optional[str], request, *args, **kwargs) -> HttpResponse:
+        """Build the response with the fragment renderers or the view's handler, and cache it.
+        """
+        renderers = self.get_target_renderers()
+        if renderers:
+            response = self.render_targets(renderers)
+        else:
+            response = super().dispatch(request, *args, **kwargs)
+        self.cache_response(response, cache_key)
+        return response
+
+    def rendered(self, response: HttpResponse) -> HttpResponse:
+        """Render a template response now, so it can be shared."""
+        if isinstance(response, SimpleTemplateResponse) and not response.is_rendered:
+            with self.timing('render'):
+                response.render()
+        return response
+
+    def get_single_flight_key(self) -> Optional[str]:
+        """Return the key identical requests share a render by, or None when single-flight is disabled.
+
+        Varies by the view and the fragment cache key parts, including `fragment_cache_vary`.
+        """
+        if self.single_flight_timeout is None or self.request.method != 'GET':
+            return None
+
+        view = self.__class__
+        return digest(repr((f'{view.__module__}.{view.__qualname__}', *self.get_fragment_cache_key_parts())))
+
+    def is_shareable_response(self, response: HttpResponse) -> bool:
+        """Can the rendered response be sent to identical requests waiting for it?
+
+        Responses that displayed this request's flash messages, or used its CSRF token,
+        aren't shared. The CSRF cookie is only set later, by CsrfViewMiddleware.
+
+        Waiting requests are sent the response without calling the view's handler,
+        so checks in `get()`, `get_queryset()` or `get_object()` don't run for them.
+        """
+        if self.request.META.get('CSRF_COOKIE_NEEDS_UPDATE'):
+            return False
+        return not getattr(getattr(self.request, '_messages', None), 'used', False)
+
+    def get_not_modified_response(self, validators: dict) -> Optional[HttpResponse]:
+        """Return 304 Not Modified when the validators match the request's conditional headers.
+        """
+        if not validators:
+            return None
+
+        validated = HttpResponse(headers=validators)
+        response = get_conditional_response(
+            self.request,
+            etag=validators.get('ETag'),
+            last_modified=parse_http_date_safe(validators.get('Last-Modified')),
+            response=validated,
+        )
+        if response is validated:
+            return None
+
+        return response
+
+    def finalize_response(self, response: HttpResponse, validators: dict) -> HttpResponse:
+        """Set the validators on successful responses, and write the emitted events.
+
+        The `fragment_cache_control` directives of successful Unpoly responses are
+        set by the middleware, once the response is complete and known to have no cookies.
+        """
+        if 200 <= response.status_code < 300:
+            for header, value in validators.items():
+                response.setdefault(header, value)
+
+        if self.fragment_cache_control and response.status_code == 200 and self.up.is_unpoly():
+            response.unpoly_cache_control = self.fragment_cache_control
+
+        return self.write_events(response)
+
+    def write_events(self, response: HttpResponse) -> HttpResponse:
+        with self.timing('events'):
+            if self.messages_as_events and response.status_code < 300 and self.up.is_unpoly():
+                self.emit_messages(response)
+            return self.up.write_events(response)
+
+    def emit_messages(self, response: HttpResponse) -> None:
+        """Emit each pending flash message as a `flash:message` event, removing it from storage.
+
+            X-Up-Events: [{"type": "flash:message", "message": "Saved", "level": "success", "tags": "safe success"}]
+        """
+        storage = getattr(self.request, '_messages', None)
+        # Iterating marks the storage as used, which clears its cookie and skips the fragment cache
+        if storage is None or not len(storage):
+            return
+
+        for message in storage:
+            self.up.emit(None, 'flash:message', {
+                'message': str(message.message),
+                'level': message.level_tag,
+                'tags': message.tags,
+            })
+
+    def timing(self, phase: str):
+        """Return context manager timing a phase of the request, when Server-Timing is enabled.
+        """
+        if self._server_timing is None:
+            return NO_TIMING
+        return self._server_timing.phase(phase)
+
+    def start_server_timing(self) -> bool:
+        """Start timing Unpoly requests when `server_timing` is enabled.
+        """
+        if not self.server_timing:
+            return False
+
+        timing = ServerTiming()
+        with timing.phase('headers'):
+            if not self.up.is_unpoly():
+                return False
+            self.up.mode()
+            self.up.target()
+
+        self._server_timing = timing
+        return True
+
+    def get_server_timing_tags(self) -> dict:
+        return {
+            'mode': self.up.mode(),
+            'target': self.get_fragment_target(),
+            'validating': self.up.is_validating(),
+        }
+
+    def finish_server_timing(self, response: HttpResponse) -> HttpResponse:
+        """Set the Server-Timing header and send `request_timed`, once the response is rendered.
+
+        The `render` phase is timed from the view returning a template
+        response until it's rendered, excluding fragment extraction.
+        """
+        timing = self._server_timing
+
+        def finish(response: HttpResponse) -> None:
+            if timing.stop('render'):
+                timing.phases['render'] -= timing.phases.get('extract', 0.0)
+            timings = timing.write(response)
+            request_timed.send(
+                sender=self.__class__,
+                view=self,
+                request=self.request,
+                timings=timings,
+                tags=self.get_server_timing_tags(),
+            )
+
+        if isinstance(response, SimpleTemplateResponse) and not response.is_rendered:
+            timing.start('render')
+            response.add_post_render_callback(finish)
+        else:
+            finish(response)
+
+        return response
+
+    def get_fragment_cache_key(self) -> Optional[str]:
+        """Return the fragment cache key of the response, or None when caching is disabled.
+        """
+        if self.fragment_cache_timeout is None:
+            return None
+        return fragment_cache.make_key(self.get_fragment_cache_key_parts(), self.get_fragment_cache_tags())
+
+    def get_cached_response(self, cache_key: Optional[str]) -> Optional[HttpResponse]:
+        if not cache_key:
+            return None
+        response = fragment_cache.get(cache_key)
+        if response is not None:
+            self.fill_csrf_token(response)
+        return response
+
+    def cache_response(self, response: HttpResponse, cache_key: Optional[str]) -> None:
+        """Store the response in the fragment cache once it's rendered.
+
+        Templates are rendered with a placeholder CSRF token, so the cached HTML holds
+        no token, and the placeholder is replaced with the token of each request.
+        Responses that used the request's CSRF token otherwise aren't cached.
+        """
+        if not cache_key or self.request.method != 'GET':
+            return
+
+        def cache_rendered_response(response: HttpResponse) -> HttpResponse:
+            # Don't replay flash messages that were displayed in this response
+            if not (getattr(getattr(self.request, '_messages', None), 'used', False)
+                    or self.request.META.get('CSRF_COOKIE_NEEDS_UPDATE')):
+                fragment_cache.set(cache_key, response, self.fragment_cache_timeout)
+            return self.fill_csrf_token(response)
+
+        if isinstance(response, SimpleTemplateResponse):
+            if response.context_data is not None:
+                response.context_data['csrf_token'] = CSRF_TOKEN_PLACEHOLDER
+            response.add_post_render_callback(cache_rendered_response)
+        else:
+            cache_rendered_response(response)
+
+    def fill_csrf_token(self, response: HttpResponse) -> HttpResponse:
+        """Replace the CSRF token placeholder of cached HTML with the token of the request."""
+        placeholder = CSRF_TOKEN_PLACEHOLDER.encode()
+        if not response.streaming and placeholder in response.content:
+            token = escape(get_token(self.request)).encode()
+            response.content = response.content.replace(placeholder, token)
+        return response
+
+    def get_fragment_cache_key_parts(self) -> list:
+        """Return the request details that the cached response varies on.
+
+        The path, query string, Unpoly target, mode and layer, and the X-Template-Name
+        and X-Template-Type headers, are always included,
+        along with each of the `fragment_cache_vary` values:
+
+            - user: The user's primary key.
+            - permissions: The user's permissions.
+            - session: The session key.
+            - language: The active language.
+            - HTTP_*: The value of a request header.
+
+        Override on subclasses to customize.
+        """
+        request = self.request
+        parts = [
+            request.path,
+            request.META.get('QUERY_STRING', ''),
+            self.up.is_unpoly(),
+            self.up.target(),
+            self.up.mode(),
+            self.up.layer(),
+            # Select the template in `get_template_names`
+            self.up.template_name(),
+            self.up.template_type(),
+        ]
+
+        for vary in self.fragment_cache_vary:
+            if vary == 'user':
+                parts.append(getattr(getattr(request, 'user', None), 'pk', None))
+            elif vary == 'permissions':
+                user = getattr(request, 'user', None)
+                parts.append(sorted(user.get_all_permissions()) if user else None)
+            elif vary == 'session':
+                parts.append(getattr(getattr(request, 'session', None), 'session_key', None))
+            elif vary == 'language':
+                parts.append(get_language())
+            else:
+                parts.append(request.META.get(vary))
+
+        return parts
+
+    def get_fragment_cache_tags(self) -> List[str]:
+        """Return the tags to invalidate cached responses of this view by.
+
+        Includes the `fragment_cache_tags` and the model of the view.
+        """
+        tags = [
+            tag if isinstance(tag, str) else model_tag(tag)
+            for tag in self.fragment_cache_tags
+        ]
+        model = getattr(self, 'model', None)
+        if model is not None:
+            tags.append(model_tag(model))
+
+        return tags
+
+    def get_unpoly_etag(self) -> Optional[str]:
+        """Return a cheaply computed version of the resource, such as a hash of its update timestamp.
+
+        Called before the context is built or the template is rendered. The ETag
+        sent to the browser is varied by the Unpoly target, mode and layer.
+
+        Override on subclasses to enable conditional GET requests.
+        """
+        return None
+
+    def get_unpoly_last_modified(self) -> Optional[datetime]:
+        """Return when the resource was last modified.
+
+        Called before the context is built or the template is rendered.
+
+        Override on subclasses to enable conditional GET requests.
+        """
+        return None
+
+    def get_conditional_response_headers(self, etag: Optional[str] = None,
+                                         last_modified: Optional[datetime] = None) -> dict:
+        """Return the ETag and Last-Modified validators for this request.
+        """
+        validators = {}
+
+        if etag is not None:
+            variant = '|'.join((etag.strip('"'), self.up.target(), self.up.mode(), self.up.layer()))
+            validators['ETag'] = quote_etag(digest(variant))
+
+        if last_modified is not None:
+            validators['Last-Modified'] = http_date(last_modified.timestamp())
+
+        return validators
 
     @property
     def up(self) -> Unpoly:
         if not self._up:
-            self._up = Unpoly(meta=self.request.META, query_params=self.request.GET)
+            self._up = Unpoly.from_request(self.request)
         return self._up
 
     def up_mode(self) -> str:
@@ -74,12 +581,131 @@ class UnpolyViewMixin:
             if up_mode == 'root':
                 return super().get_template_names()
 
-            template_name = getattr(self, f'unpoly_{up_mode}_template', '')
+            # Templates passed to `as_view()` are set on the instance
+            attr = f'unpoly_{up_mode}_template'
+            template_name = self.__dict__.get(attr)
+            if template_name is None:
+                try:
+                    template_name = self._unpoly_layer_templates[up_mode]
+                except KeyError:
+                    template_name = getattr(self, attr, '')
             if template_name:
                 return [template_name]
 
         return super().get_template_names()
 
+    def get_fragment_target(self, response: HttpResponse = None) -> str:
+        """Return the selector(s) that Unpoly expects to find in the response.
+
+        Override on subclasses to customize.
+        """
+        if response is not None and response.status_code >= 400:
+            return self.up.fail_target()
+        return self.up.target()
+
+    def get_up_context_data(self) -> dict:
+        """Call the `up_context` providers whose selectors Unpoly targeted.
+
+        All providers are called when the request isn't from Unpoly, when the target
+        is the entire document or `:main`, or when any targeted selector has no provider.
+        Targets containing fragments of other providers are listed in `unpoly_nested_targets`.
+        """
+        if not self._up_context_providers:
+            return {}
+
+        targets = None
+        if self.up.is_unpoly():
+            targets = {
+                normalize_selector(selector)[0]
+                for selector in split_selectors(self.get_fragment_target())
+            }
+            for target in list(targets):
+                targets.update(self.unpoly_nested_targets.get(target, ()))
+
+            known = {selector for name, selectors in self._up_context_providers for selector in selectors}
+            # The document, `:main`, or a target no provider is registered for, may contain any fragment
+            if not targets.isdisjoint(DOCUMENT_SELECTORS) or not targets.issubset(known):
+                targets = None
+
+        context = {}
+        for name, selectors in self._up_context_providers:
+            if targets is None or not selectors or not targets.isdisjoint(selectors):
+                context.update(getattr(self, name)())
+
+        return context
+
+    def get_target_renderers(self) -> list:
+        """Return the `up_renderer` methods for each targeted selector, in selector order.
+
+        Returns an empty list unless every required target selector has a renderer.
+        Optional (`:maybe`) selectors without a renderer are left out of the response.
+        """
+        if not self._up_renderers or not self.up.is_unpoly():
+            return []
+
+        renderers = []
+        for selector in split_selectors(self.get_fragment_target()):
+            bare, optional = normalize_selector(selector)
+            name = self._up_renderers.get(bare)
+            if name is not None:
+                renderers.append(getattr(self, name))
+            elif not optional:
+                return []
+
+        return renderers
+
+    def render_targets(self, renderers: list) -> HttpResponse:
+        """Call the renderers concurrently in a bounded thread pool, and join their output.
+
+        With `stream_unpoly_fragments`, each fragment is sent as soon as it's rendered.
+        """
+        if self.stream_unpoly_fragments:
+            return StreamingHttpResponse(stream_fragments(renderers))
+
+        with self.timing('render'):
+            return HttpResponse('\n'.join(render_parallel(renderers)))
+
+    def get_context_data(self, **kwargs) -> dict:
+        with self.timing('context'):
+            return super().get_context_data(**{**self.get_up_context_data(), **kwargs})
+
+    def get_object(self, *args, **kwargs):
+        with self.timing('object'):
+            return super().get_object(*args, **kwargs)
+
+    def render_to_response(self, context, **response_kwargs) -> TemplateResponse:
+        response = super().render_to_response(context, **response_kwargs)
+        if not self.up.is_unpoly():
+            return response
+
+        if self.render_unpoly_fragments:
+            response.template_name = PartialTemplate(
+                response.template_name,
+                target=self.get_fragment_target(response),
+                blocks=self.unpoly_fragment_blocks,
+                using=response.using,
+                title_block=self.unpoly_title_block,
+            )
+        if self.extract_unpoly_fragments:
+            response.add_post_render_callback(self.extract_fragments)
+
+        return response
+
+    def extract_fragments(self, response: TemplateResponse) -> None:
+        """Replace rendered content with only the elements Unpoly will swap.
+
+        Elements marked `up-hungry` are always included. The full
+        response is sent when no elements match the target selectors.
+        """
+        if not response.get('Content-Type', '').startswith('text/html'):
+            return
+
+        with self.timing('extract'):
+            html = response.content.decode(response.charset)
+            fragments = extract_fragments(html, self.get_fragment_target(response))
+            if fragments is not None:
+                response.content = fragments
+
     def send_optimized_response(self) -> bool:
         """Should the server send an optimized HTML response?
 
@@ -140,6 +766,162 @@ class UnpolyViewMixin:
         raise NotImplementedError('Specify this method on each view')
 
 
+class AsyncUnpolyViewMixin(UnpolyViewMixin):
+    """Async counterpart of UnpolyViewMixin, for views with `async def` handlers.
+
+    The `get` handler supports views displaying a template or single object,
+    such as TemplateView and DetailView. Override `get` for list views.
+
+    Override `aget_unpoly_etag` and `aget_unpoly_last_modified` to query
+    conditional request validators with the async ORM.
+    """
+
+    # Whether GET and POST handlers look up `self.object` with `get_object`, or None
+    # for views with `get_object` except create views.
+    object_lookup: Optional[bool] = None
+
+    async def dispatch(self, request, *args, **kwargs) -> HttpResponse:
+        if not self.start_server_timing():
+            return await self.unpoly_dispatch(request, *args, **kwargs)
+        return self.finish_server_timing(await self.unpoly_dispatch(request, *args, **kwargs))
+
+    async def unpoly_dispatch(self, request, *args, **kwargs) -> HttpResponse:
+        view_dispatch = super(UnpolyViewMixin, self).dispatch
+        if request.method not in ('GET', 'HEAD'):
+            return self.write_events(await view_dispatch(request, *args, **kwargs))
+
+        validators = self.get_conditional_response_headers(
+            etag=await self.aget_unpoly_etag(),
+            last_modified=await self.aget_unpoly_last_modified(),
+        )
+        response = self.get_not_modified_response(validators)
+        if response is not None:
+            return response
+
+        response = cache_key = None
+        if self.fragment_cache_timeout is not None:
+            cache_key = await sync_to_async(self.get_fragment_cache_key)()
+            response = await sync_to_async(self.get_cached_response)(cache_key)
+
+        if response is None:
+            # The key may vary by the lazily loaded user, which queries the database
+            flight_key = await sync_to_async(self.get_single_flight_key)()
+            if flight_key is None:
+                response = await self.arender_response(cache_key, request, *args, **kwargs)
+            else:
+                async def render():
+                    response = await self.arender_response(cache_key, request, *args, **kwargs)
+                    return await sync_to_async(self.rendered)(response)
+
+                response = await single_flight.arun(
+                    flight_key,
+                    render,
+                    self.single_flight_timeout,
+                    shared=self.single_flight_shared,
+                    shareable=self.is_shareable_response,
+                )
+
+        return self.finalize_response(response, validators)
+
+    async def arender_response(self, cache_key: Optional[str], request, *args, **kwargs) -> HttpResponse:
+        renderers = self.get_target_renderers()
+        if renderers:
+            response = await self.arender_targets(renderers)
+        else:
+            response = await super(UnpolyViewMixin, self).dispatch(request, *args, **kwargs)
+        self.cache_response(response, cache_key)
+        return response
+
+    async def arender_targets(self, renderers: list) -> HttpResponse:
+        """Await the renderers concurrently, and join their output.
+        """
+        if self.stream_unpoly_fragments:
+            return StreamingHttpResponse(astream_fragments(renderers))
+
+        with self.timing('render'):
+            return HttpResponse('\n'.join(await arender_parallel(renderers)))
+
+    async def aget_unpoly_etag(self) -> Optional[str]:
+        return self.get_unpoly_etag()
+
+    async def aget_unpoly_last_modified(self) -> Optional[datetime]:
+        return self.get_unpoly_last_modified()
+
+    def looks_up_object(self) -> bool:
+        """Whether `get_object` is called to set `self.object`.
+
+        Views without `get_object`, and create views, have no object.
+        """
+        if self.object_lookup is not None:
+            return self.object_lookup
+        return self._get_object_module() is not None and not any(
+            cls.__name__ == 'CreateView' for cls in type(self).__mro__
+        )
+
+    @classmethod
+    def _get_object_module(cls) -> Optional[str]:
+        """Return the module of the view's `get_object`, other than the Unpoly mixins' wrapper."""
+        for klass in cls.__mro__:
+            if 'get_object' in vars(klass) and klass.__module__ != __name__:
+                return klass.__module__
+        return None
+
+    async def aget_object(self):
+        """Return the object the view is displaying, or None for views without an object.
+
+        The object is queried with the async ORM when the view uses the `get_object`
+        of Django or Vanilla views, and overridden `get_object` methods run in a thread.
+        """
+        if not self.looks_up_object():
+            return None
+        if self._get_object_module() not in DEFAULT_GET_OBJECT_MODULES:
+            return await sync_to_async(self.get_object)()
+
+        queryset = self.get_queryset()
+        pk_url_kwarg = getattr(self, 'pk_url_kwarg', None)
+        if pk_url_kwarg is None:
+            # Vanilla views look up the object by `lookup_field`
+            lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+            try:
+                lookup = {self.lookup_field: self.kwargs[lookup_url_kwarg]}
+            except KeyError:
+                raise ImproperlyConfigured(
+                    f"Lookup field '{lookup_url_kwarg}' was not provided in view kwargs to "
+                    f"'{self.__class__.__name__}'"
+                )
+        else:
+            pk = self.kwargs.get(pk_url_kwarg)
+            slug = self.kwargs.get(self.slug_url_kwarg)
+            if pk is None and slug is None:
+                raise AttributeError(
+                    f'Generic detail view {self.__class__.__name__} must be called with either '
+                    f'an object pk or a slug in the URLconf.'
+                )
+            lookup = {}
+            if pk is not None:
+                lookup['pk'] = pk
+            if slug is not None and (pk is None or self.query_pk_and_slug):
+                lookup[self.get_slug_field()] = slug
+
+        try:
+            with self.timing('object'):
+                return await queryset.aget(**lookup)
+        except queryset.model.DoesNotExist:
+            raise Http404(f'No {queryset.model._meta.verbose_name} found matching the query')
+
+    async def aget_context_data(self, **kwargs) -> dict:
+        """Build the context in a thread, as context providers may query the database.
+        """
+        return await sync_to_async(self.get_context_data)(**kwargs)
+
+    async def get(self, request, *args, **kwargs) -> HttpResponse:
+        self.object = await self.aget_object()
+        if self.send_optimized_response():
+            return await _resolve(self.optimized_response())
+        # URL kwargs are passed to the context, as TemplateView does
+        return self.render_to_response(await self.aget_context_data(**kwargs))
+
+
 class UnpolyFormViewMixin(UnpolyViewMixin):
     """
     Mixin class for views such as CreateView / UpdateView.
@@ -151,6 +933,20 @@ class UnpolyFormViewMixin(UnpolyViewMixin):
     enable_messages_framework: bool = True
     success_message: str = ''
 
+    # Invalidate the fragment cache for the saved object's model when the form is saved
+    fragment_cache_invalidation: bool = False
+
+    # Template rendering only the fields named by X-Up-Validate, from the `fields` context
+    # variable. When set, up-validate requests clean just those fields and their dependencies.
+    unpoly_validate_template: str = ''
+    # Fields whose validation needs the saved object, `form.clean()` or uniqueness checks
+    unpoly_full_validation_fields: tuple = ()
+    # Seconds to cache up-validate responses for identical submissions, or None to disable
+    validation_cache_timeout: Optional[int] = None
+
+    # Render the success URL in-process for Unpoly requests, instead of redirecting to it
+    inline_success_response: bool = False
+
     def form_valid(self, form):
         """When form is saved, handle various situations that might occur.
 
@@ -161,25 +957,108 @@ class UnpolyFormViewMixin(UnpolyViewMixin):
               so the underlying select field on the Parent layer can be updated.
         """
         try:
-            self.object = form.save()
+            self.object = self.save_form(form)
         except DatabaseError as e:
             logger.exception(e)
             return self.handle_integrity_error_response()
 
+        if self.fragment_cache_invalidation:
+            self.invalidate_fragment_cache()
+
         launched_from_select_field = self.request.GET.get('parent_select_field_id', '')
         if self.up.is_unpoly() and launched_from_select_field:
             return self.send_accept_layer(form, launched_from_select_field)
 
-        msg = self.get_success_message(form.cleaned_data)
-        if msg:
-            messages.success(self.request, msg, extra_tags='safe')
+        self.add_success_message(form)
 
         if self.send_optimized_success_response():
             response = self.optimized_success_response()
-            self.up.emit(response, 'record:crud', self.record_event_data())
-            return response
+            self.emit_record_event(response)
+            return self.set_client_cache_headers(response)
+
+        success_url = self.get_success_url()
+        if self.send_inline_success_response():
+            response = self.inline_success_response_for(success_url)
+            if response is not None:
+                return response
 
-        return HttpResponseRedirect(self.get_success_url())
+        return HttpResponseRedirect(success_url)
+
+    def save_form(self, form):
+        """Save the form once, in a transaction when it's a ModelForm.
+        """
+        instance = getattr(form, 'instance', None)
+        if instance is None:
+            return form.save()
+
+        with transaction.atomic(using=router.db_for_write(instance.__class__, instance=instance)):
+            return form.save()
+
+    def emit_record_event(self, response: HttpResponse) -> None:
+        """Emit the `record:crud` event once the saved object is committed.
+
+        The event is written to the response when the transaction commits, which
+        with `ATOMIC_REQUESTS` is after the view returns, before the middleware runs.
+        """
+        data = self.record_event_data()
+        transaction.on_commit(
+            lambda: self.up.emit(response, 'record:crud', data),
+            using=self.get_record_db(),
+        )
+
+    def get_record_db(self) -> Optional[str]:
+        """Database alias the saved object was written to.
+        """
+        return getattr(getattr(self.object, '_state', None), 'db', None)
+
+    def send_inline_success_response(self) -> bool:
+        """Should the success URL be rendered in-process, rather than redirected to?
+
+        Override on subclasses to customize.
+        """
+        return self.inline_success_response and self.up.is_unpoly()
+
+    def get_inline_success_request(self, success_url: str):
+        """Return the GET request and view of the success URL, or None to redirect instead.
+        """
+        return get_request_for_url(self.request, success_url)
+
+    def inline_response(self, response: HttpResponse, success_url: str) -> Optional[HttpResponse]:
+        """Tell Unpoly the response is for the success URL, or return None when it wasn't successful.
+        """
+        if response.status_code != 200:
+            return None
+
+        self.emit_record_event(response)
+        response['X-Up-Location'] = success_url
+        response['X-Up-Method'] = 'GET'
+        return self.set_client_cache_headers(response)
+
+    def inline_success_response_for(self, success_url: str) -> Optional[HttpResponse]:
+        """Dispatch the view of the success URL as a GET, with the same Unpoly headers.
+
+        Saves the browser following a redirect. Returns None when the
+        URL can't be dispatched, or doesn't return a successful response.
+        """
+        resolved = self.get_inline_success_request(success_url)
+        if resolved is None:
+            return None
+
+        request, match = resolved
+        response = match.func(request, *match.args, **match.kwargs)
+        return self.inline_response(response, success_url)
+
+    def invalidate_fragment_cache(self, *tags) -> None:
+        """Expire cached responses for the saved object's model, the view's cache tags and `tags`.
+        """
+        tags = [*self.get_fragment_cache_tags(), *tags]
+        if getattr(self, 'object', None) is not None:
+            tags.append(model_tag(self.object))
+        fragment_cache.invalidate(*tags)
+
+    def get_form(self, *args, **kwargs):
+        with self.timing('form'):
+            return super().get_form(*args, **kwargs)
 
     def up_mode(self) -> str:
         if getattr(self, 'invalid_form_submission', False):
@@ -194,12 +1073,23 @@ class UnpolyFormViewMixin(UnpolyViewMixin):
         self.invalid_form_submission = True
         return super().form_invalid(form)
 
+    def get_fragment_target(self, response: HttpResponse = None) -> str:
+        if getattr(self, 'invalid_form_submission', False):
+            return self.up.fail_target()
+        return super().get_fragment_target(response)
+
     def send_accept_layer(self, form, select_field_id) -> HttpResponse:
         """
         When Unpoly has opened multiple overlays and the form is saved successfully, then
         send the JSON details to enable updating the Select Field on the parent layer.
+
+        The form has already been saved by `form_valid`, so the payload is built from `self.object`.
+        """
+        return self.accept_layer_response(select_field_id)
+
+    def accept_layer_response(self, select_field_id) -> HttpResponse:
+        """Return response accepting the layer, with the saved object details.
         """
-        self.object = form.save()
         resp = HttpResponse(b'', status=200)
         data = {
             'id': self.object.id,
@@ -208,7 +1098,14 @@ class UnpolyFormViewMixin(UnpolyViewMixin):
         }
         self.up.accept_layer(resp, data)
 
-        return resp
+        return self.set_client_cache_headers(resp)
+
+    def set_client_cache_headers(self, response: HttpResponse) -> HttpResponse:
+        """Expire / evict the client cache entries registered for the saved object's model.
+
+        Override on subclasses to customize.
+        """
+        return client_cache.set_headers(response, getattr(self, 'object', None))
 
     def send_optimized_success_response(self) -> bool:
         """Should server send optimized HTML response after form is saved?
@@ -244,11 +1141,17 @@ class UnpolyFormViewMixin(UnpolyViewMixin):
         """
         raise NotImplementedError('Specify this method on each view')
 
+    def add_success_message(self, form) -> None:
+        msg = self.get_success_message(form.cleaned_data)
+        if msg:
+            messages.success(self.request, msg, extra_tags='safe')
+
     def get_success_message(self, cleaned_data: dict) -> str:
         """Add success message to response if desired.
 
         When returning Unpoly optimized response, the template must include the `messages`
-        markup or the `messages` markup should have the `up_hungry` html attribute set.
+        markup or the `messages` markup should have the `up_hungry` html attribute set,
+        unless `messages_as_events` sends them as `flash:message` events.
         """
         if not self.enable_messages_framework:
             return ''
@@ -259,9 +1162,105 @@ class UnpolyFormViewMixin(UnpolyViewMixin):
             logger.exception(e)
             return ''
 
+    def get_validation_field_names(self, form) -> List[str]:
+        """Return the fields to validate on their own, or an empty list to validate the whole form.
+        """
+        if not self.unpoly_validate_template:
+            return []
+
+        names = validated_field_names(form, self.up.validate())
+        if set(names) & set(self.unpoly_full_validation_fields):
+            return []
+
+        return names
+
+    def field_validation_response(self, form, names: List[str]) -> TemplateResponse:
+        """Render only the validated fields, with their errors.
+        """
+        self.invalid_form_submission = True
+        return TemplateResponse(
+            request=self.request,
+            template=self.unpoly_validate_template,
+            context={
+                'view': self,
+                'form': form,
+                'fields': [form[name] for name in names],
+            },
+        )
+
+    def get_validation_cache_key(self) -> Optional[str]:
+        """Return the validation cache key of the submission, or None when caching is disabled.
+
+        The key varies by view, URL, validated field, Unpoly targets, session, user,
+        and a hash of the POST data and uploaded file metadata. Requests without a
+        session key aren't cached, as they can't be told apart.
+        """
+        if self.validation_cache_timeout is None:
+            return None
+
+        request = self.request
+        session_key = getattr(getattr(request, 'session', None), 'session_key', None)
+        if session_key is None:
+            return None
+
+        data = [
+            (name, values)
+            for name, values in sorted(request.POST.lists())
+            if name != 'csrfmiddlewaretoken'
+        ]
+        files = [
+            (name, [(f.name, f.size, f.content_type) for f in uploads])
+            for name, uploads in sorted(request.FILES.lists())
+        ]
+        view = self.__class__
+        return validation_cache.make_key((
+            f'{view.__module__}.{view.__qualname__}',
+            request.get_full_path(),
+            self.up.validate(),
+            self.up.target(),
+            self.up.fail_target(),
+            # Login and logout change the session key
+            session_key,
+            getattr(getattr(request, 'user', None), 'pk', None),
+            digest(repr((data, files))),
+        ))
+
+    def get_cached_validation_response(self, cache_key: Optional[str]) -> Optional[HttpResponse]:
+        if not cache_key:
+            return None
+        response = validation_cache.get(cache_key)
+        if response is not None:
+            self.fill_csrf_token(response)
+        return response
+
+    def cache_validation_response(self, response: HttpResponse, cache_key: Optional[str]) -> None:
+        """Store the validation response once it's rendered.
+
+        Templates are rendered with a placeholder CSRF token, so the cached HTML holds
+        no token, and the placeholder is replaced with the token of each request.
+        Responses that used the request's CSRF token otherwise aren't cached.
+        """
+        if not cache_key:
+            return
+
+        def cache_rendered_response(response: HttpResponse) -> HttpResponse:
+            if not self.request.META.get('CSRF_COOKIE_NEEDS_UPDATE'):
+                validation_cache.set(cache_key, response, self.validation_cache_timeout)
+            return self.fill_csrf_token(response)
+
+        if isinstance(response, SimpleTemplateResponse):
+            if response.context_data is not None:
+                response.context_data['csrf_token'] = CSRF_TOKEN_PLACEHOLDER
+            response.add_post_render_callback(cache_rendered_response)
+        else:
+            cache_rendered_response(response)
+
     def perform_unpoly_validation(self, request):
         """
         Unpoly form validation calls form validation but should not save form.
+
+        With `unpoly_validate_template` set, only the named fields are cleaned
+        and rendered.
         """
         try:
             instance = self.get_object()
@@ -271,10 +1270,18 @@ class UnpolyFormViewMixin(UnpolyViewMixin):
         form = self.get_form(
             data=request.POST,
             files=request.FILES,
-            instance=instance,
             up_validate=True,
+            **({'instance': instance} if instance is not None else {}),
         )
-        form.is_valid()
+        if self.unpoly_validate_template:
+            names = self.get_validation_field_names(form)
+            if names:
+                with self.timing('validation'):
+                    clean_fields(form, names)
+                return self.field_validation_response(form, names)
+
+        with self.timing('validation'):
+            form.is_valid()
         return self.form_invalid(form)
 
     def handle_integrity_error_response(self):
@@ -325,11 +1332,331 @@ class UnpolyFormViewMixin(UnpolyViewMixin):
         """Perform Unpoly form validation and return if Unpoly is in form validation mode.
         """
         if self.up.is_validating():
-            return self.perform_unpoly_validation(request=request)
+            cache_key = self.get_validation_cache_key()
+            response = self.get_cached_validation_response(cache_key)
+            if response is None:
+                response = self.perform_unpoly_validation(request=request)
+                self.cache_validation_response(response, cache_key)
+            return response
 
         return super().post(request, *args, **kwargs)
 
 
+class UnpolyFormSetViewMixin(UnpolyFormViewMixin):
+    """
+    Mixin class for views saving a model formset, such as grid editing screens.
+
+    Rows are written with `bulk_create` / `bulk_update` in one transaction, and one
+    `record:crud` event lists the ids of every created, updated and deleted row.
+    The optimized success response should render every row in `self.objects`.
+    """
+    action: str = 'bulk'
+
+    # Model fields written by `bulk_update`. Empty to write the fields changed in any row.
+    bulk_update_fields: tuple = ()
+    # Rows written per query by `bulk_create` / `bulk_update`, or None for as many as the database allows
+    bulk_batch_size: Optional[int] = None
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.object = None
+        self.objects: list = []
+        self.created_objects: list = []
+        self.updated_objects: list = []
+        self.deleted_objects: list = []
+        self._formset_model = None
+        self._formset_db: Optional[str] = None
+        self.is_vanilla_view = not hasattr(super(), 'get_form_kwargs')
+
+    def get_formset_queryset(self):
+        """Rows to edit, or None for every object of the formset's model.
+
+        Override on subclasses to customize.
+        """
+        return None
+
+    def get_form_kwargs(self) -> dict:
+        kwargs = super().get_form_kwargs()
+        kwargs.pop('instance', None)
+        queryset = self.get_formset_queryset()
+        if queryset is not None:
+            kwargs['queryset'] = queryset
+        return kwargs
+
+    def get_form(self, *args, **kwargs):
+        if self.is_vanilla_view:
+            queryset = self.get_formset_queryset()
+            if queryset is not None:
+                kwargs.setdefault('queryset', queryset)
+        return super().get_form(*args, **kwargs)
+
+    def form_valid(self, formset):
+        """Save every row of the formset, and return one response for all of them.
+        """
+        try:
+            self.objects = self.save_formset(formset)
+        except DatabaseError as e:
+            logger.exception(e)
+            return self.handle_integrity_error_response()
+
+        if self.fragment_cache_invalidation:
+            self.invalidate_fragment_cache()
+
+        self.add_success_message(formset)
+
+        if self.send_optimized_success_response():
+            response = self.optimized_success_response()
+            self.emit_record_event(response)
+            return self.set_client_cache_headers(response)
+
+        success_url = self.get_success_url()
+        if self.send_inline_success_response():
+            response = self.inline_success_response_for(success_url)
+            if response is not None:
+                return response
+
+        return HttpResponseRedirect(success_url)
+
+    def save_formset(self, formset) -> list:
+        """Write the new, changed and deleted rows in one transaction, and return the saved rows.
+
+        On databases that can't return the primary keys of bulk inserts, such as MySQL,
+        new rows without a primary key are saved one at a time, so they get their keys.
+        """
+        model = formset.model
+        manager = model._default_manager
+        db = router.db_for_write(model)
+
+        with transaction.atomic(using=db):
+            formset.save(commit=False)
+            created = list(formset.new_objects)
+            updated = [obj for obj, changed in formset.changed_objects]
+            deleted = list(formset.deleted_objects)
+
+            with self.timing('bulk'):
+                if created:
+                    if (connections[db].features.can_return_rows_from_bulk_insert
+                            or all(obj.pk is not None for obj in created)):
+                        manager.db_manager(db).bulk_create(created, batch_size=self.bulk_batch_size)
+                    else:
+                        for obj in created:
+                            obj.save(using=db)
+                # Rows whose changes are all many-to-many are only written by save_m2m()
+                update_fields = self.get_bulk_update_fields(formset) if updated else []
+                if update_fields:
+                    manager.db_manager(db).bulk_update(updated, update_fields, batch_size=self.bulk_batch_size)
+                if deleted:
+                    manager.db_manager(db).filter(pk__in=[obj.pk for obj in deleted]).delete()
+                formset.save_m2m()
+
+        self._formset_model = model
+        self._formset_db = db
+        self.created_objects = created
+        self.updated_objects = updated
+        self.deleted_objects = deleted
+
+        return created + updated
+
+    def get_bulk_update_fields(self, formset) -> List[str]:
+        """Return the model fields to write for changed rows.
+        """
+        if self.bulk_update_fields:
+            return list(self.bulk_update_fields)
+
+        concrete = {field.name for field in formset.model._meta.concrete_fields if not field.primary_key}
+        changed = set()
+        for obj, names in formset.changed_objects:
+            changed.update(names)
+
+        return sorted(changed & concrete)
+
+    def get_record_db(self) -> Optional[str]:
+        return self._formset_db
+
+    def record_event_data(self, **kwargs) -> dict:
+        """Data that should be included in the batched `record:crud` event
+
+        Override on subclasses to customize.
+        """
+        if not self._record_event_data:
+            model = self._formset_model
+            created = [obj.pk for obj in self.created_objects]
+            updated = [obj.pk for obj in self.updated_objects]
+            deleted = [obj.pk for obj in self.deleted_objects]
+            self._record_event_data = {
+                'ids': created + updated + deleted,
+                'created': created,
+                'updated': updated,
+                'deleted': deleted,
+                'action': self.action,
+                'model_name': model.__name__.lower() if model is not None else '',
+            }
+
+        self._record_event_data.update(kwargs)
+
+        return self._record_event_data
+
+    def invalidate_fragment_cache(self, *tags) -> None:
+        """Expire cached responses for the formset's model, the view's cache tags and `tags`.
+        """
+        if self._formset_model is not None:
+            tags = (*tags, model_tag(self._formset_model))
+        super().invalidate_fragment_cache(*tags)
+
+    def set_client_cache_headers(self, response: HttpResponse) -> HttpResponse:
+        """Expire / evict the client cache entries registered for every saved or deleted row.
+        """
+        return client_cache.set_headers_many(response, [*self.objects, *self.deleted_objects])
+
+    def add_success_message(self, formset) -> None:
+        msg = self.get_success_message({
+            'count': len(self.objects) + len(self.deleted_objects),
+            'created': len(self.created_objects),
+            'updated': len(self.updated_objects),
+            'deleted': len(self.deleted_objects),
+        })
+        if msg:
+            messages.success(self.request, msg, extra_tags='safe')
+
+    def perform_unpoly_validation(self, request):
+        """Validate every row of the formset, without saving it.
+        """
+        if self.is_vanilla_view:
+            formset = self.get_form(data=request.POST, files=request.FILES)
+        else:
+            formset = self.get_form()
+        with self.timing('validation'):
+            formset.is_valid()
+        return self.form_invalid(formset)
+
+
+class AsyncUnpolyFormViewMixin(AsyncUnpolyViewMixin, UnpolyFormViewMixin):
+    """Async counterpart of UnpolyFormViewMixin, for views such as CreateView / UpdateView.
+
+    Objects are fetched with the async ORM. `optimized_response()` and
+    `optimized_success_response()` may be defined as `async def`.
+
+    Forms are saved in a thread, in a transaction like the sync mixin, and
+    form validation runs in a thread, as form and model field validators
+    are sync-only and may query the database.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        if not hasattr(self, 'is_vanilla_view'):
+            self.is_vanilla_view = not hasattr(super(), 'get_form_kwargs')
+
+    def get_bound_form(self, **kwargs):
+        """Return the form bound to the POST data, for both Django generic and Vanilla views.
+        """
+        if self.is_vanilla_view:
+            if self.object is not None:
+                kwargs['instance'] = self.object
+            return self.get_form(data=self.request.POST, files=self.request.FILES, **kwargs)
+        return self.get_form()
+
+    async def get(self, request, *args, **kwargs) -> HttpResponse:
+        self.object = await self.aget_object()
+        if self.send_optimized_response():
+            return await _resolve(self.optimized_response())
+
+        if self.is_vanilla_view:
+            form = self.get_form(**({'instance': self.object} if self.object is not None else {}))
+            return self.render_to_response(await self.aget_context_data(form=form))
+
+        return self.render_to_response(await self.aget_context_data())
+
+    async def post(self, request, *args, **kwargs) -> HttpResponse:
+        if self.up.is_validating():
+            response = cache_key = None
+            if self.validation_cache_timeout is not None:
+                cache_key = await sync_to_async(self.get_validation_cache_key)()
+                response = await sync_to_async(self.get_cached_validation_response)(cache_key)
+            if response is None:
+                response = await self.aperform_unpoly_validation(request)
+                self.cache_validation_response(response, cache_key)
+            return response
+
+        self.object = await self.aget_object()
+        form = self.get_bound_form()
+        with self.timing('validation'):
+            is_valid = await sync_to_async(form.is_valid)()
+        if is_valid:
+            return await self.aform_valid(form)
+        return await self.aform_invalid(form)
+
+    async def put(self, *args, **kwargs) -> HttpResponse:
+        return await self.post(*args, **kwargs)
+
+    async def asave_form(self, form):
+        """Save the form in a thread, in one transaction with its many-to-many data.
+        """
+        return await sync_to_async(self.save_form)(form)
+
+    async def aform_valid(self, form) -> HttpResponse:
+        """Async version of `form_valid`.
+        """
+        try:
+            self.object = await self.asave_form(form)
+        except DatabaseError as e:
+            logger.exception(e)
+            return self.handle_integrity_error_response()
+
+        if self.fragment_cache_invalidation:
+            await sync_to_async(self.invalidate_fragment_cache)()
+
+        launched_from_select_field = self.request.GET.get('parent_select_field_id', '')
+        if self.up.is_unpoly() and launched_from_select_field:
+            return self.send_accept_layer(form, launched_from_select_field)
+
+        self.add_success_message(form)
+
+        if self.send_optimized_success_response():
+            response = await _resolve(self.optimized_success_response())
+            await sync_to_async(self.emit_record_event)(response)
+            return self.set_client_cache_headers(response)
+
+        success_url = self.get_success_url()
+        if self.send_inline_success_response():
+            response = await self.ainline_success_response_for(success_url)
+            if response is not None:
+                return response
+
+        return HttpResponseRedirect(success_url)
+
+    async def ainline_success_response_for(self, success_url: str) -> Optional[HttpResponse]:
+        """Async version of `inline_success_response_for`. Sync views are run in a thread.
+        """
+        resolved = self.get_inline_success_request(success_url)
+        if resolved is None:
+            return None
+
+        request, match = resolved
+        view = match.func if iscoroutinefunction(match.func) else sync_to_async(match.func)
+        response = await view(request, *match.args, **match.kwargs)
+        return self.inline_response(response, success_url)
+
+    async def aform_invalid(self, form) -> HttpResponse:
+        self.invalid_form_submission = True
+        return self.render_to_response(await self.aget_context_data(form=form))
+
+    async def aperform_unpoly_validation(self, request) -> HttpResponse:
+        """Async version of `perform_unpoly_validation`.
+        """
+        self.object = await self.aget_object()
+        form = self.get_bound_form(up_validate=True)
+        if self.unpoly_validate_template:
+            names = self.get_validation_field_names(form)
+            if names:
+                with self.timing('validation'):
+                    await sync_to_async(clean_fields)(form, names)
+                return self.field_validation_response(form, names)
+
+        with self.timing('validation'):
+            await sync_to_async(form.is_valid)()
+        return await self.aform_invalid(form)
+
+
 class UnpolyCrispyFormViewMixin(UnpolyFormViewMixin):
     """For views loading `django-crispy-forms`.
 
@@ -379,8 +1706,18 @@ class UnpolyCrispyFormViewMixin(UnpolyFormViewMixin):
         return super().get_form(*args, **kwargs)
 
 
+class AsyncUnpolyCrispyFormViewMixin(AsyncUnpolyFormViewMixin, UnpolyCrispyFormViewMixin):
+    """Async counterpart of UnpolyCrispyFormViewMixin."""
+
+
 __all__ = (
+    'up_context',
+    'up_renderer',
     'UnpolyViewMixin',
     'UnpolyFormViewMixin',
     'UnpolyCrispyFormViewMixin',
+    'UnpolyFormSetViewMixin',
+    'AsyncUnpolyViewMixin',
+    'AsyncUnpolyFormViewMixin',
+    'AsyncUnpolyCrispyFormViewMixin',
 )
@@ -0,0 +1,93 @@
+import logging
+from typing import Iterable, List, Set, Tuple
+
+from django.conf import settings
+from django.template import TemplateDoesNotExist, TemplateSyntaxError
+from django.template.loader import get_template
+from django.urls import get_resolver
+
+logger = logging.getLogger(__name__)
+
+# Settings naming templates that Unpoly responses render
+TEMPLATE_SETTINGS = (
+    'DEFAULT_UP_ERROR_TEMPLATE',
+    'UNPOLY_MODAL_TEMPLATE',
+    'UNPOLY_DRAWER_TEMPLATE',
+    'UNPOLY_POPUP_TEMPLATE',
+    'UNPOLY_COVER_TEMPLATE',
+)
+
+
+def _names(value) -> List[str]:
+    if not value:
+        return []
+    if isinstance(value, str):
+        return [value]
+    return [name for name in value if isinstance(name, str)]
+
+
+def view_template_names(view_class) -> List[str]:
+    """Return the templates a view class is configured to render."""
+    names = _names(getattr(view_class, 'template_name', None))
+    for template_name in view_class._unpoly_layer_templates.values():
+        names.extend(_names(template_name))
+    names.extend(_names(getattr(view_class, 'unpoly_validate_template', None)))
+    return names
+
+
+def configured_template_names(load_urlconf: bool = True) -> Set[str]:
+    """Return the layer templates set in settings, and the templates of every Unpoly view.
+
+    The URLconf is loaded first, so the views it routes to are imported. While apps
+    are loading it can't be, so pass `load_urlconf=False` to use the views imported so far.
+    """
+    from .views import view_classes
+
+    if load_urlconf:
+        get_resolver().url_patterns
+
+    names = set()
+    for setting in TEMPLATE_SETTINGS:
+        names.update(_names(getattr(settings, setting, None)))
+    for view_class in list(view_classes):
+        names.update(view_template_names(view_class))
+
+    return names
+
+
+def warm_templates(names: Iterable[str] = None) -> Tuple[List[str], List[Tuple[str, Exception]]]:
+    """Load and compile the templates, so the cached template loader has them before traffic arrives.
+
+    Returns the names of the compiled templates, and (name, error) for those that failed.
+    """
+    if names is None:
+        names = configured_template_names()
+
+    compiled = []
+    failed = []
+    for name in sorted(names):
+        try:
+            get_template(name)
+        except (TemplateDoesNotExist, TemplateSyntaxError) as e:
+            logger.warning('Unpoly template warm-up failed for %s: %s', name, e)
+            failed.append((name, e))
+        else:
+            compiled.append(name)
+
+    return compiled, failed
+
+
+def warm_up() -> None:
+    """Compile the templates of every Unpoly view before the worker serves traffic.
+
+    Call from `wsgi.py` or `asgi.py`, once the application is created.
+    """
+    warm_templates()
+
+
+__all__ = [
+    'configured_template_names',
+    'view_template_names',
+    'warm_templates',
+    'warm_up',
+]